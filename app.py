@@ -1,18 +1,44 @@
 from __future__ import annotations
 
-from ib_insync import util
+from ibkr_price_watcher.startup import PROFILE  # first, so --profile-startup times the imports below
+
+import argparse
+
+from ibkr_price_watcher import log
 from ibkr_price_watcher.config import load_config
 from ibkr_price_watcher.symbols import load_symbols
-from ibkr_price_watcher.watcher import run_async
+
+PROFILE.mark("imports")
 
 def _main():
+    ap = argparse.ArgumentParser(description="IBKR price watcher")
+    ap.add_argument(
+        "--profile-startup", action="store_true",
+        help="Log time per startup phase (imports, config, IB connect, contracts, subscriptions) once listening",
+    )
+    args = ap.parse_args()
+
     cfg = load_config()
+    cfg["profile_startup"] = args.profile_startup
+    PROFILE.mark("config")
     symbols = load_symbols(cfg["paths"]["symbols_dir"])
+    PROFILE.mark("symbols")
 
     if not cfg["discord"]["webhook_url"]:
-        print("[WARN] No Discord webhook configured; messages will only print to console.")
+        log.warn("No Discord webhook configured; messages will only print to console.")
+
+    # ib_insync (and the watcher) are only imported once there is something
+    # to watch; the shard supervisor never needs them
+    if cfg["shards"]["count"] > 1:
+        from ibkr_price_watcher.shards import ShardSupervisor
+
+        ShardSupervisor(cfg, symbols).run()
+    else:
+        from ib_insync import util
+        from ibkr_price_watcher.watcher import run_async
 
-    util.run(run_async(cfg, symbols))
+        PROFILE.mark("ib_insync")
+        util.run(run_async(cfg, symbols))
 
 if __name__ == "__main__":
     _main()
@@ -0,0 +1,160 @@
+"""
+Micro-benchmark: per-tick cost of PriceWatcher.on_tick at N symbols.
+
+"before" is a copy of the original dict/config-lookup implementation,
+"after" is the current slotted-state PriceWatcher.
+
+    python -m benchmarks.bench_on_tick --symbols 500 --ticks 200000
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from ibkr_price_watcher.watcher import PriceWatcher
+
+
+class _Contract:
+    __slots__ = ("symbol", "conId")
+
+    def __init__(self, symbol: str, conId: int):
+        self.symbol = symbol
+        self.conId = conId
+
+
+class FakeTicker:
+    __slots__ = ("contract", "last")
+
+    def __init__(self, contract: _Contract, last: float):
+        self.contract = contract
+        self.last = last
+
+    def marketPrice(self) -> float:
+        return self.last
+
+
+class LegacyPriceWatcher:
+    """
+    The pre-refactor hot path, kept here only as the benchmark baseline.
+    """
+
+    def __init__(self, cfg: Dict[str, Any], symbols: Dict[str, Dict[str, Any]]):
+        self.cfg = cfg
+        self.symbols = symbols
+        self.last_sent_price: Dict[str, float] = {}
+        self.last_sent_time: Dict[str, float] = {}
+
+    def _passes_thresholds(self, sym: str, new_price: float) -> bool:
+        prev = self.last_sent_price.get(sym)
+        if prev is None:
+            return True
+        s_cfg = self.symbols[sym]
+        dfl = self.cfg.get("defaults", {})
+        min_abs = float(s_cfg.get("min_change_abs", dfl.get("min_change_abs", 0.0)))
+        min_pct = float(s_cfg.get("min_change_pct", dfl.get("min_change_pct", 0.0)))
+        abs_change = abs(new_price - prev)
+        pct_change = (abs_change / prev * 100.0) if prev else 0.0
+        if abs_change < min_abs:
+            return False
+        if min_pct > 0.0 and pct_change < min_pct:
+            return False
+        return True
+
+    def _throttled(self, sym: str) -> bool:
+        throttle = float(self.cfg.get("throttle_seconds", 0))
+        if throttle <= 0:
+            return False
+        last_t = self.last_sent_time.get(sym, 0.0)
+        return (time.time() - last_t) < throttle
+
+    def _symbol_label(self, sym: str) -> str:
+        nick = self.symbols[sym].get("nickname")
+        return f"{nick} ({sym})" if nick else sym
+
+    def on_tick(self, ticker) -> None:
+        sym = ticker.contract.symbol
+        last = ticker.last
+        if last is None:
+            last = ticker.marketPrice()
+        if last is None or last != last:
+            return
+        if not self._passes_thresholds(sym, last):
+            return
+        if self._throttled(sym):
+            return
+        self.last_sent_price[sym] = last
+        self.last_sent_time[sym] = time.time()
+        content = f"💹 **{self._symbol_label(sym)}** last price: **{last:.4f}**"
+        print(content)
+
+
+def make_universe(n: int) -> Dict[str, Dict[str, Any]]:
+    return {
+        f"S{i:04d}": {
+            "symbol": f"S{i:04d}",
+            "min_change_pct": 0.5,
+            "baseline_price": 100.0,
+            "rules": [
+                {"name": "dip", "when": {"pct_change_down": 3.0}, "action": "BUY"},
+                {"name": "pop", "when": {"pct_change_up": 3.0}, "action": "SELL"},
+            ],
+        }
+        for i in range(n)
+    }
+
+
+def make_ticks(n_symbols: int, n_ticks: int, seed: int = 7) -> List[FakeTicker]:
+    rnd = random.Random(seed)
+    contracts = [_Contract(f"S{i:04d}", 1000 + i) for i in range(n_symbols)]
+    prices = [100.0] * n_symbols
+    ticks = []
+    for _ in range(n_ticks):
+        i = rnd.randrange(n_symbols)
+        prices[i] *= 1.0 + rnd.gauss(0.0, 0.001)
+        ticks.append(FakeTicker(contracts[i], prices[i]))
+    return ticks
+
+
+def _time_per_tick(handler, ticks: List[FakeTicker]) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter_ns()
+        for t in ticks:
+            handler(t)
+        elapsed = time.perf_counter_ns() - t0
+    return elapsed / len(ticks)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--symbols", type=int, default=500)
+    ap.add_argument("--ticks", type=int, default=200_000)
+    args = ap.parse_args()
+
+    cfg = {"throttle_seconds": 2.0, "defaults": {"min_change_abs": 0.0, "min_change_pct": 0.0}, "discord": {"webhook_url": ""}}
+    symbols = make_universe(args.symbols)
+    ticks = make_ticks(args.symbols, args.ticks)
+
+    legacy = LegacyPriceWatcher(cfg, symbols)
+    with contextlib.redirect_stdout(io.StringIO()):
+        current = PriceWatcher(None, cfg, symbols)
+    for c in {t.contract for t in ticks}:
+        current.bind(c)
+
+    before = _time_per_tick(legacy.on_tick, ticks)
+    after = _time_per_tick(current.on_tick, ticks)
+    print(json.dumps({
+        "symbols": args.symbols,
+        "ticks": args.ticks,
+        "before_ns_per_tick": round(before, 1),
+        "after_ns_per_tick": round(after, 1),
+        "speedup": round(before / after, 2) if after else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Behaviour checks for the pre-trade risk gate and order router; exits 1 on
+any failure.
+
+Drives RiskGate.check directly for every rejection reason, then
+OrderRouter.submit against FakeIB's order endpoint: quote/spread/sizing
+rejections, notional and position release on fill and cancel, and the
+counters rebuilt by sync() after a simulated restart.
+
+    python -m benchmarks.risk_checks
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import json
+import sys
+from typing import Any, Dict, List
+from zoneinfo import ZoneInfo
+
+from benchmarks.stubs import FakeIB
+
+NY = ZoneInfo("America/New_York")
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+
+
+def _ts(*args: int) -> float:
+    return dt.datetime(*args, tzinfo=NY).timestamp()
+
+
+# a Wednesday inside the regular session
+OPEN = _ts(2024, 6, 5, 11, 0)
+
+
+class Checks:
+    def __init__(self):
+        self.results: Dict[str, bool] = {}
+
+    def eq(self, name: str, got: Any, want: Any) -> None:
+        self.results[name] = got == want
+        if got != want:
+            print(f"FAIL {name}: got {got!r}, want {want!r}", file=sys.stderr)
+
+    def failures(self) -> List[str]:
+        return [k for k, ok in self.results.items() if not ok]
+
+
+def check_gate(c: Checks) -> None:
+    from ibkr_price_watcher.orders import RiskGate
+
+    g = RiskGate(session="REG", allowed_days=WEEKDAYS)
+    c.eq("gate.pass", g.check("AAA", "BUY", 100.0, OPEN), None)
+    c.eq("gate.day_not_allowed", g.check("AAA", "BUY", 100.0, _ts(2024, 6, 8, 11, 0)), "day_not_allowed")
+    c.eq("gate.market_closed.early", g.check("AAA", "BUY", 100.0, _ts(2024, 6, 5, 9, 29)), "market_closed")
+    c.eq("gate.market_closed.late", g.check("AAA", "BUY", 100.0, _ts(2024, 6, 5, 16, 0)), "market_closed")
+    # Friday evening in Phoenix is already Saturday in New York
+    c.eq(
+        "gate.exchange_tz",
+        RiskGate(allowed_days=WEEKDAYS).check(
+            "AAA", "BUY", 100.0, dt.datetime(2024, 6, 7, 22, 0, tzinfo=ZoneInfo("America/Phoenix")).timestamp()
+        ),
+        "day_not_allowed",
+    )
+
+    c.eq("gate.max_order_notional", RiskGate(max_order_notional=500).check("AAA", "BUY", 501.0, OPEN), "max_order_notional")
+
+    g = RiskGate(max_daily_notional=1000)
+    g.on_submit("AAA", 800.0, OPEN)
+    c.eq("gate.max_daily_notional", g.check("BBB", "BUY", 300.0, OPEN), "max_daily_notional")
+    g.on_done("AAA", 800.0)
+    c.eq("gate.release_on_done", (g.daily_notional, g.working, g.held), (0.0, {}, set()))
+    c.eq("gate.max_daily_notional.released", g.check("BBB", "BUY", 300.0, OPEN), None)
+    g.on_submit("AAA", 900.0, OPEN)
+    c.eq("gate.daily_rollover", g.check("BBB", "BUY", 300.0, _ts(2024, 6, 6, 0, 1)), None)
+
+    g = RiskGate(max_positions=1)
+    g.on_submit("AAA", 100.0, OPEN)
+    g.on_fill("AAA", "BUY", 1.0)
+    g.on_done("AAA", 0.0)
+    c.eq("gate.max_positions", g.check("BBB", "BUY", 100.0, OPEN), "max_positions")
+    c.eq("gate.max_positions.held_symbol", g.check("AAA", "BUY", 100.0, OPEN), None)
+    c.eq("gate.max_positions.sell", g.check("BBB", "SELL", 100.0, OPEN), None)
+    g.on_fill("AAA", "SELL", 1.0)
+    c.eq("gate.max_positions.released", g.check("BBB", "BUY", 100.0, OPEN), None)
+
+    def invalid(routing: Dict[str, Any]) -> str:
+        try:
+            RiskGate.from_strategy({"routing": routing})
+        except ValueError as e:
+            return type(e).__name__
+        return "accepted"
+
+    c.eq("gate.invalid.session", invalid({"only_if_market_open": True, "market_session": "RTH"}), "ValueError")
+    c.eq("gate.invalid.timezone", invalid({"exchange_timezone": "America/New_Yrok"}), "ValueError")
+    c.eq("gate.invalid.day", invalid({"allowed_days": ["Mon", "Funday"]}), "ValueError")
+    c.eq("gate.valid.ext", invalid({"only_if_market_open": True, "market_session": "ext"}), "accepted")
+
+    g = RiskGate(cooldown=60)
+    g.on_submit("AAA", 100.0, OPEN)
+    c.eq("gate.cooldown", g.check("AAA", "BUY", 100.0, OPEN + 59), "cooldown")
+    c.eq("gate.cooldown.other_symbol", g.check("BBB", "BUY", 100.0, OPEN + 1), None)
+    c.eq("gate.cooldown.elapsed", g.check("AAA", "BUY", 100.0, OPEN + 60), None)
+
+
+async def check_router(c: Checks) -> None:
+    from ib_insync import Stock
+    from ibkr_price_watcher.lines import LineScheduler
+    from ibkr_price_watcher.orders import OrderRouter, RiskGate
+
+    ib = FakeIB(ticks_per_sec=200, spread_bps=5.0)
+    lines = LineScheduler(ib, max_lines=10, reserve_lines=0)
+    for sym in ("AAA", "BBB", "CCC"):
+        lines.add(Stock(sym, "SMART", "USD"), 0.0)
+    await ib.qualifyContractsAsync(*(s.contract for s in lines.subs.values()))
+    lines.rebalance()
+    # subscribed, but never given a line, so it has no quote
+    lines.add(Stock("DDD", "SMART", "USD"), 0.0)
+    await asyncio.sleep(0.05)
+
+    # wall clock: sync() matches FakeIB's fill times against today
+    def router(**gate: Any) -> OrderRouter:
+        return OrderRouter(ib, lines, RiskGate(**gate), "checks", cancel_after=0.2)
+
+    marketable = {"limit_from_nbbo_bps": 50}
+    resting = {"limit_from_nbbo_bps": -500}
+    usd_1000 = {"quantity_mode": "notional_usd", "quantity_value": 1000}
+
+    r = router(max_order_notional=5000, max_daily_notional=3500, max_positions=2)
+    c.eq("router.not_subscribed", r.submit("ZZZ", "BUY", usd_1000, marketable), None)
+    c.eq("router.no_quote", r.submit("DDD", "BUY", usd_1000, marketable), None)
+    c.eq("router.spread", r.submit("AAA", "BUY", usd_1000, {"reject_if_spread_bps_gt": 1}), None)
+    c.eq("router.zero_quantity", r.submit("AAA", "BUY", {"quantity_mode": "notional_usd", "quantity_value": 1}, marketable), None)
+    c.eq("router.max_order_notional", r.submit("AAA", "BUY", {"quantity_mode": "notional_usd", "quantity_value": 6000}, marketable), None)
+    c.eq("router.rejects", r.rejects, {
+        "not_subscribed": 1, "no_quote": 1, "spread": 1, "zero_quantity": 1, "max_order_notional": 1,
+    })
+
+    # a marketable order fills: the position counts, its notional stays committed
+    filled = r.submit("AAA", "BUY", usd_1000, marketable)
+    await asyncio.sleep(0.05)
+    c.eq("router.fill.status", filled is not None and filled.orderStatus.status, "Filled")
+    c.eq("router.fill.position", r.gate.positions.get("AAA"), float(filled.order.totalQuantity) if filled else None)
+    c.eq("router.fill.working_released", r.gate.working, {})
+    committed = filled.order.totalQuantity * filled.order.lmtPrice if filled else 0.0
+    c.eq("router.fill.notional_kept", round(r.gate.daily_notional, 6), round(committed, 6))
+
+    # a resting order commits notional until its cancel timer releases it
+    resting_trade = r.submit("BBB", "BUY", usd_1000, resting)
+    c.eq("router.working", (r.gate.working, r.gate.held), ({"BBB": 1}, {"AAA", "BBB"}))
+    c.eq("router.max_positions", r.submit("CCC", "BUY", usd_1000, marketable), None)
+    c.eq("router.max_daily_notional", r.submit("AAA", "BUY", {"quantity_mode": "notional_usd", "quantity_value": 2000}, marketable), None)
+    c.eq("router.gate_rejects", (r.rejects.get("max_positions"), r.rejects.get("max_daily_notional")), (1, 1))
+
+    # restart: a new router rebuilds its counters from the account
+    r2 = router(max_order_notional=5000, max_daily_notional=3500, max_positions=2)
+    r2.sync()
+    c.eq("sync.positions", r2.gate.positions, r.gate.positions)
+    c.eq("sync.working", r2.gate.working, {"BBB": 1})
+    c.eq("sync.max_positions", r2.submit("CCC", "BUY", usd_1000, marketable), None)
+    c.eq("sync.rejects", r2.rejects, {"max_positions": 1})
+
+    await asyncio.sleep(0.4)
+    c.eq("router.cancel.status", resting_trade is not None and resting_trade.orderStatus.status, "Cancelled")
+    c.eq("router.cancel.released", (r.gate.working, r.gate.held), ({}, {"AAA"}))
+    c.eq("router.cancel.notional", round(r.gate.daily_notional, 6), round(committed, 6))
+    c.eq("sync.cancel.released", (r2.gate.working, r2.gate.held), ({}, {"AAA"}))
+    c.eq("sync.cancel.notional", round(r2.gate.daily_notional, 2), round(sum(
+        f.execution.shares * f.execution.price for f in ib.fills()
+    ), 2))
+    c.eq("router.counts", (r.counts["filled"], r.counts["cancelled"]), (1, 1))
+
+    dry = OrderRouter(ib, lines, RiskGate(), "dry", dry_run=True)
+    placed = len(ib.trades)
+    c.eq("dry_run.nothing_sent", (dry.submit("CCC", "BUY", usd_1000, marketable), len(ib.trades)), (None, placed))
+    ib.disconnect()
+
+
+def main() -> None:
+    c = Checks()
+    check_gate(c)
+    asyncio.run(check_router(c))
+    from ibkr_price_watcher import log
+
+    log.flush()
+    failures = c.failures()
+    print(json.dumps({"checks": len(c.results), "ok": not failures, "failures": failures}, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
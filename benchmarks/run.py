@@ -0,0 +1,396 @@
+"""
+Offline benchmark suite for the watcher and the EODHD fetcher.
+
+Every external service is replaced by a local stand-in (benchmarks/stubs.py),
+so this runs without IB, EODHD or Discord access. Each part runs in its own
+subprocess so peak RSS is reported per part. Results are printed (or written
+with --out) as JSON for comparing runs.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --part watcher --symbols 500 --tick-rate 20000
+    python -m benchmarks.run --part fetcher --tickers 300 --concurrency 16 --p429 0.05
+    python -m benchmarks.run --part congress --disclosures 200000
+    python -m benchmarks.run --part orders --orders 20000
+    python -m benchmarks.run --part reader --reader-tickers 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FETCHER_DIR = REPO_ROOT / "eodhd_fetcher"
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def _percentile(values: List[float], pct: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(pct / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+# ---------- watcher ----------
+
+def bench_watcher(args: argparse.Namespace) -> Dict[str, Any]:
+    from benchmarks.bench_on_tick import make_ticks, make_universe
+    from benchmarks.stubs import DiscordStub, FakeIB
+    from ibkr_price_watcher.watcher import PriceWatcher, run_async
+
+    symbols = make_universe(args.symbols)
+    cfg: Dict[str, Any] = {
+        "ib": {"host": "127.0.0.1", "port": 0, "clientId": 1, "useDelayed": False},
+        "discord": {"webhook_url": "", "queue_size": 1000},
+        "throttle_seconds": args.throttle,
+        "defaults": {"min_change_abs": 0.0, "min_change_pct": 0.0},
+        "paths": {"symbols_dir": ""},
+        "contract_cache": {"chunk_size": args.symbols, "chunk_pause_seconds": 0.0},
+        "market_data_lines": {"max_lines": args.max_lines, "mode": args.lines_mode, "report_seconds": 0},
+    }
+
+    # 1) flat-out on_tick throughput, no I/O
+    ticks = make_ticks(args.symbols, args.max_ticks)
+    with contextlib.redirect_stdout(io.StringIO()):
+        watcher = PriceWatcher(None, cfg, symbols)
+        for c in {t.contract for t in ticks}:
+            watcher.bind(c)
+        t0 = time.perf_counter()
+        for i, t in enumerate(ticks):
+            watcher.on_tick(t)
+            if i % 64 == 63:
+                watcher.flush_alerts()
+        flat_s = time.perf_counter() - t0
+
+    # 2) end to end through run_async at a fixed tick rate
+    discord = DiscordStub(p429=args.discord_p429).start()
+    cfg["discord"]["webhook_url"] = discord.webhook_url
+    fake = FakeIB(ticks_per_sec=args.tick_rate, max_lines=args.max_lines)
+
+    async def _drive() -> None:
+        task = asyncio.ensure_future(run_async(cfg, symbols, ib=fake))
+        await asyncio.sleep(args.duration)
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        asyncio.run(_drive())
+        e2e_s = time.perf_counter() - t0
+    time.sleep(0.2)
+    discord.stop()
+
+    latencies = []
+    for received, label, price in discord.price_alerts():
+        sent = fake.emitted.get((label, price))
+        if sent is not None:
+            latencies.append((received - sent) * 1000.0)
+
+    return {
+        "symbols": args.symbols,
+        "on_tick_ticks_per_sec": round(len(ticks) / flat_s, 1),
+        "e2e": {
+            "target_ticks_per_sec": args.tick_rate,
+            "ticks": fake.ticks,
+            "batches": fake.batches,
+            "ticks_per_sec": round(fake.ticks / e2e_s, 1),
+            "alerts_received": len(latencies),
+            "discord_posts": discord.posts,
+            "rejected_lines": fake.rejected,
+            "tick_to_alert_ms_p50": _round(_percentile(latencies, 50)),
+            "tick_to_alert_ms_p99": _round(_percentile(latencies, 99)),
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+# ---------- fetcher ----------
+
+def bench_fetcher(args: argparse.Namespace) -> Dict[str, Any]:
+    from benchmarks.stubs import EODHDStub
+
+    sys.path.insert(0, str(FETCHER_DIR))
+    os.environ.setdefault("EODHD_API_TOKEN", "benchmark")
+    import app as fetcher_app  # eodhd_fetcher/app.py
+
+    stub = EODHDStub(latency=args.latency, p429=args.p429).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg = {
+            "tickers": [f"T{i}.US" for i in range(args.tickers)],
+            "from": args.date_from,
+            "to": args.date_to,
+            "data": {"columnar": args.columnar},
+            "requests": {
+                "base_url": stub.base_url,
+                "concurrency": args.concurrency,
+                "rate_limit_per_sec": args.rate_limit,
+                "backoff_base": 0.05,
+            },
+            "output": {"directory": tmp, "format": args.format, "per_ticker": args.per_ticker},
+        }
+        cfg_path = Path(tmp) / "bench.config.json"
+        cfg_path.write_text(json.dumps(cfg), encoding="utf-8")
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            t0 = time.perf_counter()
+            rc = fetcher_app.run(cfg_path)
+            elapsed = time.perf_counter() - t0
+    stub.stop()
+    return {
+        "tickers": args.tickers,
+        "concurrency": args.concurrency,
+        "format": args.format,
+        "columnar": args.columnar,
+        "exit_code": rc,
+        "seconds": round(elapsed, 3),
+        "tickers_per_sec": round(args.tickers / elapsed, 1),
+        "http_requests": stub.requests,
+        "http_429": stub.throttled,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def bench_reader(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Point lookups (one ticker, one month) over a combined bar history written
+    as Parquet and as Feather, against loading the whole file with pandas.
+    """
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+    sys.path.insert(0, str(FETCHER_DIR))
+    from eodhd.columnar import BAR_SCHEMA, _with_ticker
+    from utils.bar_reader import BarReader
+    from utils.io_utils import StreamingWriter
+
+    rnd = np.random.default_rng(3)
+    days = np.arange(np.datetime64("2000-01-03"), np.datetime64("2000-01-03") + args.reader_days).astype("datetime64[D]")
+    out: Dict[str, Any] = {"tickers": args.reader_tickers, "rows": args.reader_tickers * len(days)}
+    with tempfile.TemporaryDirectory() as tmp:
+        writers = {fmt: StreamingWriter(Path(tmp) / fmt / f"combined_2000-01-03_2099-12-31.{fmt}", fmt)
+                   for fmt in ("parquet", "feather")}
+        for fmt in writers:
+            (Path(tmp) / fmt).mkdir()
+        for i in range(args.reader_tickers):
+            close = 100.0 * np.exp(np.cumsum(rnd.normal(0, 0.01, len(days))))
+            table = pa.Table.from_arrays(
+                [pa.array(days, pa.date32())] + [pa.array(close)] * 5 + [pa.array(rnd.integers(0, 10**6, len(days)))],
+                schema=BAR_SCHEMA,
+            )
+            table = _with_ticker(table, f"T{i:05d}.US")
+            for w in writers.values():
+                w.write_table(table)
+        for w in writers.values():
+            w.close()
+        lookups = [(f"T{int(rnd.integers(args.reader_tickers)):05d}.US", str(days[int(rnd.integers(len(days) - 31))]))
+                   for _ in range(args.lookups)]
+        for fmt in writers:
+            path = writers[fmt].out_path
+            reader = BarReader(path.parent)
+            t0 = time.perf_counter()
+            reader.read(lookups[0][0], lookups[0][1], None, ["close"])
+            first_ms = (time.perf_counter() - t0) * 1000.0
+            lat = []
+            rows = 0
+            for ticker, start in lookups:
+                end = str(np.datetime64(start) + 30)
+                t0 = time.perf_counter()
+                rows += reader.read(ticker, start, end, ["close"]).num_rows
+                lat.append((time.perf_counter() - t0) * 1000.0)
+            lat.sort()
+            t0 = time.perf_counter()
+            (pd.read_parquet if fmt == "parquet" else pd.read_feather)(path)
+            full_s = time.perf_counter() - t0
+            out[fmt] = {
+                "file_mb": round(path.stat().st_size / 2**20, 1),
+                "first_lookup_ms": round(first_ms, 2),
+                "lookup_ms_p50": round(lat[len(lat) // 2], 3),
+                "lookup_ms_p99": round(lat[min(len(lat) - 1, int(len(lat) * 0.99))], 3),
+                "rows_per_lookup": round(rows / len(lookups), 1),
+                "pandas_full_load_seconds": round(full_s, 3),
+            }
+    out["peak_rss_mb"] = _peak_rss_mb()
+    return out
+
+
+# ---------- congress trades ----------
+
+def bench_congress(args: argparse.Namespace) -> Dict[str, Any]:
+    from benchmarks.stubs import CongressStub
+    from ibkr_price_watcher.congress import CongressTradesProvider
+
+    strategy = json.loads((REPO_ROOT / "symbols" / "congress_aapl_autobuy.json").read_text(encoding="utf-8"))
+    p_cfg = strategy["signal_providers"]["congress_trades"]
+    p_cfg.pop("api_key_env", None)
+    stub = CongressStub().start()
+    p_cfg["base_url"] = stub.base_url
+    stub.add(stub.generate(args.disclosures, days=int(p_cfg.get("since_days", 30))))
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        provider = CongressTradesProvider("bench", strategy, Path(tmp) / "state.json")
+        t0 = time.perf_counter()
+        provider.poll()
+        backfill_s = time.perf_counter() - t0
+        fresh = stub.generate(100, days=1)
+        stub.add(fresh)
+        t0 = time.perf_counter()
+        signals = provider.poll()
+        poll_s = time.perf_counter() - t0
+    stub.stop()
+    return {
+        "disclosures": args.disclosures,
+        "backfill_seconds": round(backfill_s, 3),
+        "backfill_records_per_sec": round(args.disclosures / backfill_s, 1),
+        "unique_records": len(provider.dedup),
+        "incremental_poll_seconds": round(poll_s, 3),
+        "incremental_signals": len(signals),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def bench_orders(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Decision latency of the order path: quote lookup, limit price, sizing,
+    risk checks and placeOrder against FakeIB's order endpoint.
+    """
+    from ib_insync import Stock
+    from benchmarks.stubs import FakeIB
+    from ibkr_price_watcher.lines import LineScheduler
+    from ibkr_price_watcher.orders import OrderRouter, RiskGate
+
+    async def run() -> Dict[str, Any]:
+        ib = FakeIB(ticks_per_sec=1000)
+        lines = LineScheduler(ib, max_lines=args.order_symbols, reserve_lines=0)
+        for i in range(args.order_symbols):
+            lines.add(Stock(f"S{i:04d}", "SMART", "USD"), 0.0)
+        await ib.qualifyContractsAsync(*(s.contract for s in lines.subs.values()))
+        lines.rebalance()
+        await asyncio.sleep(0.05)
+        router = OrderRouter(ib, lines, RiskGate(max_order_notional=5000), "bench", cancel_after=0.5)
+        order = {"quantity_mode": "notional_usd", "quantity_value": 1000}
+        safety = {"limit_from_nbbo_bps": 15, "reject_if_spread_bps_gt": 30}
+        syms = list(lines.subs)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(args.orders):
+                router.submit(syms[i % len(syms)], "BUY" if i % 2 else "SELL", order, safety)
+            # let unfilled orders reach their cancel timer
+            while router.stats()["working"]:
+                await asyncio.sleep(0.05)
+        ib.disconnect()
+        return router.stats()
+
+    stats = asyncio.run(run())
+    return {
+        "orders": args.orders,
+        "symbols": args.order_symbols,
+        "submitted": stats["submitted"],
+        "filled": stats["filled"],
+        "cancelled": stats["cancelled"],
+        "rejected": stats["rejected"],
+        "decision_ms_p50": stats["decision_ms_p50"],
+        "decision_ms_p99": stats["decision_ms_p99"],
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _round(v: float | None) -> float | None:
+    return None if v is None else round(v, 3)
+
+
+def _strip_options(argv: List[str], names: tuple) -> List[str]:
+    out: List[str] = []
+    skip = False
+    for a in argv:
+        if skip:
+            skip = False
+        elif a in names:
+            skip = True
+        elif not a.startswith(tuple(n + "=" for n in names)):
+            out.append(a)
+    return out
+
+
+PARTS = {"watcher": bench_watcher, "fetcher": bench_fetcher, "congress": bench_congress, "orders": bench_orders, "reader": bench_reader}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--part", choices=["all", *PARTS], default="all")
+    ap.add_argument("--out", help="write JSON results to this file")
+    w = ap.add_argument_group("watcher")
+    w.add_argument("--symbols", type=int, default=500)
+    w.add_argument("--tick-rate", type=float, default=5000, help="ticks/sec emitted by FakeIB")
+    w.add_argument("--duration", type=float, default=5.0, help="seconds of end-to-end run")
+    w.add_argument("--throttle", type=float, default=2.0)
+    w.add_argument("--max-ticks", type=int, default=200_000, help="ticks for the flat-out on_tick run")
+    w.add_argument("--discord-p429", type=float, default=0.0)
+    w.add_argument("--max-lines", type=int, default=1000, help="concurrent market-data lines FakeIB serves")
+    w.add_argument("--lines-mode", choices=["rotate", "snapshot"], default="rotate")
+    f = ap.add_argument_group("fetcher")
+    f.add_argument("--tickers", type=int, default=200)
+    f.add_argument("--concurrency", type=int, default=8)
+    f.add_argument("--rate-limit", type=float, default=0, help="requests/sec (0 = unlimited)")
+    f.add_argument("--latency", type=float, default=0.02, help="stub response latency in seconds")
+    f.add_argument("--p429", type=float, default=0.0, help="probability of a 429 per request")
+    f.add_argument("--from", dest="date_from", default="2015-01-01")
+    f.add_argument("--to", dest="date_to", default="2024-12-31")
+    f.add_argument("--format", default="parquet")
+    f.add_argument("--per-ticker", action="store_true")
+    f.add_argument("--columnar", action="store_true")
+    r = ap.add_argument_group("reader")
+    r.add_argument("--reader-tickers", type=int, default=2000)
+    r.add_argument("--reader-days", type=int, default=5000, help="daily bars per ticker")
+    r.add_argument("--lookups", type=int, default=500)
+    c = ap.add_argument_group("congress")
+    c.add_argument("--disclosures", type=int, default=100_000, help="records in the stub feed's backfill")
+    o = ap.add_argument_group("orders")
+    o.add_argument("--orders", type=int, default=10_000, help="order decisions to time")
+    o.add_argument("--order-symbols", type=int, default=100)
+    args = ap.parse_args()
+
+    if args.part != "all":
+        result = {args.part: PARTS[args.part](args)}
+    else:
+        # one subprocess per part so peak RSS is not shared
+        result = {}
+        argv = _strip_options(sys.argv[1:], ("--part", "--out"))
+        for part in PARTS:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.run", "--part", part, *argv],
+                cwd=str(REPO_ROOT), capture_output=True, text=True, check=True,
+            ).stdout
+            result.update(json.loads(out)["results"])
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": result,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
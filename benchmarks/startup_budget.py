@@ -0,0 +1,142 @@
+"""
+Startup-time budget for the CSV fetcher path; exits 1 when it is exceeded.
+
+Runs `eodhd_fetcher/app.py --profile-startup` on a small CSV config against
+the stub EODHD server several times, and fails if the median time to be
+ready to fetch (imports + config + setup) is over --budget-ms, or if any of
+pyarrow/numpy/pandas was imported. The same is checked for batch mode
+(`--config <dir>` with --configs CSV configs sharing their tickers). The
+watcher's entry-point import time is reported alongside (not enforced).
+
+    python -m benchmarks.startup_budget
+    python -m benchmarks.startup_budget --budget-ms 150 --runs 9
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.stubs import EODHDStub
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FETCHER_DIR = REPO_ROOT / "eodhd_fetcher"
+
+_PROFILE_LINE = re.compile(r"Startup profile \(ms\): (.*)")
+READY_PHASES = ("imports", "config", "setup")
+
+
+def parse_profile(stdout: str) -> Dict[str, Any]:
+    """
+    Phases and heavy modules from the fetcher's --profile-startup line.
+    """
+    for line in reversed(stdout.splitlines()):
+        m = _PROFILE_LINE.search(line)
+        if m is None:
+            continue
+        fields = dict(kv.split("=", 1) for kv in m.group(1).split())
+        heavy = fields.pop("heavy_modules", "none")
+        fields.pop("total", None)
+        return {
+            "phases_ms": {k: float(v) for k, v in fields.items()},
+            "heavy_modules": [] if heavy == "none" else heavy.split(","),
+        }
+    raise RuntimeError(f"no startup profile in output:\n{stdout[-2000:]}")
+
+
+def run_fetcher(cfg_path: Path) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "app.py", "--config", str(cfg_path), "--profile-startup"],
+        cwd=str(FETCHER_DIR), capture_output=True, text=True,
+        env={**os.environ, "EODHD_API_TOKEN": "benchmark", "LOG_FORMAT": "text"},
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError(f"fetcher exited with {proc.returncode}:\n{proc.stderr[-2000:]}")
+    prof = parse_profile(proc.stdout)
+    prof["ready_ms"] = round(sum(prof["phases_ms"].get(p, 0.0) for p in READY_PHASES), 1)
+    prof["process_ms"] = round(wall_ms, 1)
+    return prof
+
+
+def watcher_import_ms() -> float:
+    """
+    Time to import the watcher's app.py (everything before config is read).
+    """
+    code = "import time; t = time.perf_counter(); import app; print((time.perf_counter() - t) * 1000.0)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=str(REPO_ROOT), capture_output=True, text=True, check=True)
+    return round(float(out.stdout.strip().splitlines()[-1]), 1)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--budget-ms", type=float, default=250.0, help="median imports + config + setup, in ms")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--tickers", type=int, default=2)
+    ap.add_argument("--configs", type=int, default=3, help="configs in the batch-mode directory")
+    args = ap.parse_args()
+
+    stub = EODHDStub(latency=0.0).start()
+    runs: List[Dict[str, Any]] = []
+    batch_runs: List[Dict[str, Any]] = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = {
+                "tickers": [f"T{i}.US" for i in range(args.tickers)],
+                "from": "2024-01-01",
+                "to": "2024-03-31",
+                "requests": {"base_url": stub.base_url},
+                "output": {"directory": tmp, "format": "csv", "per_ticker": True},
+            }
+            cfg_path = Path(tmp) / "startup.config.json"
+            cfg_path.write_text(json.dumps(cfg), encoding="utf-8")
+            runs = [run_fetcher(cfg_path) for _ in range(args.runs)]
+
+            # batch mode: overlapping ranges of the same tickers, one output directory each
+            batch_dir = Path(tmp) / "batch"
+            batch_dir.mkdir()
+            for i in range(args.configs):
+                b_cfg = {**cfg, "to": f"2024-03-{31 - i:02d}", "output": {**cfg["output"], "directory": str(Path(tmp) / f"out{i}")}}
+                (batch_dir / f"startup{i}.config.json").write_text(json.dumps(b_cfg), encoding="utf-8")
+            batch_runs = [run_fetcher(batch_dir) for _ in range(args.runs)]
+    finally:
+        stub.stop()
+
+    violations: List[str] = []
+
+    def summarize(label: str, runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        ready = statistics.median(r["ready_ms"] for r in runs)
+        heavy = sorted({m for r in runs for m in r["heavy_modules"]})
+        if ready > args.budget_ms:
+            violations.append(f"{label} ready in {ready:.1f}ms, budget {args.budget_ms:g}ms")
+        if heavy:
+            violations.append(f"{label} imported {', '.join(heavy)}")
+        return {
+            "ready_ms_p50": ready,
+            "process_ms_p50": statistics.median(r["process_ms"] for r in runs),
+            "phases_ms_p50": {p: statistics.median(r["phases_ms"].get(p, 0.0) for r in runs) for p in runs[0]["phases_ms"]},
+            "heavy_modules": heavy,
+        }
+
+    print(json.dumps({
+        "budget_ms": args.budget_ms,
+        "fetcher_csv": summarize("CSV fetcher", runs),
+        "fetcher_csv_batch": summarize("CSV fetcher (batch)", batch_runs),
+        "watcher_import_ms": watcher_import_ms(),
+        "ok": not violations,
+        "violations": violations,
+    }, indent=2))
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Behaviour checks for the fetcher's local bar store; exits 1 on any failure.
+
+Merges bars into a temporary BarStore and checks the ranges it asks to
+re-fetch: the daily tail starts the day after coverage, while a weekly or
+monthly tail reaches back to the still-forming bar (dated by the first day
+of its period, which can lie before the recorded coverage end), so the
+re-fetched bar replaces the partial one.
+
+    python -m benchmarks.store_checks
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from eodhd_fetcher.utils.bar_store import SETTLE_DAYS, BarStore
+
+
+class Checks:
+    def __init__(self):
+        self.results: Dict[str, bool] = {}
+
+    def eq(self, name: str, got: Any, want: Any) -> None:
+        self.results[name] = got == want
+        if got != want:
+            print(f"FAIL {name}: got {got!r}, want {want!r}", file=sys.stderr)
+
+    def failures(self) -> List[str]:
+        return [k for k, ok in self.results.items() if not ok]
+
+
+def _bar(date: dt.date, close: float) -> Dict[str, Any]:
+    return {"date": date.isoformat(), "close": close}
+
+
+def check_tails(c: Checks, store: BarStore) -> None:
+    today = dt.date.today()
+    month = today.replace(day=1)
+    prev_month = (month - dt.timedelta(days=1)).replace(day=1)
+    week = today - dt.timedelta(days=today.weekday())
+    start = (prev_month - dt.timedelta(days=60)).isoformat()
+
+    # monthly: the current month's bar is still forming
+    store.merge("M.US", "m", None, [_bar(prev_month, 1.0), _bar(month, 2.0)], start, today.isoformat())
+    later = (today + dt.timedelta(days=1)).isoformat()
+    tail = store.missing_ranges("M.US", "m", None, start, later)
+    c.eq("store.m.tail_count", len(tail), 1)
+    c.eq("store.m.tail_reaches_partial_bar", bool(tail) and tail[-1][0] <= month.isoformat(), True)
+    c.eq("store.m.tail_end", bool(tail) and tail[-1][1], later)
+    store.merge("M.US", "m", None, [_bar(month, 3.0)], tail[-1][0], later)
+    c.eq("store.m.partial_bar_replaced", [r["close"] for r in store.load("M.US", "m", None, start, later)], [1.0, 3.0])
+
+    # weekly: same for the current week's bar
+    store.merge("W.US", "w", None, [_bar(week - dt.timedelta(days=7), 1.0), _bar(week, 2.0)], start, today.isoformat())
+    tail = store.missing_ranges("W.US", "w", None, start, later)
+    c.eq("store.w.tail_reaches_partial_bar", bool(tail) and tail[-1][0] <= week.isoformat(), True)
+
+    # no last_bar in the meta (older stores): fall back to the period start
+    meta = store.root / "m" / "M.US.meta.json"
+    cov = json.loads(meta.read_text(encoding="utf-8"))
+    meta.write_text(json.dumps({"from": cov["from"], "to": cov["to"]}), encoding="utf-8")
+    tail = store.missing_ranges("M.US", "m", None, start, (today + dt.timedelta(days=40)).isoformat())
+    c.eq("store.m.no_last_bar", bool(tail) and tail[-1][0] <= month.isoformat(), True)
+
+    # daily: settled days are not fetched again
+    settled = today - dt.timedelta(days=SETTLE_DAYS + 2)
+    store.merge("D.US", "d", None, [_bar(settled, 1.0)], start, settled.isoformat())
+    c.eq(
+        "store.d.tail",
+        store.missing_ranges("D.US", "d", None, start, later),
+        [((settled + dt.timedelta(days=1)).isoformat(), later)],
+    )
+
+
+def main() -> None:
+    c = Checks()
+    with tempfile.TemporaryDirectory() as tmp:
+        check_tails(c, BarStore(Path(tmp)))
+    failures = c.failures()
+    print(json.dumps({"checks": len(c.results), "ok": not failures, "failures": failures}, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
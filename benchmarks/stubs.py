@@ -0,0 +1,512 @@
+"""
+Local stand-ins for the external services, used by the benchmark suite:
+
+- EODHDStub:   HTTP server imitating /api/eod/{ticker} (and the bulk endpoint)
+               with configurable latency and 429 injection.
+- DiscordStub: webhook that records when each alert line arrived.
+- CongressStub: congress-trades feed (/congresstrading?since=YYYY-MM-DD) over
+               a generated disclosure history, for the signal provider.
+- FakeIB:      just enough of ib_insync.IB for run_async, emitting random-walk
+               ticks for N symbols at a configurable rate, and an order
+               endpoint that fills marketable limit orders against its quotes.
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ib_insync import Contract, Execution, Fill, Order, OrderStatus, Position, Ticker, Trade
+
+
+class _Server:
+    """
+    ThreadingHTTPServer on an ephemeral localhost port, served from a thread.
+    """
+
+    handler_cls: type = BaseHTTPRequestHandler
+
+    def __init__(self):
+        outer = self
+
+        class Handler(self.handler_cls):  # type: ignore[misc, valid-type]
+            stub = outer
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# ---------- EODHD ----------
+
+class _EODHDHandler(BaseHTTPRequestHandler):
+    stub: "EODHDStub"
+
+    def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        stub = self.stub
+        url = urllib.parse.urlparse(self.path)
+        q = dict(urllib.parse.parse_qsl(url.query))
+        with stub.lock:
+            stub.requests += 1
+            throttle = stub.rnd.random() < stub.p429
+        if stub.latency:
+            time.sleep(stub.latency)
+        if throttle:
+            with stub.lock:
+                stub.throttled += 1
+            self._send(429, b"{}", {"Retry-After": str(stub.retry_after)})
+            return
+
+        parts = url.path.rstrip("/").split("/")
+        if len(parts) >= 2 and parts[-2] == "eod-bulk-last-day":
+            day = q.get("date") or dt.date.today().isoformat()
+            rows = [dict(stub.bar(day), code=code, exchange_short_name=parts[-1]) for code in stub.bulk_codes]
+            self._send(200, json.dumps(rows).encode())
+            return
+        if len(parts) >= 2 and parts[-2] == "eod":
+            rows = stub.bars(q.get("from", "2020-01-01"), q.get("to", "2020-12-31"))
+            if q.get("fmt") == "csv":
+                lines = ["Date,Open,High,Low,Close,Adjusted_close,Volume"]
+                lines += [
+                    f"{r['date']},{r['open']},{r['high']},{r['low']},{r['close']},{r['adjusted_close']},{r['volume']}"
+                    for r in rows
+                ]
+                self._send(200, ("\n".join(lines) + "\n").encode())
+            else:
+                self._send(200, json.dumps(rows).encode())
+            return
+        self._send(404, b'{"error": "not found"}')
+
+
+class EODHDStub(_Server):
+    handler_cls = _EODHDHandler
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        p429: float = 0.0,
+        retry_after: float = 0.05,
+        bulk_codes: Optional[List[str]] = None,
+        seed: int = 1,
+    ):
+        self.latency = latency
+        self.p429 = p429
+        self.retry_after = retry_after
+        self.bulk_codes = bulk_codes or [f"T{i}" for i in range(5000)]
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        super().__init__()
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/api"
+
+    @staticmethod
+    def bar(day: str) -> Dict[str, Any]:
+        return {"date": day, "open": 100.0, "high": 101.0, "low": 99.0, "close": 100.5,
+                "adjusted_close": 100.25, "volume": 1_000_000}
+
+    def bars(self, f: str, t: str) -> List[Dict[str, Any]]:
+        d, end = dt.date.fromisoformat(f), dt.date.fromisoformat(t)
+        out = []
+        while d <= end:
+            if d.weekday() < 5:
+                out.append(self.bar(d.isoformat()))
+            d += dt.timedelta(days=1)
+        return out
+
+
+# ---------- Discord ----------
+
+_ALERT_RE = re.compile(r"\*\*(?P<label>[^*]+)\*\* last price: \*\*(?P<price>[0-9.]+)\*\*")
+
+
+class _DiscordHandler(BaseHTTPRequestHandler):
+    stub: "DiscordStub"
+
+    def do_POST(self) -> None:
+        now = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        stub = self.stub
+        with stub.lock:
+            stub.posts += 1
+            throttle = stub.rnd.random() < stub.p429
+        if throttle:
+            payload = json.dumps({"retry_after": stub.retry_after}).encode()
+            self.send_response(429)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        content = json.loads(body).get("content", "")
+        with stub.lock:
+            for line in content.splitlines():
+                stub.lines.append((now, line))
+        self.send_response(204)
+        self.end_headers()
+
+
+class DiscordStub(_Server):
+    handler_cls = _DiscordHandler
+
+    def __init__(self, p429: float = 0.0, retry_after: float = 0.05, seed: int = 2):
+        self.p429 = p429
+        self.retry_after = retry_after
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.posts = 0
+        self.lines: List[Tuple[float, str]] = []
+        super().__init__()
+
+    @property
+    def webhook_url(self) -> str:
+        return f"{self.url}/webhook"
+
+    def price_alerts(self) -> List[Tuple[float, str, str]]:
+        """
+        (received_at, label, price) for every price alert line received.
+        """
+        out = []
+        with self.lock:
+            lines = list(self.lines)
+        for ts, line in lines:
+            m = _ALERT_RE.search(line)
+            if m:
+                out.append((ts, m.group("label"), m.group("price")))
+        return out
+
+
+# ---------- congress trades ----------
+
+class _CongressHandler(BaseHTTPRequestHandler):
+    stub: "CongressStub"
+
+    def do_GET(self) -> None:
+        stub = self.stub
+        url = urllib.parse.urlparse(self.path)
+        q = dict(urllib.parse.parse_qsl(url.query))
+        since = q.get("since", "")
+        with stub.lock:
+            stub.requests += 1
+            stub.since.append(since)
+            rows = [r for r in stub.rows if r["report_date"] >= since] if since else list(stub.rows)
+        body = json.dumps(rows).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CongressStub(_Server):
+    """
+    Serves `rows` (feed column names as in symbols/congress_aapl_autobuy.json),
+    filtered by the `since` report date. `generate()` builds a history of
+    random disclosures; `add()` publishes more while a provider is polling.
+    """
+
+    handler_cls = _CongressHandler
+
+    ACTORS = ["Nancy Pelosi", "Dan Crenshaw", "Tommy Tuberville", "Ro Khanna", "Mark Green", "Josh Gottheimer"]
+    TICKERS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "JPM"]
+    TYPES = ["Purchase", "Sale", "Sale (Partial)", "Buy", "Call Purchase"]
+
+    def __init__(self, rows: Optional[List[Dict[str, Any]]] = None, seed: int = 3):
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.rows: List[Dict[str, Any]] = list(rows or [])
+        self.requests = 0
+        self.since: List[str] = []
+        super().__init__()
+
+    @property
+    def base_url(self) -> str:
+        return self.url
+
+    def generate(self, n: int, end: Optional[dt.date] = None, days: int = 30) -> List[Dict[str, Any]]:
+        end = end or dt.date.today()
+        rnd = self.rnd
+        out = []
+        for _ in range(n):
+            reported = end - dt.timedelta(days=rnd.randrange(days))
+            traded = reported - dt.timedelta(days=rnd.randrange(1, 45))
+            low = rnd.choice([1001, 15001, 50001, 100001])
+            out.append({
+                "politician": rnd.choice(self.ACTORS) if rnd.random() < 0.1 else f"Member {rnd.randrange(535)}",
+                "ticker": rnd.choice(self.TICKERS),
+                "transaction": rnd.choice(self.TYPES),
+                "transaction_date": traded.isoformat(),
+                "report_date": reported.isoformat(),
+                "amount_low": low,
+                "amount_high": low * 3 - 3,
+                "chamber": rnd.choice(["House", "Senate"]),
+            })
+        return out
+
+    def add(self, rows: List[Dict[str, Any]]) -> None:
+        with self.lock:
+            self.rows.extend(rows)
+
+
+# ---------- IB ----------
+
+class _Event:
+    """
+    Minimal stand-in for an eventkit Event (`+=`, `-=`, `emit`).
+    """
+
+    def __init__(self):
+        self._handlers: List[Callable[..., Any]] = []
+
+    def __iadd__(self, fn: Callable[..., Any]) -> "_Event":
+        self._handlers.append(fn)
+        return self
+
+    def __isub__(self, fn: Callable[..., Any]) -> "_Event":
+        self._handlers.remove(fn)
+        return self
+
+    def emit(self, *args: Any) -> None:
+        for fn in list(self._handlers):
+            fn(*args)
+
+
+class FakeIB:
+    """
+    Offline IB replacement for run_async. After connecting it emits
+    `ticks_per_sec` random-walk ticks across the subscribed contracts, in
+    pendingTickersEvent batches every `batch_interval` seconds. The emission
+    time of every (symbol, price) is kept for tick-to-alert latency.
+
+    Like a real account, at most `max_lines` streams are served at once; further
+    reqMktData calls get a Ticker that never updates. Snapshot requests tick
+    once in the next batch.
+
+    Quotes are `spread_bps` wide around the last price. placeOrder returns a
+    Trade that fills in full once it is marketable (limit at or through the
+    far side), checked after `fill_delay` seconds and on every batch;
+    cancelOrder cancels it. Market orders fill at the far side. Fills,
+    positions and working orders are kept across disconnect/reconnect like
+    an account's, for positions(), fills() and openTrades().
+    """
+
+    def __init__(
+        self,
+        ticks_per_sec: float = 5000,
+        batch_interval: float = 0.01,
+        seed: int = 3,
+        max_lines: Optional[int] = None,
+        spread_bps: float = 5.0,
+        fill_delay: float = 0.0,
+    ):
+        self.ticks_per_sec = ticks_per_sec
+        self.batch_interval = batch_interval
+        self.rnd = random.Random(seed)
+        self.pendingTickersEvent = _Event()
+        self.disconnectedEvent = _Event()
+        self.connectedEvent = _Event()
+        self.clientId = 0
+        self.connected = False
+        self.max_lines = max_lines
+        self.tickers: Dict[int, Ticker] = {}
+        self._known: Dict[int, Ticker] = {}
+        self._snapshots: List[Ticker] = []
+        self.rejected = 0
+        self.emitted: Dict[Tuple[str, str], float] = {}
+        self.ticks = 0
+        self.batches = 0
+        self._task: Optional[asyncio.Task] = None
+        self._next_con_id = 1000
+        self.spread_bps = spread_bps
+        self.fill_delay = fill_delay
+        self.trades: Dict[int, Trade] = {}
+        self._working: Dict[int, Trade] = {}
+        self._next_order_id = 1
+        self._fills: List[Fill] = []
+        self._positions: Dict[int, Position] = {}
+
+    # -- connection --
+
+    async def connectAsync(self, host: str, port: int, clientId: int = 0, **kwargs: Any) -> "FakeIB":
+        self.clientId = clientId
+        self.connected = True
+        self.connectedEvent.emit()
+        return self
+
+    def isConnected(self) -> bool:
+        return self.connected
+
+    def disconnect(self) -> None:
+        """
+        Close the connection; like IB, every market data subscription is dropped.
+        Also used to simulate TWS/Gateway going away.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.tickers.clear()
+        self._snapshots.clear()
+        if self.connected:
+            self.connected = False
+            self.disconnectedEvent.emit()
+
+    def reqMarketDataType(self, marketDataType: int) -> None:
+        pass
+
+    # -- contracts / market data --
+
+    async def qualifyContractsAsync(self, *contracts: Contract) -> List[Contract]:
+        for c in contracts:
+            if not c.conId:
+                c.conId = self._next_con_id
+                self._next_con_id += 1
+        return list(contracts)
+
+    def reqMktData(self, contract: Contract, genericTickList: str = "", snapshot: bool = False,
+                   regulatorySnapshot: bool = False, mktDataOptions: Any = None) -> Ticker:
+        t = self._known.get(contract.conId)
+        if t is None:
+            t = self._known[contract.conId] = Ticker(contract=contract)
+            t.last = 100.0
+            self._quote(t)
+        if snapshot:
+            self._snapshots.append(t)
+        elif self.max_lines is not None and len(self.tickers) >= self.max_lines:
+            self.rejected += 1  # IB error 101: max number of tickers reached
+        else:
+            self.tickers[contract.conId] = t
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._pump())
+        return t
+
+    def cancelMktData(self, contract: Contract) -> None:
+        self.tickers.pop(contract.conId, None)
+
+    async def _pump(self) -> None:
+        per_batch = max(1, int(self.ticks_per_sec * self.batch_interval))
+        next_at = time.perf_counter()
+        while True:
+            next_at += self.batch_interval
+            delay = next_at - time.perf_counter()
+            await asyncio.sleep(max(0.0, delay))
+            tickers = list(self.tickers.values())
+            snaps, self._snapshots = self._snapshots, []
+            if not tickers and not snaps:
+                continue
+            batch = []
+            now = time.perf_counter()
+            for i in range(per_batch + len(snaps)):
+                if i < len(snaps):
+                    t = snaps[i]
+                elif tickers:
+                    t = self.rnd.choice(tickers)
+                else:
+                    break
+                t.last = round(t.last * (1.0 + self.rnd.gauss(0.0, 0.002)), 4)
+                self._quote(t)
+                self.emitted.setdefault((t.contract.symbol, f"{t.last:.4f}"), now)
+                batch.append(t)
+            self.ticks += len(batch)
+            self.batches += 1
+            self.pendingTickersEvent.emit(set(batch))
+            for trade in list(self._working.values()):
+                self._try_fill(trade)
+
+    def _quote(self, t: Ticker) -> None:
+        half = t.last * self.spread_bps / 2e4
+        t.bid = round(t.last - half, 2)
+        t.ask = round(t.last + half, 2)
+
+    # -- orders --
+
+    def placeOrder(self, contract: Contract, order: Order) -> Trade:
+        if not order.orderId:
+            order.orderId = self._next_order_id
+            self._next_order_id += 1
+        trade = Trade(contract, order, OrderStatus(orderId=order.orderId, status="Submitted",
+                                                    remaining=order.totalQuantity))
+        self.trades[order.orderId] = trade
+        self._working[order.orderId] = trade
+        asyncio.get_running_loop().call_later(self.fill_delay, self._try_fill, trade)
+        return trade
+
+    def positions(self) -> List[Position]:
+        return [p for p in self._positions.values() if p.position]
+
+    def fills(self) -> List[Fill]:
+        return list(self._fills)
+
+    def openTrades(self) -> List[Trade]:
+        return list(self._working.values())
+
+    def cancelOrder(self, order: Order) -> None:
+        trade = self._working.pop(order.orderId, None)
+        if trade is None:
+            return
+        trade.orderStatus.status = "Cancelled"
+        trade.statusEvent.emit(trade)
+        trade.cancelledEvent.emit(trade)
+
+    def _try_fill(self, trade: Trade) -> None:
+        if trade.order.orderId not in self._working:
+            return
+        t = self._known.get(trade.contract.conId)
+        if t is None:
+            return
+        order = trade.order
+        buy = order.action == "BUY"
+        price = t.ask if buy else t.bid
+        if order.orderType == "LMT" and (order.lmtPrice < price if buy else order.lmtPrice > price):
+            return
+        del self._working[order.orderId]
+        qty = order.totalQuantity
+        now = dt.datetime.now(dt.timezone.utc)
+        ex = Execution(
+            execId=f"fake.{order.orderId}", time=now, side="BOT" if buy else "SLD", shares=qty,
+            price=price, orderId=order.orderId, cumQty=qty, avgPrice=price, orderRef=order.orderRef,
+        )
+        fill = Fill(trade.contract, ex, None, now)
+        trade.fills.append(fill)
+        self._fills.append(fill)
+        c = trade.contract
+        held = self._positions.get(c.conId)
+        self._positions[c.conId] = Position(
+            "FAKE", c, (held.position if held else 0.0) + (qty if buy else -qty), price
+        )
+        st = trade.orderStatus
+        st.status, st.filled, st.remaining, st.avgFillPrice, st.lastFillPrice = "Filled", qty, 0.0, price, price
+        trade.fillEvent.emit(trade, fill)
+        trade.statusEvent.emit(trade)
+        trade.filledEvent.emit(trade)
@@ -1,16 +1,141 @@
 from __future__ import annotations
 
+from utils.startup import PROFILE  # first, so --profile-startup times the imports below
+
 import argparse
+import os
 import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
 from eodhd.client import EODHDClient
-from eodhd.service import fetch_for_ticker
+from eodhd.ratelimit import TokenBucket
+from eodhd.service import (
+    fetch_bulk_for_exchange,
+    fetch_for_ticker,
+    fetch_table_for_ticker,
+    split_ticker,
+)
 from utils.config_loader import load_config, filename_from_template, AppConfig, ConfigError
-from utils.io_utils import ensure_dir, write_rows
+from utils.bar_store import BarStore
+from utils.emit import emit_rows, emit_table, outputs
+from utils.io_utils import StreamingWriter, ensure_dir
+from utils.metrics import REGISTRY, MetricsDump
 from utils import log_utils as log
 
+PROFILE.mark("imports")
+
+def _process_ticker(
+    client: EODHDClient, cfg: AppConfig, ticker: str, store: Optional[BarStore] = None
+) -> List[List[Dict]]:
+    """
+    Fetch one ticker. Per-ticker output is written here; rows destined for the
+    combined files are returned to the caller, one batch per output.
+
+    With data.derive_locally the raw daily bars are downloaded once and every
+    output is derived from them instead of requested separately.
+    """
+    if not cfg.derive_locally:
+        rows = fetch_for_ticker(
+            client,
+            ticker=ticker,
+            fdate=cfg.date_from,
+            tdate=cfg.date_to,
+            period=cfg.period,
+            order=cfg.order,
+            adjusted=cfg.adjusted,
+            store=store,
+        )
+        return [emit_rows(cfg, ticker, rows, cfg.date_from, cfg.date_to)]
+
+    from eodhd.derive import derive_rows
+
+    raw = fetch_for_ticker(
+        client, ticker=ticker, fdate=cfg.date_from, tdate=cfg.date_to,
+        period="d", order="a", adjusted=None, store=store,
+    )
+    return [
+        emit_rows(cfg, ticker, derive_rows(raw, period, adjusted, cfg.order), cfg.date_from, cfg.date_to, out_dir)
+        for period, adjusted, out_dir in outputs(cfg)
+    ]
+
+
+def _process_ticker_columnar(
+    client: EODHDClient, cfg: AppConfig, ticker: str, store: Optional[BarStore] = None
+) -> List[Any]:
+    """
+    Columnar counterpart of _process_ticker: returns one pyarrow Table per
+    output for the combined files (None once the per-ticker file is written).
+    """
+    ticker_col = not cfg.per_ticker and cfg.include_ticker_col
+    if not cfg.derive_locally:
+        table = fetch_table_for_ticker(
+            client,
+            ticker=ticker,
+            fdate=cfg.date_from,
+            tdate=cfg.date_to,
+            period=cfg.period,
+            order=cfg.order,
+            adjusted=cfg.adjusted,
+            store=store,
+            ticker_col=ticker_col,
+        )
+        return [emit_table(cfg, ticker, table, cfg.date_from, cfg.date_to)]
+
+    from eodhd.derive import derive_table
+
+    raw = fetch_table_for_ticker(
+        client, ticker=ticker, fdate=cfg.date_from, tdate=cfg.date_to,
+        period="d", order="a", adjusted=None, store=store,
+    )
+    label = ticker if ticker_col else None
+    return [
+        emit_table(
+            cfg, ticker, derive_table(raw, period, adjusted, cfg.order, label), cfg.date_from, cfg.date_to, out_dir
+        )
+        for period, adjusted, out_dir in outputs(cfg)
+    ]
+
+
+def _raise(exc: Exception) -> Callable[[], Any]:
+    def _f() -> Any:
+        raise exc
+    return _f
+
+
+def _bulk_daily(
+    client: EODHDClient, cfg: AppConfig, collect: Callable[[str, Callable[[], Any]], None]
+) -> None:
+    """
+    mode=bulk_daily: one eod-bulk-last-day request per exchange for the `to`
+    date, fanned out to the configured tickers.
+    """
+    day = cfg.date_to
+    by_exchange: Dict[str, List[str]] = {}
+    for ticker in cfg.tickers:
+        by_exchange.setdefault(split_ticker(ticker)[1].upper(), []).append(ticker)
+
+    for exchange, tickers in by_exchange.items():
+        try:
+            found = fetch_bulk_for_exchange(client, exchange, tickers, day)
+        except Exception as e:
+            for ticker in tickers:
+                collect(ticker, _raise(e))
+            continue
+        log.info(f"{exchange}: bulk {day} matched {len(found)}/{len(tickers)} tickers")
+        for ticker in tickers:
+            rows = found.get(ticker, [])
+            if cfg.columnar:
+                from eodhd.columnar import table_from_rows
+
+                label = ticker if not cfg.per_ticker and cfg.include_ticker_col else None
+                table = table_from_rows(rows, label)
+                collect(ticker, lambda: [emit_table(cfg, ticker, table, day, day)])
+            else:
+                collect(ticker, lambda: [emit_rows(cfg, ticker, rows, day, day)])
+
 
 def run(config_path: Path) -> int:
     try:
@@ -18,57 +143,86 @@ def run(config_path: Path) -> int:
     except ConfigError as e:
         log.error(str(e))
         return 2
+    PROFILE.mark("config")
 
-    ensure_dir(cfg.out_dir)
+    outs = outputs(cfg)
+    for _, _, out_dir in outs:
+        ensure_dir(out_dir)
 
+    limiter = TokenBucket(cfg.rate_limit_per_sec) if cfg.rate_limit_per_sec > 0 else None
     client = EODHDClient(
         api_token=cfg.api_token,
         timeout=cfg.timeout,
         max_retries=cfg.max_retries,
         backoff_base=cfg.backoff_base,
+        base_url=cfg.base_url,
+        pool_size=max(cfg.concurrency, 1),
+        limiter=limiter,
+        metrics=REGISTRY,
     )
 
-    all_rows: List[Dict] = []
+    store = BarStore(cfg.store_dir) if cfg.store_dir is not None else None
+
+    combined: List[StreamingWriter] = []
+    if not cfg.per_ticker:
+        # bulk_daily only ever holds the `to` date
+        fdate = cfg.date_to if cfg.mode == "bulk_daily" else cfg.date_from
+        out_name = filename_from_template(
+            cfg.combined_filename, "combined", fdate, cfg.date_to, cfg.out_format
+        )
+        combined = [StreamingWriter(out_dir / out_name, cfg.out_format) for _, _, out_dir in outs]
+
     errors: List[str] = []
 
-    for ticker in cfg.tickers:
+    process = _process_ticker_columnar if cfg.columnar else _process_ticker
+    PROFILE.mark("setup")
+
+    def _collect(ticker: str, result: Callable[[], Any]) -> None:
         try:
-            rows = fetch_for_ticker(
-                client,
-                ticker=ticker,
-                fdate=cfg.date_from,
-                tdate=cfg.date_to,
-                period=cfg.period,
-                order=cfg.order,
-                adjusted=cfg.adjusted,
-            )
-            if rows:
-                if cfg.per_ticker:
-                    out_name = filename_from_template(
-                        cfg.filename_template, ticker, cfg.date_from, cfg.date_to, cfg.out_format
-                    )
-                    out_path = cfg.out_dir / out_name
-                    write_rows(rows, out_path, cfg.out_format)
-                    log.info(f"{ticker}: wrote {len(rows)} rows -> {out_path}")
-                else:
-                    if cfg.include_ticker_col:
-                        for r in rows:
-                            r["ticker"] = ticker
-                    all_rows.extend(rows)
-            else:
-                log.warn(f"{ticker}: no data returned.")
+            batches = result()
         except Exception as e:
             msg = f"{ticker}: {e}"
             errors.append(msg)
             log.error(msg)
+            return
+        for writer, batch in zip(combined, batches):
+            if batch is None:
+                continue
+            if cfg.columnar:
+                writer.write_table(batch)
+            else:
+                writer.write(batch)
 
-    if not cfg.per_ticker:
-        out_name = filename_from_template(
-            cfg.combined_filename, "combined", cfg.date_from, cfg.date_to, cfg.out_format
-        )
-        out_path = cfg.out_dir / out_name
-        write_rows(all_rows, out_path, cfg.out_format)
-        log.info(f"Combined: wrote {len(all_rows)} rows -> {out_path}")
+    try:
+        if cfg.mode == "bulk_daily":
+            _bulk_daily(client, cfg, _collect)
+        elif cfg.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=cfg.concurrency) as pool:
+                pending: Deque[Tuple[str, Future]] = deque()
+                for ticker in cfg.tickers:
+                    pending.append((ticker, pool.submit(process, client, cfg, ticker, store)))
+                    # Collect in config order, holding at most a small window
+                    # of finished batches in memory.
+                    if len(pending) >= cfg.concurrency * 2:
+                        t, fut = pending.popleft()
+                        _collect(t, fut.result)
+                while pending:
+                    t, fut = pending.popleft()
+                    _collect(t, fut.result)
+        else:
+            for ticker in cfg.tickers:
+                _collect(ticker, lambda: process(client, cfg, ticker, store))
+    except BaseException:
+        for writer in combined:
+            writer.abort()
+        raise
+    finally:
+        client.close()
+
+    for writer in combined:
+        writer.close()
+        log.info(f"Combined: wrote {writer.rows_written} rows -> {writer.out_path}")
+    PROFILE.mark("fetch")
 
     if errors:
         log.warn("\nFinished with some errors:\n- " + "\n- ".join(errors))
@@ -79,6 +233,33 @@ def run(config_path: Path) -> int:
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Config-driven EODHD fetcher")
-    parser.add_argument("--config", required=True, help="Path to JSON config file")
+    parser.add_argument(
+        "--config", required=True, action="append",
+        help="Path to JSON config file; repeat it or pass a directory to run a batch with shared downloads",
+    )
+    parser.add_argument(
+        "--metrics-out", type=Path,
+        help="Write request latency/retry and write throughput metrics here (JSON, or Prometheus text for *.prom)",
+    )
+    parser.add_argument("--metrics-interval", type=float, default=15.0, help="Seconds between metrics rewrites (0 = only at exit)")
+    parser.add_argument("--log-format", choices=("text", "json"), default=os.getenv("LOG_FORMAT", "text"))
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="Report time spent on imports, config, setup and fetching, and which heavy backends were loaded",
+    )
     args = parser.parse_args()
-    sys.exit(run(Path(args.config)))
+    log.configure(args.log_format)
+    dump = MetricsDump(args.metrics_out, args.metrics_interval).start() if args.metrics_out else None
+    try:
+        if len(args.config) == 1 and not Path(args.config[0]).is_dir():
+            code = run(Path(args.config[0]))
+        else:
+            from batch import config_paths, run_batch
+
+            code = run_batch(config_paths(args.config))
+    finally:
+        if dump is not None:
+            dump.close()
+        if args.profile_startup:
+            log.info(PROFILE.format())
+    sys.exit(code)
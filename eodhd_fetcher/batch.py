@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import bisect
+import datetime as dt
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from eodhd.client import EODHDClient
+from eodhd.ratelimit import TokenBucket
+from eodhd.service import fetch_bulk_for_exchange, fetch_for_ticker, split_ticker
+from utils.bar_store import BarStore
+from utils.config_loader import load_config, filename_from_template, AppConfig, ConfigError
+from utils.emit import Output, emit_rows, emit_table, outputs
+from utils.io_utils import StreamingWriter, ensure_dir
+from utils.metrics import REGISTRY
+from utils.startup import PROFILE
+from utils import log_utils as log
+
+# (base_url, ticker, period, adjusted) of one series on the wire
+FetchKey = Tuple[str, str, str, Optional[int]]
+
+
+@dataclass
+class _Job:
+    """
+    One config of the batch and its open output files.
+    """
+    path: Path
+    cfg: AppConfig
+    outputs: List[Output]
+    combined: List[StreamingWriter] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _Fetch:
+    """
+    One series to download once and hand to every job that needs it.
+    """
+    key: FetchKey
+    ranges: List[Tuple[str, str]]
+    jobs: List[_Job]
+    store: Optional[BarStore] = None
+
+
+@dataclass
+class _Bulk:
+    """
+    One eod-bulk-last-day request serving the bulk_daily jobs of an exchange and day.
+    """
+    base_url: str
+    exchange: str
+    day: str
+    tickers: List[str]
+    jobs: List[_Job]
+
+
+def config_paths(args: List[str]) -> List[Path]:
+    """
+    Expand --config arguments: files as given, directories to their *.json files.
+    """
+    out: List[Path] = []
+    for a in args:
+        p = Path(a)
+        out.extend(sorted(p.glob("*.json")) if p.is_dir() else [p])
+    return out
+
+
+def _next_day(s: str) -> str:
+    return (dt.date.fromisoformat(s) + dt.timedelta(days=1)).isoformat()
+
+
+def merge_ranges(ranges: List[Tuple[str, str]], period: str) -> List[Tuple[str, str]]:
+    """
+    Minimal set of date ranges covering `ranges`. Daily ranges that overlap
+    or touch are merged; weekly/monthly bars depend on where the range
+    starts, so those are only deduplicated.
+    """
+    if period != "d":
+        return sorted(set(ranges))
+    out: List[Tuple[str, str]] = []
+    for f, t in sorted(ranges):
+        if out and f <= _next_day(out[-1][1]):
+            if t > out[-1][1]:
+                out[-1] = (out[-1][0], t)
+        else:
+            out.append((f, t))
+    return out
+
+
+def _fetch_key(cfg: AppConfig, ticker: str) -> FetchKey:
+    if cfg.derive_locally:
+        return (cfg.base_url, ticker, "d", None)
+    return (cfg.base_url, ticker, cfg.period, cfg.adjusted)
+
+
+def plan(jobs: List[_Job]) -> Tuple[List[_Fetch], List[_Bulk]]:
+    """
+    Merge every job's requests into the fetches actually needed, in order of
+    first appearance.
+    """
+    wanted: Dict[FetchKey, List[Tuple[str, str]]] = {}
+    users: Dict[FetchKey, List[_Job]] = {}
+    stores: Dict[FetchKey, Optional[Path]] = {}
+    bulks: Dict[Tuple[str, str, str], _Bulk] = {}
+    for job in jobs:
+        cfg = job.cfg
+        for ticker in cfg.tickers:
+            if cfg.mode == "bulk_daily":
+                exchange = split_ticker(ticker)[1].upper()
+                b = bulks.setdefault(
+                    (cfg.base_url, exchange, cfg.date_to), _Bulk(cfg.base_url, exchange, cfg.date_to, [], [])
+                )
+                if ticker not in b.tickers:
+                    b.tickers.append(ticker)
+                if job not in b.jobs:
+                    b.jobs.append(job)
+                continue
+            key = _fetch_key(cfg, ticker)
+            wanted.setdefault(key, []).append((cfg.date_from, cfg.date_to))
+            if job not in users.setdefault(key, []):
+                users[key].append(job)
+            if stores.get(key) is None:
+                stores[key] = cfg.store_dir
+    fetches = [
+        _Fetch(key, merge_ranges(ranges, key[2]), users[key], BarStore(stores[key]) if stores[key] else None)
+        for key, ranges in wanted.items()
+    ]
+    return fetches, list(bulks.values())
+
+
+def _client(jobs: List[_Job]) -> EODHDClient:
+    """
+    One client per API root, sized for the busiest config and throttled to
+    the strictest rate limit among them.
+    """
+    cfgs = [j.cfg for j in jobs]
+    limits = [c.rate_limit_per_sec for c in cfgs if c.rate_limit_per_sec > 0]
+    concurrency = max(c.concurrency for c in cfgs)
+    return EODHDClient(
+        api_token=cfgs[0].api_token,
+        timeout=max(c.timeout for c in cfgs),
+        max_retries=max(c.max_retries for c in cfgs),
+        backoff_base=max(c.backoff_base for c in cfgs),
+        base_url=cfgs[0].base_url,
+        pool_size=concurrency,
+        limiter=TokenBucket(min(limits)) if limits else None,
+        metrics=REGISTRY,
+    )
+
+
+def _download(client: EODHDClient, fetch: _Fetch) -> List[Tuple[str, str, List[Dict]]]:
+    _, ticker, period, adjusted = fetch.key
+    return [
+        (f, t, fetch_for_ticker(
+            client, ticker=ticker, fdate=f, tdate=t, period=period, order="a", adjusted=adjusted, store=fetch.store,
+        ))
+        for f, t in fetch.ranges
+    ]
+
+
+def _ordered(rows: List[Dict], order: str) -> List[Dict]:
+    # copies: emit_rows may add the ticker column, and other jobs share the dicts
+    out = [dict(r) for r in rows]
+    if order == "d":
+        out.reverse()
+    return out
+
+
+def _deliver(job: _Job, ticker: str, rows: List[Dict], fdate: str, tdate: str) -> None:
+    """
+    Write one ticker's share of a download to each of the job's outputs.
+    `rows` are ascending and already limited to the job's date range.
+    """
+    cfg = job.cfg
+    derive = cfg.derive_locally and cfg.mode != "bulk_daily"
+    if cfg.columnar or derive:
+        # numpy/pyarrow: a plain CSV/JSON batch never imports them
+        from eodhd.columnar import table_from_rows
+        from eodhd.derive import derive_rows, derive_table
+
+    label = ticker if not cfg.per_ticker and cfg.include_ticker_col else None
+    for i, (period, adjusted, out_dir) in enumerate(job.outputs):
+        if not derive:
+            period, adjusted = "d", None  # fetched as configured; only order it
+        if cfg.columnar:
+            table = derive_table(table_from_rows(rows), period, adjusted, cfg.order, label)
+            batch = emit_table(cfg, ticker, table, fdate, tdate, out_dir)
+            if batch is not None and job.combined:
+                job.combined[i].write_table(batch)
+        else:
+            out = derive_rows(rows, period, adjusted, cfg.order) if derive else _ordered(rows, cfg.order)
+            batch = emit_rows(cfg, ticker, out, fdate, tdate, out_dir)
+            if batch and job.combined:
+                job.combined[i].write(batch)
+
+
+def _fan_out(fetch: _Fetch, result: Callable[[], List[Tuple[str, str, List[Dict]]]]) -> None:
+    ticker = fetch.key[1]
+    try:
+        parts = [(f, t, rows, [str(r.get("date", "")) for r in rows]) for f, t, rows in result()]
+    except Exception as e:
+        for job in fetch.jobs:
+            msg = f"{ticker}: {e}"
+            job.errors.append(msg)
+            log.error(f"{job.path.name}: {msg}")
+        return
+    for job in fetch.jobs:
+        cfg = job.cfg
+        # its own range if it was fetched as is (always the case for w/m),
+        # otherwise the merged daily range that covers it
+        rows, dates = next(
+            (r, d) for f, t, r, d in sorted(parts, key=lambda p: (p[0], p[1]) != (cfg.date_from, cfg.date_to))
+            if f <= cfg.date_from and cfg.date_to <= t
+        )
+        lo = bisect.bisect_left(dates, cfg.date_from)
+        hi = bisect.bisect_right(dates, cfg.date_to)
+        try:
+            _deliver(job, ticker, rows[lo:hi], cfg.date_from, cfg.date_to)
+        except Exception as e:
+            msg = f"{ticker}: {e}"
+            job.errors.append(msg)
+            log.error(f"{job.path.name}: {msg}")
+
+
+def _run_bulk(client: EODHDClient, bulk: _Bulk) -> None:
+    try:
+        found = fetch_bulk_for_exchange(client, bulk.exchange, bulk.tickers, bulk.day)
+    except Exception as e:
+        for job in bulk.jobs:
+            for ticker in job.cfg.tickers:
+                if split_ticker(ticker)[1].upper() == bulk.exchange:
+                    job.errors.append(f"{ticker}: {e}")
+            log.error(f"{job.path.name}: {bulk.exchange} bulk {bulk.day}: {e}")
+        return
+    log.info(f"{bulk.exchange}: bulk {bulk.day} matched {len(found)}/{len(bulk.tickers)} tickers")
+    for job in bulk.jobs:
+        for ticker in job.cfg.tickers:
+            if split_ticker(ticker)[1].upper() != bulk.exchange:
+                continue
+            try:
+                _deliver(job, ticker, found.get(ticker, []), bulk.day, bulk.day)
+            except Exception as e:
+                msg = f"{ticker}: {e}"
+                job.errors.append(msg)
+                log.error(f"{job.path.name}: {msg}")
+
+
+def _open(job: _Job) -> None:
+    cfg = job.cfg
+    for _, _, out_dir in job.outputs:
+        ensure_dir(out_dir)
+    if not cfg.per_ticker:
+        fdate = cfg.date_to if cfg.mode == "bulk_daily" else cfg.date_from
+        out_name = filename_from_template(cfg.combined_filename, "combined", fdate, cfg.date_to, cfg.out_format)
+        job.combined = [StreamingWriter(out_dir / out_name, cfg.out_format) for _, _, out_dir in job.outputs]
+
+
+def run_batch(config_paths: List[Path]) -> int:
+    """
+    Run several configs as one plan: each distinct (ticker, period, adjusted)
+    series is downloaded once over the union of the requested date ranges,
+    then sliced and written with every config's own output settings.
+    """
+    jobs: List[_Job] = []
+    rc = 0
+    for path in config_paths:
+        try:
+            cfg = load_config(path)
+        except ConfigError as e:
+            log.error(f"{path}: {e}")
+            rc = 2
+            continue
+        jobs.append(_Job(path, cfg, outputs(cfg)))
+    if not jobs:
+        return rc or 2
+    PROFILE.mark("config")
+
+    fetches, bulks = plan(jobs)
+    naive = sum(
+        len({split_ticker(t)[1] for t in j.cfg.tickers}) if j.cfg.mode == "bulk_daily" else len(j.cfg.tickers)
+        for j in jobs
+    )
+    requests = sum(len(f.ranges) for f in fetches) + len(bulks)
+    log.info(f"Batch: {len(jobs)} configs, {requests} requests planned ({naive} without merging)")
+
+    by_url: Dict[str, List[_Job]] = {}
+    for job in jobs:
+        by_url.setdefault(job.cfg.base_url, []).append(job)
+    clients = {url: _client(js) for url, js in by_url.items()}
+    concurrency = max(j.cfg.concurrency for j in jobs)
+
+    for job in jobs:
+        _open(job)
+    PROFILE.mark("setup")
+    try:
+        for bulk in bulks:
+            _run_bulk(clients[bulk.base_url], bulk)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            pending: Deque[Tuple[_Fetch, Future]] = deque()
+            for fetch in fetches:
+                pending.append((fetch, pool.submit(_download, clients[fetch.key[0]], fetch)))
+                # fan out in plan order, holding a small window of downloads
+                if len(pending) >= concurrency * 2:
+                    f, fut = pending.popleft()
+                    _fan_out(f, fut.result)
+            while pending:
+                f, fut = pending.popleft()
+                _fan_out(f, fut.result)
+    except BaseException:
+        for job in jobs:
+            for writer in job.combined:
+                writer.abort()
+        raise
+    finally:
+        for client in clients.values():
+            client.close()
+
+    for job in jobs:
+        for writer in job.combined:
+            writer.close()
+            log.info(f"{job.path.name}: combined {writer.rows_written} rows -> {writer.out_path}")
+        if job.errors:
+            log.warn(f"\n{job.path.name} finished with some errors:\n- " + "\n- ".join(job.errors))
+            if len(job.errors) >= len(job.cfg.tickers):
+                rc = max(rc, 1)
+    PROFILE.mark("fetch")
+    return rc
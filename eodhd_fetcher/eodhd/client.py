@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-import requests
+from .ratelimit import TokenBucket
 
-EODHD_BASE = "https://eodhistoricaldata.com/api/eod/{ticker}"
+if TYPE_CHECKING:
+    import requests
+
+EODHD_API = "https://eodhistoricaldata.com/api"
 
 
 @dataclass
@@ -15,53 +18,148 @@ class EODHDClient:
     timeout: int = 30
     max_retries: int = 5
     backoff_base: float = 0.8  # seconds
+    base_url: str = EODHD_API
+    pool_size: int = 10
+    limiter: Optional[TokenBucket] = None
+    # utils.metrics.Registry; records per-attempt latency and retries by status
+    metrics: Optional[Any] = None
+    session: requests.Session = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # requests is imported here, after the config has been checked
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        # One pooled session for the whole run; safe to share across worker threads.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
 
     def _request(self, url: str, params: Dict[str, Any]) -> requests.Response:
-        sess = requests.Session()
+        sess = self.session
         last_exc: Optional[Exception] = None
         for attempt in range(self.max_retries):
+            status = "error"
+            t0 = time.perf_counter()
             try:
+                if self.limiter is not None:
+                    self.limiter.acquire()
+                t0 = time.perf_counter()
                 resp = sess.get(url, params=params, timeout=self.timeout)
+                status = str(resp.status_code)
+                self._observe(status, t0)
                 if resp.status_code == 200:
+                    if self.limiter is not None:
+                        self.limiter.success()
                     return resp
                 if resp.status_code in (429, 500, 502, 503, 504):
                     wait = self.backoff_base * (2 ** attempt)
                     retry_after = resp.headers.get("Retry-After")
+                    retry_s: Optional[float] = None
                     if retry_after:
                         try:
-                            wait = max(wait, float(retry_after))
+                            retry_s = float(retry_after)
+                            wait = max(wait, retry_s)
                         except Exception:
                             pass
+                    if resp.status_code == 429 and self.limiter is not None:
+                        self.limiter.throttle(retry_s)
+                    self._retried(status, attempt)
                     time.sleep(wait)
                     continue
                 resp.raise_for_status()
             except Exception as exc:
                 last_exc = exc
+                if status == "error":  # no response at all
+                    self._observe(status, t0)
+                self._retried(status, attempt)
                 time.sleep(self.backoff_base * (2 ** attempt))
         if last_exc:
             raise last_exc
         raise RuntimeError("Unexpected request error without exception")
 
-    def get_eod(
+    def _observe(self, status: str, t0: float) -> None:
+        if self.metrics is not None:
+            self.metrics.histogram("eodhd_http_request_seconds", status=status).observe(time.perf_counter() - t0)
+
+    def _retried(self, status: str, attempt: int) -> None:
+        if self.metrics is not None and attempt + 1 < self.max_retries:
+            self.metrics.counter("eodhd_http_retries_total", status=status).inc()
+
+    def _eod_params(
         self,
-        ticker: str,
         date_from: str,
         date_to: str,
-        period: str = "d",
-        order: str = "a",
-        adjusted: Optional[int] = None,
-    ) -> List[Dict[str, Any]]:
-        url = EODHD_BASE.format(ticker=ticker)
+        period: str,
+        order: str,
+        adjusted: Optional[int],
+        fmt: str,
+    ) -> Dict[str, Any]:
         params: Dict[str, Any] = {
             "from": date_from,
             "to": date_to,
             "period": period,
             "order": order,
             "api_token": self.api_token,
-            "fmt": "json",
+            "fmt": fmt,
         }
         if adjusted is not None:
             params["adjusted"] = adjusted
+        return params
+
+    def get_eod(
+        self,
+        ticker: str,
+        date_from: str,
+        date_to: str,
+        period: str = "d",
+        order: str = "a",
+        adjusted: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        url = f"{self.base_url}/eod/{ticker}"
+        params = self._eod_params(date_from, date_to, period, order, adjusted, "json")
+        resp = self._request(url, params=params)
+        data = resp.json()
+        if isinstance(data, dict) and data.get("error"):
+            raise RuntimeError(f"EODHD API error: {data.get('error')}")
+        if not isinstance(data, list):
+            raise RuntimeError(f"Unexpected JSON shape: {data}")
+        return data
+
+    def get_eod_csv(
+        self,
+        ticker: str,
+        date_from: str,
+        date_to: str,
+        period: str = "d",
+        order: str = "a",
+        adjusted: Optional[int] = None,
+    ) -> bytes:
+        """
+        Same request as get_eod with fmt=csv; returns the raw body so it can be
+        parsed straight into columns.
+        """
+        url = f"{self.base_url}/eod/{ticker}"
+        params = self._eod_params(date_from, date_to, period, order, adjusted, "csv")
+        resp = self._request(url, params=params)
+        body = resp.content
+        if body.lstrip().startswith(b"{"):
+            raise RuntimeError(f"EODHD API error: {body[:200]!r}")
+        return body
+
+    def get_eod_bulk(self, exchange: str, date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Last-day bars for every symbol on `exchange` in a single request
+        (EODHD eod-bulk-last-day). Rows carry `code` and `exchange_short_name`.
+        """
+        url = f"{self.base_url}/eod-bulk-last-day/{exchange}"
+        params: Dict[str, Any] = {"api_token": self.api_token, "fmt": "json"}
+        if date:
+            params["date"] = date
         resp = self._request(url, params=params)
         data = resp.json()
         if isinstance(data, dict) and data.get("error"):
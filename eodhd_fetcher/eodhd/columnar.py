@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import io
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+# Fixed schema for EOD bars; nothing is inferred per response.
+PRICE_COLUMNS = ["open", "high", "low", "close", "adjusted_close"]
+BAR_SCHEMA = pa.schema(
+    [("date", pa.date32())]
+    + [(c, pa.float64()) for c in PRICE_COLUMNS]
+    + [("volume", pa.int64())]
+)
+TICKER_FIELD = pa.field("ticker", pa.dictionary(pa.int32(), pa.string()))
+
+# EODHD's fmt=csv header -> our column names
+_CSV_COLUMNS = {
+    "Date": "date",
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Adjusted_close": "adjusted_close",
+    "Volume": "volume",
+}
+
+
+def _with_ticker(table: pa.Table, ticker: Optional[str]) -> pa.Table:
+    if ticker is None:
+        return table
+    indices = pa.array(np.zeros(table.num_rows, dtype=np.int32))
+    col = pa.DictionaryArray.from_arrays(indices, pa.array([ticker], pa.string()))
+    return table.append_column(TICKER_FIELD, col)
+
+
+def table_from_csv(data: bytes, ticker: Optional[str] = None) -> pa.Table:
+    """
+    Parse an EODHD fmt=csv body straight into an Arrow table with BAR_SCHEMA.
+    Trailing junk lines (EODHD sometimes appends a footer) are skipped.
+    """
+    if not data.strip():
+        return _with_ticker(BAR_SCHEMA.empty_table(), ticker)
+    types = {src: BAR_SCHEMA.field(dst).type for src, dst in _CSV_COLUMNS.items()}
+    table = pacsv.read_csv(
+        io.BytesIO(data),
+        parse_options=pacsv.ParseOptions(invalid_row_handler=lambda row: "skip"),
+        convert_options=pacsv.ConvertOptions(
+            column_types=types,
+            include_columns=list(_CSV_COLUMNS),
+            include_missing_columns=True,
+        ),
+    )
+    table = table.rename_columns([_CSV_COLUMNS[n] for n in table.column_names])
+    return _with_ticker(table.select(BAR_SCHEMA.names), ticker)
+
+
+def table_from_rows(rows: List[Dict[str, Any]], ticker: Optional[str] = None) -> pa.Table:
+    """
+    Build a BAR_SCHEMA table from JSON rows (fmt=json or the local bar store).
+    """
+    if not rows:
+        return _with_ticker(BAR_SCHEMA.empty_table(), ticker)
+    arrays = [pc.cast(pa.array([r.get("date") for r in rows], pa.string()), pa.date32())]
+    for f in BAR_SCHEMA:
+        if f.name == "date":
+            continue
+        arrays.append(pa.array([r.get(f.name) for r in rows], f.type))
+    return _with_ticker(pa.Table.from_arrays(arrays, schema=BAR_SCHEMA), ticker)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import datetime as dt
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+
+from .columnar import BAR_SCHEMA, _with_ticker, table_from_rows
+
+# Derived prices are rounded like EODHD's own adjusted values.
+PRICE_DECIMALS = 4
+
+
+def _arrays(table: pa.Table) -> Dict[str, np.ndarray]:
+    out: Dict[str, np.ndarray] = {
+        "date": table.column("date").to_numpy().astype("datetime64[D]"),
+        "volume": table.column("volume").fill_null(0).to_numpy(),
+    }
+    for name in ("open", "high", "low", "close", "adjusted_close"):
+        out[name] = table.column(name).to_numpy(zero_copy_only=False).astype(np.float64)
+    return out
+
+
+def adjust(cols: Dict[str, np.ndarray]) -> None:
+    """
+    Scale open/high/low/close in place by adjusted_close / close, the
+    cumulative split and dividend factor of each bar. Bars without a usable
+    factor keep their raw prices.
+    """
+    close, adj = cols["close"], cols["adjusted_close"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = adj / close
+    ratio = np.where(np.isfinite(ratio) & (ratio > 0), ratio, 1.0)
+    for name in ("open", "high", "low"):
+        cols[name] = np.round(cols[name] * ratio, PRICE_DECIMALS)
+    cols["close"] = np.where(ratio != 1.0, adj, close)
+
+
+def resample(cols: Dict[str, np.ndarray], period: str) -> Dict[str, np.ndarray]:
+    """
+    Weekly (Monday-based) or monthly bars from ascending daily bars, dated by
+    the first trading day of each period like EODHD's period=w/m responses.
+    """
+    date = cols["date"]
+    if period == "w":
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        key = (date.astype(np.int64) + 3) // 7
+    elif period == "m":
+        key = date.astype("datetime64[M]").astype(np.int64)
+    else:
+        raise ValueError(f"cannot resample to period '{period}'")
+    if len(key) == 0:
+        return cols
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    ends = np.r_[starts[1:], len(key)] - 1
+    return {
+        "date": date[starts],
+        "open": cols["open"][starts],
+        "high": np.maximum.reduceat(cols["high"], starts),
+        "low": np.minimum.reduceat(cols["low"], starts),
+        "close": cols["close"][ends],
+        "adjusted_close": cols["adjusted_close"][ends],
+        "volume": np.add.reduceat(cols["volume"], starts),
+    }
+
+
+def derive_table(
+    table: pa.Table, period: str, adjusted: Optional[int], order: str = "a", ticker: Optional[str] = None
+) -> pa.Table:
+    """
+    The `period`/`adjusted` series from a raw, ascending daily BAR_SCHEMA
+    table, as one API request with those parameters would return it.
+    """
+    table = table.select(BAR_SCHEMA.names)
+    if period == "d" and not adjusted:
+        out = table
+    else:
+        cols = _arrays(table)
+        if adjusted:
+            adjust(cols)
+        if period != "d":
+            cols = resample(cols, period)
+        out = pa.Table.from_arrays(
+            [pa.array(cols["date"], pa.date32())]
+            + [pa.array(cols[f.name], f.type) for f in BAR_SCHEMA if f.name != "date"],
+            schema=BAR_SCHEMA,
+        )
+    if order == "d":
+        out = out.take(pa.array(np.arange(out.num_rows - 1, -1, -1)))
+    return _with_ticker(out, ticker)
+
+
+def derive_rows(rows: List[Dict[str, Any]], period: str, adjusted: Optional[int], order: str = "a") -> List[Dict[str, Any]]:
+    """
+    Row counterpart of derive_table for the JSON path; `rows` are raw daily
+    bars in ascending order and are not modified.
+    """
+    if period == "d" and not adjusted:
+        out = [dict(r) for r in rows]
+        if order == "d":
+            out.reverse()
+        return out
+    table = derive_table(table_from_rows(rows), period, adjusted, order)
+    out = table.to_pylist()
+    for r in out:
+        d = r["date"]
+        if isinstance(d, dt.date):
+            r["date"] = d.isoformat()
+    return out
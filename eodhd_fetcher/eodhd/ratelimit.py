@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every worker of a fetch run.
+
+    `rate` tokens are added per second up to `burst`. A 429 from the API calls
+    `throttle()`, which halves the effective rate and empties the bucket, so the
+    whole job slows down instead of only the ticker that was throttled. Each
+    successful request then recovers the rate additively back to `rate`.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, min_rate: float = 0.1):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = self.max_rate
+        self.burst = float(burst) if burst else max(1.0, self.max_rate)
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._stamp
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._stamp = now
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available. Returns seconds waited.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """
+        Record a 429: halve the rate and drain the bucket. When the server sent
+        `Retry-After`, the rate is also capped so the bucket cannot refill faster
+        than one token per `retry_after` seconds.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            new_rate = self.rate / 2.0
+            if retry_after and retry_after > 0:
+                new_rate = min(new_rate, 1.0 / retry_after)
+            self.rate = max(self.min_rate, new_rate)
+            self._tokens = min(self._tokens, 0.0)
+
+    def success(self) -> None:
+        """
+        Additively recover the rate after a successful request.
+        """
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
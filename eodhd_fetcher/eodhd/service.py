@@ -1,8 +1,35 @@
 from __future__ import annotations
-from typing import Dict, List
+from typing import Any, Dict, Iterable, List
 from .client import EODHDClient
 
 
+def _fetch_via_store(
+	client: EODHDClient,
+	store: Any,
+	ticker: str,
+	fdate: str,
+	tdate: str,
+	period: str,
+	order: str,
+	adjusted: int | None,
+) -> List[Dict]:
+	# Only the head/tail missing from the local store goes over the wire.
+	for f, t in store.missing_ranges(ticker, period, adjusted, fdate, tdate):
+		fetched = client.get_eod(
+			ticker=ticker,
+			date_from=f,
+			date_to=t,
+			period=period,
+			order="a",
+			adjusted=adjusted,
+		)
+		store.merge(ticker, period, adjusted, fetched, f, t)
+	rows = store.load(ticker, period, adjusted, fdate, tdate)
+	if order == "d":
+		rows.reverse()
+	return rows
+
+
 def fetch_for_ticker(
 	client: EODHDClient,
 	ticker: str,
@@ -11,8 +38,50 @@ def fetch_for_ticker(
 	period: str,
 	order: str,
 	adjusted: int | None,
+	store: Any = None,
 ) -> List[Dict]:
-	rows = client.get_eod(
+	if store is not None:
+		rows = _fetch_via_store(client, store, ticker, fdate, tdate, period, order, adjusted)
+	else:
+		rows = client.get_eod(
+			ticker=ticker,
+			date_from=fdate,
+			date_to=tdate,
+			period=period,
+			order=order,
+			adjusted=adjusted,
+		)
+	# Ensure 'date' is the first column if present
+	if rows:
+		keys = list(rows[0].keys())
+		if "date" in keys:
+			keys = ["date"] + [k for k in keys if k != "date"]
+		rows = [{k: r.get(k) for k in keys} for r in rows]
+	return rows
+
+
+def fetch_table_for_ticker(
+	client: EODHDClient,
+	ticker: str,
+	fdate: str,
+	tdate: str,
+	period: str,
+	order: str,
+	adjusted: int | None,
+	store: Any = None,
+	ticker_col: bool = False,
+) -> Any:
+	"""
+	Columnar variant of fetch_for_ticker: returns a pyarrow Table with the
+	fixed bar schema, plus a dictionary-encoded `ticker` column if requested.
+	"""
+	from .columnar import table_from_csv, table_from_rows
+
+	label = ticker if ticker_col else None
+	if store is not None:
+		rows = _fetch_via_store(client, store, ticker, fdate, tdate, period, order, adjusted)
+		return table_from_rows(rows, label)
+	body = client.get_eod_csv(
 		ticker=ticker,
 		date_from=fdate,
 		date_to=tdate,
@@ -20,10 +89,37 @@ def fetch_for_ticker(
 		order=order,
 		adjusted=adjusted,
 	)
-	# Ensure 'date' is the first column if present
-	if rows:
-		keys = list(rows[0].keys())
-		if "date" in keys:
-			keys = ["date"] + [k for k in keys if k != "date"]
-		rows = [{k: r.get(k) for k in keys} for r in rows]
-	return rows
\ No newline at end of file
+	return table_from_csv(body, label)
+
+
+
+def split_ticker(ticker: str) -> tuple[str, str]:
+	"""
+	"AAPL.US" -> ("AAPL", "US"). Tickers without a suffix are treated as US.
+	"""
+	code, _, exchange = ticker.rpartition(".")
+	if not code:
+		return ticker, "US"
+	return code, exchange
+
+
+def fetch_bulk_for_exchange(
+	client: EODHDClient,
+	exchange: str,
+	tickers: Iterable[str],
+	date: str,
+) -> Dict[str, List[Dict]]:
+	"""
+	One bulk request for `exchange`, filtered down to `tickers` and reshaped
+	like get_eod rows ('date' first, no code/exchange columns).
+	"""
+	wanted = {split_ticker(t)[0].upper(): t for t in tickers}
+	out: Dict[str, List[Dict]] = {}
+	for r in client.get_eod_bulk(exchange, date):
+		ticker = wanted.get(str(r.get("code", "")).upper())
+		if ticker is None:
+			continue
+		row = {"date": r.get("date")}
+		row.update((k, v) for k, v in r.items() if k not in ("code", "exchange_short_name", "date"))
+		out.setdefault(ticker, []).append(row)
+	return out
@@ -0,0 +1,437 @@
+from __future__ import annotations
+
+import bisect
+import datetime as dt
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from .config_loader import _sanitize_filename
+
+# Output names from the default templates: "{ticker}_{from}_{to}.{ext}" and
+# "combined_{from}_{to}.{ext}". Files named otherwise are not pruned by name.
+_DATED_NAME = re.compile(r"^(?P<ticker>.+?)_(?P<from>\d{4}-\d{2}-\d{2})_(?P<to>\d{4}-\d{2}-\d{2})$")
+_FORMATS = {".parquet": "parquet", ".feather": "feather", ".csv": "csv", ".json": "json", ".jsonl": "jsonl"}
+
+# Column types of the result; prices written from JSON rows may come back as ints.
+# `date` is date32, or timestamp[s] (UTC) when a file carries bar times (see _date_column).
+_TYPES = {
+    "ticker": pa.string(),
+    "date": pa.date32(),
+    "open": pa.float64(),
+    "high": pa.float64(),
+    "low": pa.float64(),
+    "close": pa.float64(),
+    "adjusted_close": pa.float64(),
+    "volume": pa.int64(),
+}
+
+DateLike = Union[str, dt.date, None]
+# (row group / batch index, min date, max date, min ticker, max ticker)
+_Group = Tuple[int, Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def _iso(v: Any) -> Optional[str]:
+    if v is None:
+        return None
+    if isinstance(v, dt.datetime):
+        return v.date().isoformat()
+    if isinstance(v, dt.date):
+        return v.isoformat()
+    return str(v)[:10]
+
+
+def _overlaps(lo: Optional[str], hi: Optional[str], start: Optional[str], end: Optional[str]) -> bool:
+    return not ((end is not None and lo is not None and lo > end) or (start is not None and hi is not None and hi < start))
+
+
+class _Source:
+    """
+    One output file, what its name says about it, and its open handle.
+    """
+
+    def __init__(self, path: Path, fmt: str, mtime: float):
+        self.path = path
+        self.fmt = fmt
+        self.mtime = mtime
+        self.ticker: Optional[str] = None  # sanitized ticker of a per-ticker file
+        self.date_from: Optional[str] = None
+        self.date_to: Optional[str] = None
+        self._handle: Any = None
+        self._groups: Optional[List[_Group]] = None
+        m = _DATED_NAME.match(path.stem)
+        if m:
+            self.date_from, self.date_to = m.group("from"), m.group("to")
+            if m.group("ticker") != "combined":
+                self.ticker = m.group("ticker")
+
+    def handle(self) -> Any:
+        if self._handle is None:
+            if self.fmt == "parquet":
+                self._handle = pq.ParquetFile(str(self.path), memory_map=True)
+            else:
+                self._handle = pa.ipc.open_file(pa.memory_map(str(self.path), "r"))
+        return self._handle
+
+    def groups(self) -> List[_Group]:
+        """
+        (index, min date, max date, min ticker, max ticker) of each Parquet row
+        group (from its statistics) or IPC record batch, built once per file.
+        """
+        if self._groups is not None:
+            return self._groups
+        h = self.handle()
+        out: List[_Group] = []
+        if self.fmt == "parquet":
+            md = h.metadata
+            index = {md.schema.column(i).name: i for i in range(md.num_columns)}
+            for i in range(md.num_row_groups):
+                rg = md.row_group(i)
+                d = _bounds(rg.column(index["date"]).statistics) if "date" in index else (None, None)
+                t = _bounds(rg.column(index["ticker"]).statistics) if "ticker" in index else (None, None)
+                out.append((i, _iso(d[0]), _iso(d[1]), _str(t[0]), _str(t[1])))
+        else:
+            names = h.schema.names
+            for i in range(h.num_record_batches):
+                b = h.get_batch(i)
+                if not b.num_rows:
+                    continue
+                d = _min_max(_date_column(pa.Table.from_batches([b]))) if "date" in names else (None, None)
+                t = _min_max(b.column("ticker")) if "ticker" in names else (None, None)
+                out.append((i, _iso(d[0]), _iso(d[1]), _str(t[0]), _str(t[1])))
+        self._groups = out
+        return out
+
+
+class BarReader:
+    """
+    Query API over a fetcher output directory (one period/adjusted series;
+    variant subdirectories are separate readers).
+
+    Files are pruned by the ticker and date range in their names. Parquet
+    files are memory-mapped and only row groups whose ticker/date statistics
+    overlap the query are decoded. Feather (uncompressed Arrow IPC) files are
+    memory-mapped and sliced in place: record batches of other tickers are
+    skipped and the date range is found by binary search, so nothing outside
+    the result is read. CSV/JSON files are read whole once their name passes.
+
+    The directory listing and open file handles are reused across queries and
+    refreshed when the directory changes.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self._sources: Dict[Path, _Source] = {}
+        self._listed: Optional[Tuple[float, int]] = None
+        self.stats: Dict[str, int] = {}
+
+    # ---------- files ----------
+
+    def _scan(self) -> List[_Source]:
+        st = self.root.stat()
+        key = (st.st_mtime, st.st_ino)
+        if key != self._listed:
+            found: Dict[Path, _Source] = {}
+            for p in self.root.iterdir():
+                fmt = _FORMATS.get(p.suffix.lower())
+                if fmt is None or not p.is_file():
+                    continue
+                mtime = p.stat().st_mtime
+                old = self._sources.get(p)
+                found[p] = old if old is not None and old.mtime == mtime else _Source(p, fmt, mtime)
+            self._sources = found
+            self._listed = key
+        # oldest first, so a newer file's bars win where files overlap
+        return sorted(self._sources.values(), key=lambda s: (s.mtime, s.path.name))
+
+    # ---------- query ----------
+
+    def read(
+        self,
+        tickers: Union[str, Iterable[str], None] = None,
+        start: DateLike = None,
+        end: DateLike = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pa.Table:
+        """
+        Bars of `tickers` (all if None) dated start..end inclusive, sorted by
+        ticker and date. `ticker` and `date` are always returned, followed by
+        `columns` (all if None).
+        """
+        wanted = [tickers] if isinstance(tickers, str) else (sorted(set(tickers)) if tickers is not None else None)
+        start_s, end_s = _iso(start), _iso(end)
+        cols = list(columns) if columns is not None else None
+        by_name = {_sanitize_filename(t): t for t in wanted} if wanted is not None else None
+        self.stats = {"files": 0, "files_read": 0, "row_groups": 0, "row_groups_read": 0, "batches_read": 0}
+
+        pieces: List[pa.Table] = []
+        for src in self._scan():
+            self.stats["files"] += 1
+            label = None
+            if src.ticker is not None:
+                if by_name is not None and src.ticker not in by_name:
+                    continue
+                label = by_name[src.ticker] if by_name is not None else src.ticker
+            if not _overlaps(src.date_from, src.date_to, start_s, end_s):
+                continue
+            self.stats["files_read"] += 1
+            if src.fmt == "parquet":
+                found = self._read_parquet(src, wanted if label is None else None, start_s, end_s, cols)
+            elif src.fmt == "feather":
+                found = self._read_feather(src, wanted if label is None else None, start_s, end_s, cols)
+            else:
+                found = self._read_text(src, wanted if label is None else None, start_s, end_s, cols)
+            for t in found:
+                if not t.num_rows:
+                    continue
+                if "ticker" not in t.column_names:
+                    if label is None:
+                        # not a templated name: the file stem is the ticker
+                        stem = src.path.stem
+                        if by_name is not None and stem not in by_name:
+                            continue
+                        label = by_name[stem] if by_name is not None else stem
+                    t = t.append_column("ticker", pa.array([label] * t.num_rows, pa.string()))
+                pieces.append(_normalize(t, cols))
+        return _combine(pieces, cols)
+
+    def _read_parquet(
+        self, src: _Source, wanted: Optional[List[str]], start: Optional[str], end: Optional[str], cols: Optional[List[str]]
+    ) -> List[pa.Table]:
+        groups = src.groups()
+        keep = [g[0] for g in groups if _matches(g, wanted, start, end)]
+        self.stats["row_groups"] += len(groups)
+        if not keep:
+            return []
+        self.stats["row_groups_read"] += len(keep)
+        pf = src.handle()
+        table = pf.read_row_groups(keep, columns=_needed(pf.schema_arrow.names, cols))
+        return [_filter(table, wanted, start, end)]
+
+    def _read_feather(
+        self, src: _Source, wanted: Optional[List[str]], start: Optional[str], end: Optional[str], cols: Optional[List[str]]
+    ) -> List[pa.Table]:
+        reader = src.handle()
+        read_cols = _needed(reader.schema.names, cols)
+        out: List[pa.Table] = []
+        for g in src.groups():
+            if not _matches(g, wanted, start, end):
+                continue
+            self.stats["batches_read"] += 1
+            # zero-copy view into the mapped file
+            table = pa.Table.from_batches([reader.get_batch(g[0])]).select(read_cols)
+            if g[3] != g[4]:
+                # the fetcher writes one ticker per batch; anything else is masked
+                out.append(_filter(table, wanted, start, end))
+            else:
+                out.append(_slice_dates(table, start, end))
+        return out
+
+    def _read_text(
+        self, src: _Source, wanted: Optional[List[str]], start: Optional[str], end: Optional[str], cols: Optional[List[str]]
+    ) -> List[pa.Table]:
+        if src.fmt == "csv":
+            table = pacsv.read_csv(str(src.path)) if src.path.stat().st_size else pa.table({})
+        else:
+            text = src.path.read_text(encoding="utf-8")
+            try:
+                rows = json.loads(text) if src.fmt == "json" else None
+            except ValueError:  # combined "json" output is written as JSON Lines
+                rows = None
+            if rows is None:
+                rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+            table = pa.Table.from_pylist(rows)
+        if "date" not in table.column_names:
+            return []
+        return [_filter(table.select(_needed(table.column_names, cols)), wanted, start, end)]
+
+
+# ---------- helpers ----------
+
+def _bounds(stats: Any) -> Tuple[Any, Any]:
+    if stats is None or not stats.has_min_max:
+        return None, None
+    return stats.min, stats.max
+
+
+def _str(v: Any) -> Optional[str]:
+    if isinstance(v, bytes):
+        return v.decode("utf-8", "replace")
+    return None if v is None else str(v)
+
+
+def _min_max(col: Any) -> Tuple[Any, Any]:
+    if pa.types.is_dictionary(col.type):
+        col = col.cast(col.type.value_type)
+    mm = pc.min_max(col)
+    return mm["min"].as_py(), mm["max"].as_py()
+
+
+def _matches(g: _Group, wanted: Optional[List[str]], start: Optional[str], end: Optional[str]) -> bool:
+    _, dlo, dhi, tlo, thi = g
+    if not _overlaps(dlo, dhi, start, end):
+        return False
+    if wanted is None or tlo is None or thi is None:
+        return True
+    j = bisect.bisect_left(wanted, tlo)
+    return j < len(wanted) and wanted[j] <= thi
+
+
+def _needed(names: List[str], cols: Optional[List[str]]) -> List[str]:
+    if cols is None:
+        return list(names)
+    return [c for c in ["ticker", "date", *cols] if c in names]
+
+
+_TS = pa.timestamp("s")
+
+
+def _date_column(table: pa.Table) -> pa.ChunkedArray:
+    """
+    The `date` column as date32, or as timestamp[s] when the file carries
+    times of day (the watcher's 1s/1m bars, "YYYY-MM-DD HH:MM:SS" UTC), so
+    intraday bars keep their own rows.
+    """
+    col = table.column("date")
+    if pa.types.is_string(col.type) or pa.types.is_large_string(col.type):
+        if len(col) and (pc.max(pc.utf8_length(col)).as_py() or 0) > 10:
+            return pc.cast(col, _TS)
+        return pc.cast(pc.utf8_slice_codeunits(col, 0, 10), pa.date32())
+    if pa.types.is_timestamp(col.type):
+        ts = pc.cast(col, pa.timestamp("s", col.type.tz)) if col.type.unit != "s" else col
+        if col.type.tz is not None:
+            ts = pc.cast(ts.cast(pa.int64()), _TS)  # UTC wall time
+        days = pc.cast(ts, pa.date32())
+        if pc.all(pc.equal(pc.cast(days, _TS), ts)).as_py() is not False:
+            return days
+        return ts
+    return col
+
+
+def _filter(table: pa.Table, wanted: Optional[List[str]], start: Optional[str], end: Optional[str]) -> pa.Table:
+    mask = None
+    if wanted is not None and "ticker" in table.column_names:
+        tcol = table.column("ticker")
+        if pa.types.is_dictionary(tcol.type):
+            tcol = tcol.cast(pa.string())
+        mask = pc.is_in(tcol, value_set=pa.array(wanted, pa.string()))
+    dates = _date_column(table)
+    bounds = []
+    if pa.types.is_timestamp(dates.type):
+        # whole days: start 00:00:00 up to (not including) the day after end
+        if start is not None:
+            bounds.append((pc.greater_equal, pa.scalar(dt.datetime.fromisoformat(start), _TS)))
+        if end is not None:
+            bounds.append((pc.less, pa.scalar(dt.datetime.fromisoformat(end) + dt.timedelta(days=1), _TS)))
+    else:
+        bounds = [(op, pa.scalar(dt.date.fromisoformat(b), pa.date32()))
+                  for b, op in ((start, pc.greater_equal), (end, pc.less_equal)) if b is not None]
+    for op, bound in bounds:
+        m = op(dates, bound)
+        mask = m if mask is None else pc.and_(mask, m)
+    return table if mask is None else table.filter(mask)
+
+
+def _slice_dates(table: pa.Table, start: Optional[str], end: Optional[str]) -> pa.Table:
+    """
+    Zero-copy slice of a single-ticker table sorted by date (either way).
+    """
+    col = table.column("date")
+    if not pa.types.is_date32(col.type) or col.num_chunks != 1 or col.null_count:
+        return _filter(table, None, start, end)
+    days = col.chunk(0).view(pa.int32()).to_numpy(zero_copy_only=True)
+    descending = len(days) > 1 and days[0] > days[-1]
+    key = days[::-1] if descending else days
+    if not np.all(key[1:] >= key[:-1]):
+        return _filter(table, None, start, end)
+    lo = 0 if start is None else int(np.searchsorted(key, (dt.date.fromisoformat(start) - dt.date(1970, 1, 1)).days, "left"))
+    hi = len(key) if end is None else int(np.searchsorted(key, (dt.date.fromisoformat(end) - dt.date(1970, 1, 1)).days, "right"))
+    if descending:
+        lo, hi = len(key) - hi, len(key) - lo
+    return table.slice(lo, max(0, hi - lo))
+
+
+def _normalize(table: pa.Table, cols: Optional[List[str]]) -> pa.Table:
+    names = ["ticker", "date"] + [c for c in (cols if cols is not None else table.column_names) if c not in ("ticker", "date")]
+    arrays = []
+    for name in names:
+        if name not in table.column_names:
+            arrays.append(pa.nulls(table.num_rows, _TYPES.get(name, pa.null())))
+            continue
+        col = _date_column(table) if name == "date" else table.column(name)
+        target = _TYPES.get(name) if name != "date" else None
+        if target is not None and col.type != target:
+            col = col.cast(target)
+        arrays.append(col)
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def _is_sorted(table: pa.Table) -> bool:
+    n = table.num_rows
+    if n < 2:
+        return True
+    t, d = table.column("ticker"), table.column("date")
+    t0, t1, d0, d1 = t.slice(0, n - 1), t.slice(1), d.slice(0, n - 1), d.slice(1)
+    ok = pc.or_(pc.greater(t1, t0), pc.and_(pc.equal(t1, t0), pc.greater(d1, d0)))
+    return bool(pc.all(ok).as_py())
+
+
+def _combine(pieces: List[pa.Table], cols: Optional[List[str]]) -> pa.Table:
+    if not pieces:
+        names = ["ticker", "date"] + [c for c in (cols if cols is not None else _TYPES) if c not in ("ticker", "date")]
+        return pa.schema([(n, _TYPES.get(n, pa.null())) for n in names]).empty_table()
+    intraday = [pa.types.is_timestamp(p.schema.field("date").type) for p in pieces]
+    if any(intraday):
+        # daily bars join intraday ones as midnight timestamps
+        pieces = [
+            p if i else p.set_column(1, "date", pc.cast(p.column("date"), _TS)) for p, i in zip(pieces, intraday)
+        ]
+    if len(pieces) == 1 and _is_sorted(pieces[0]):
+        return pieces[0]
+    table = pa.concat_tables(pieces, promote_options="default")
+    # sort_indices is stable, so the last of equal (ticker, date) rows comes from the newest file
+    order = pc.sort_indices(table, sort_keys=[("ticker", "ascending"), ("date", "ascending")])
+    table = table.take(order)
+    if table.num_rows > 1 and not all(intraday):
+        t = table.column("ticker").combine_chunks()
+        d = table.column("date").combine_chunks()
+        same = pc.and_(
+            pc.equal(t.slice(1), t.slice(0, len(t) - 1)),
+            pc.equal(d.slice(1), d.slice(0, len(d) - 1)),
+        )
+        if any(intraday):
+            # only daily bars repeated across files are duplicates
+            daily = pa.array(np.repeat(np.invert(intraday), [p.num_rows for p in pieces])).take(order)
+            same = pc.and_(same, pc.and_(daily.slice(1), daily.slice(0, len(daily) - 1)))
+        keep = pa.concat_arrays([pc.invert(same), pa.array([True])])
+        if not pc.all(keep).as_py():
+            table = table.filter(keep)
+    return table
+
+
+_READERS: Dict[Path, BarReader] = {}
+
+
+def read_bars(
+    tickers: Union[str, Iterable[str], None] = None,
+    start: DateLike = None,
+    end: DateLike = None,
+    columns: Optional[Sequence[str]] = None,
+    root: Union[str, Path] = "outputs",
+) -> pa.Table:
+    """
+    Bars from the fetcher output in `root` as an Arrow table (see BarReader.read).
+    Readers are kept per directory, so repeated lookups reuse open files.
+    """
+    key = Path(root).resolve()
+    reader = _READERS.get(key)
+    if reader is None:
+        reader = _READERS[key] = BarReader(key)
+    return reader.read(tickers, start, end, columns)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config_loader import _sanitize_filename
+
+# Bars dated within this many days of today may not be published yet, so
+# coverage for them is only recorded up to the last bar actually received.
+SETTLE_DAYS = 5
+
+
+def _day(s: str) -> dt.date:
+    return dt.date.fromisoformat(s)
+
+
+def _shift(s: str, days: int) -> str:
+    return (_day(s) + dt.timedelta(days=days)).isoformat()
+
+
+def _period_start(s: str, period: str) -> str:
+    d = _day(s)
+    d = d - dt.timedelta(days=d.weekday()) if period == "w" else d.replace(day=1)
+    return d.isoformat()
+
+
+class BarStore:
+    """
+    Local EOD bar store, one partition per (period, adjusted) and one file per
+    ticker inside it:
+
+        <root>/<period>[-adj<0|1>]/<TICKER>.jsonl       bars, ascending by date
+        <root>/<period>[-adj<0|1>]/<TICKER>.meta.json   {"from": ..., "to": ...}
+
+    The meta file records the contiguous date range already fetched, so callers
+    only request the head or tail that is missing.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    # ---------- paths ----------
+
+    def _partition(self, period: str, adjusted: Optional[int]) -> Path:
+        name = period if adjusted is None else f"{period}-adj{adjusted}"
+        return self.root / name
+
+    def _paths(self, ticker: str, period: str, adjusted: Optional[int]) -> Tuple[Path, Path]:
+        part = self._partition(period, adjusted)
+        name = _sanitize_filename(ticker)
+        return part / f"{name}.jsonl", part / f"{name}.meta.json"
+
+    # ---------- metadata ----------
+
+    def _meta(self, ticker: str, period: str, adjusted: Optional[int]) -> Optional[Dict[str, Any]]:
+        _, meta_path = self._paths(ticker, period, adjusted)
+        if not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except Exception:
+            return None
+        return meta if isinstance(meta, dict) and "from" in meta and "to" in meta else None
+
+    def coverage(self, ticker: str, period: str, adjusted: Optional[int]) -> Optional[Tuple[str, str]]:
+        meta = self._meta(ticker, period, adjusted)
+        return (str(meta["from"]), str(meta["to"])) if meta is not None else None
+
+    def _write_meta(self, meta_path: Path, cov: Tuple[str, str], last_bar: Optional[str]) -> None:
+        meta = {"from": cov[0], "to": cov[1], "last_bar": last_bar}
+        tmp = meta_path.parent / (meta_path.name + ".tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, meta_path)
+
+    def missing_ranges(
+        self, ticker: str, period: str, adjusted: Optional[int], fdate: str, tdate: str
+    ) -> List[Tuple[str, str]]:
+        """
+        Date ranges of [fdate, tdate] not yet covered by the store.
+        """
+        meta = self._meta(ticker, period, adjusted)
+        if meta is None:
+            return [(fdate, tdate)]
+        cf, ct = str(meta["from"]), str(meta["to"])
+        out: List[Tuple[str, str]] = []
+        if fdate < cf:
+            out.append((fdate, _shift(cf, -1)))
+        if tdate > ct:
+            # Start right after the covered range (even if fdate is later) so
+            # coverage stays contiguous. Weekly/monthly bars can still be
+            # forming and are dated by their first day, which may lie before
+            # the coverage end: those re-fetch from the last stored bar.
+            if period == "d":
+                start = _shift(ct, 1)
+            else:
+                start = min(ct, str(meta.get("last_bar") or _period_start(ct, period)))
+            out.append((start, tdate))
+        return out
+
+    # ---------- bars ----------
+
+    def _read(self, bars_path: Path) -> List[Dict[str, Any]]:
+        if not bars_path.exists():
+            return []
+        with bars_path.open("r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def load(
+        self, ticker: str, period: str, adjusted: Optional[int], fdate: str, tdate: str
+    ) -> List[Dict[str, Any]]:
+        bars_path, _ = self._paths(ticker, period, adjusted)
+        return [r for r in self._read(bars_path) if fdate <= str(r.get("date", "")) <= tdate]
+
+    def merge(
+        self,
+        ticker: str,
+        period: str,
+        adjusted: Optional[int],
+        rows: List[Dict[str, Any]],
+        fdate: str,
+        tdate: str,
+    ) -> None:
+        """
+        Merge bars fetched for [fdate, tdate] and extend the coverage range.
+        Bars strictly after the stored tail are appended; anything else
+        rewrites the ticker file atomically.
+        """
+        bars_path, meta_path = self._paths(ticker, period, adjusted)
+        bars_path.parent.mkdir(parents=True, exist_ok=True)
+
+        cov = self.coverage(ticker, period, adjusted)
+        last_bar: Optional[str] = None
+        if cov is not None:
+            try:
+                last_bar = json.loads(meta_path.read_text(encoding="utf-8")).get("last_bar")
+            except Exception:
+                last_bar = None
+
+        new_rows = sorted((r for r in rows if r.get("date")), key=lambda r: str(r["date"]))
+        appendable = last_bar is not None and bars_path.exists()
+        if new_rows and appendable and str(new_rows[0]["date"]) > str(last_bar):
+            with bars_path.open("a", encoding="utf-8") as f:
+                for r in new_rows:
+                    f.write(json.dumps(r) + "\n")
+        elif new_rows:
+            by_date = {str(r["date"]): r for r in self._read(bars_path)}
+            for r in new_rows:
+                by_date[str(r["date"])] = r
+            tmp = bars_path.parent / (bars_path.name + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                for d in sorted(by_date):
+                    f.write(json.dumps(by_date[d]) + "\n")
+            os.replace(tmp, bars_path)
+        if new_rows:
+            last_bar = max(last_bar or "", str(new_rows[-1]["date"]))
+
+        # Recent ranges only count as covered up to the last bar received.
+        settled = (dt.date.today() - dt.timedelta(days=SETTLE_DAYS)).isoformat()
+        to = tdate
+        if tdate > settled:
+            to = max(settled, last_bar or settled)
+            to = min(to, tdate)
+        if cov is None:
+            new_cov = (fdate, to)
+        else:
+            new_cov = (min(cov[0], fdate), max(cov[1], to))
+        if new_cov[0] <= new_cov[1]:
+            self._write_meta(meta_path, new_cov, last_bar)
@@ -2,34 +2,50 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from dotenv import load_dotenv
+_env_loaded = False
 
-# Load environment variables from .env if present
-load_dotenv()
+
+def _load_env() -> None:
+    # Load environment variables from .env if present, once, when the first
+    # config is loaded rather than at import
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _env_loaded = True
 
 
 @dataclass
 class AppConfig:
     api_token: str
+    mode: str
     tickers: List[str]
     date_from: str
     date_to: str
     period: str
     order: str
     adjusted: Optional[int]
+    columnar: bool
     timeout: int
     max_retries: int
     backoff_base: float
+    concurrency: int
+    rate_limit_per_sec: float
+    base_url: str
     out_dir: Path
     out_format: str
     per_ticker: bool
     filename_template: str
     combined_filename: str
     include_ticker_col: bool
+    store_dir: Optional[Path] = None
+    derive_locally: bool = False
+    variants: List[Tuple[str, Optional[int]]] = field(default_factory=list)
 
 
 class ConfigError(ValueError):
@@ -51,6 +67,32 @@ def _sanitize_filename(s: str) -> str:
     return re.sub(r"[^A-Za-z0-9._-]+", "_", s)
 
 
+def _period(raw: Any, name: str) -> str:
+    period = str(raw).lower()
+    if period not in ("d", "w", "m"):
+        raise ConfigError(f"{name} must be one of: d, w, m")
+    return period
+
+
+def _adjusted(raw: Any, name: str) -> Optional[int]:
+    if raw is None:
+        return None
+    try:
+        adjusted = int(raw)
+        if adjusted not in (0, 1):
+            raise ValueError
+    except Exception:
+        raise ConfigError(f"{name} must be 0 or 1 if provided")
+    return adjusted
+
+
+def variant_label(period: str, adjusted: Optional[int]) -> str:
+    """
+    Output subdirectory name for a derived variant, e.g. "w-adj1".
+    """
+    return period if adjusted is None else f"{period}-adj{adjusted}"
+
+
 def filename_from_template(template: str, ticker: str, f: str, t: str, ext: str) -> str:
     return template.format(
         ticker=_sanitize_filename(ticker),
@@ -68,6 +110,7 @@ def load_config(config_path: Path) -> AppConfig:
         raise ConfigError(f"Failed to parse JSON config: {e}")
 
     # API token comes from env
+    _load_env()
     api_token = os.getenv("EODHD_API_TOKEN")
     if not api_token:
         raise ConfigError("EODHD_API_TOKEN is missing. Add it to your .env or environment.")
@@ -77,36 +120,64 @@ def load_config(config_path: Path) -> AppConfig:
     if not isinstance(tickers, list) or not tickers:
         raise ConfigError("'tickers' must be a non-empty list of strings.")
 
+    mode = str(cfg.get("mode", "range")).lower()
+    if mode not in ("range", "bulk_daily"):
+        raise ConfigError("mode must be one of: range, bulk_daily")
+
     fdate = _valid_date(str(cfg.get("from")))
     tdate = _valid_date(str(cfg.get("to")))
     if fdate > tdate:
         raise ConfigError("'from' must be <= 'to'.")
 
     # Data
-    data = {"period": "d", "order": "a", "adjusted": None}
+    data = {"period": "d", "order": "a", "adjusted": None, "columnar": False, "derive_locally": False, "variants": []}
     data.update(cfg.get("data", {}))
 
-    period = str(data.get("period", "d")).lower()
-    if period not in ("d", "w", "m"):
-        raise ConfigError("data.period must be one of: d, w, m")
+    period = _period(data.get("period", "d"), "data.period")
     order = str(data.get("order", "a")).lower()
     if order not in ("a", "d"):
         raise ConfigError("data.order must be one of: a, d")
-
-    adjusted_raw = data.get("adjusted", None)
-    adjusted = None
-    if adjusted_raw is not None:
-        try:
-            adjusted = int(adjusted_raw)
-            if adjusted not in (0, 1):
-                raise ValueError
-        except Exception:
-            raise ConfigError("data.adjusted must be 0 or 1 if provided")
+    adjusted = _adjusted(data.get("adjusted", None), "data.adjusted")
+
+    # Extra outputs derived from the same raw daily download
+    derive_locally = bool(data.get("derive_locally", False))
+    variants: List[Tuple[str, Optional[int]]] = []
+    if not isinstance(data.get("variants") or [], list):
+        raise ConfigError("data.variants must be a list of {period, adjusted} objects")
+    for i, v in enumerate(data.get("variants") or []):
+        if not isinstance(v, dict):
+            raise ConfigError(f"data.variants[{i}] must be an object with period and adjusted")
+        variants.append((
+            _period(v.get("period", "d"), f"data.variants[{i}].period"),
+            _adjusted(v.get("adjusted", None), f"data.variants[{i}].adjusted"),
+        ))
+    if variants and not derive_locally:
+        raise ConfigError("data.variants requires data.derive_locally: true")
 
     # Requests
-    req = {"timeout": 30, "max_retries": 5, "backoff_base": 0.8}
+    req = {
+        "timeout": 30,
+        "max_retries": 5,
+        "backoff_base": 0.8,
+        "concurrency": 1,
+        "rate_limit_per_sec": 15,
+        "base_url": "https://eodhistoricaldata.com/api",
+    }
     req.update(cfg.get("requests", {}))
 
+    try:
+        concurrency = int(req["concurrency"])
+        if concurrency < 1:
+            raise ValueError
+    except Exception:
+        raise ConfigError("requests.concurrency must be an integer >= 1")
+    try:
+        rate_limit = float(req["rate_limit_per_sec"] or 0)
+        if rate_limit < 0:
+            raise ValueError
+    except Exception:
+        raise ConfigError("requests.rate_limit_per_sec must be a number >= 0 (0 disables it)")
+
     # Output
     out_cfg = {
         "directory": "./outputs",
@@ -119,25 +190,46 @@ def load_config(config_path: Path) -> AppConfig:
     out_cfg.update(cfg.get("output", {}))
 
     out_dir = Path(str(out_cfg["directory"]))
+
+    # Local bar store (incremental re-runs)
+    store_cfg = {"enabled": False, "directory": None}
+    store_cfg.update(cfg.get("store", {}))
+    store_dir: Optional[Path] = None
+    if bool(store_cfg["enabled"]):
+        store_dir = Path(str(store_cfg["directory"])) if store_cfg["directory"] else out_dir / "_store"
     out_format = str(out_cfg["format"]).lower()
-    if out_format not in ("csv", "parquet", "json"):
-        raise ConfigError("output.format must be csv, parquet, or json")
+    if out_format not in ("csv", "parquet", "feather", "json", "jsonl"):
+        raise ConfigError("output.format must be csv, parquet, feather, json, or jsonl")
+    if variants and mode == "bulk_daily":
+        raise ConfigError("data.variants is not supported with mode=bulk_daily")
+    if mode == "bulk_daily" and period != "d":
+        raise ConfigError("data.period must be d with mode=bulk_daily (the bulk endpoint returns one day)")
+    if mode == "bulk_daily" and adjusted is not None:
+        raise ConfigError("data.adjusted is not supported with mode=bulk_daily")
 
     return AppConfig(
         api_token=api_token,
+        mode=mode,
         tickers=[str(t).strip() for t in tickers],
         date_from=fdate,
         date_to=tdate,
         period=period,
         order=order,
         adjusted=adjusted,
+        columnar=bool(data.get("columnar", False)),
         timeout=int(req["timeout"]),
         max_retries=int(req["max_retries"]),
         backoff_base=float(req["backoff_base"]),
+        concurrency=concurrency,
+        rate_limit_per_sec=rate_limit,
+        base_url=str(req["base_url"]).rstrip("/"),
         out_dir=out_dir,
         out_format=out_format,
         per_ticker=bool(out_cfg["per_ticker"]),
         filename_template=str(out_cfg["filename_template"]),
         combined_filename=str(out_cfg["combined_filename"]),
         include_ticker_col=bool(out_cfg["include_ticker_column_in_combined"]),
+        store_dir=store_dir,
+        derive_locally=derive_locally,
+        variants=variants,
     )
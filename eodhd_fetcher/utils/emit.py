@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import log_utils as log
+from .config_loader import AppConfig, filename_from_template, variant_label
+from .io_utils import write_rows, write_table
+
+# (period, adjusted, directory) of one output series
+Output = Tuple[str, Optional[int], Path]
+
+
+def outputs(cfg: AppConfig) -> List[Output]:
+    """
+    The configured series first, then each data.variants entry in its own
+    subdirectory of the output directory.
+    """
+    out: List[Output] = [(cfg.period, cfg.adjusted, cfg.out_dir)]
+    for period, adjusted in cfg.variants:
+        out.append((period, adjusted, cfg.out_dir / variant_label(period, adjusted)))
+    return out
+
+
+def emit_rows(
+    cfg: AppConfig, ticker: str, rows: List[Dict], fdate: str, tdate: str, out_dir: Optional[Path] = None
+) -> List[Dict]:
+    """
+    Write one ticker's rows to its own file, or return them (with the ticker
+    column if configured) for the combined file.
+    """
+    if not rows:
+        log.warn(f"{ticker}: no data returned.")
+        return []
+    if cfg.per_ticker:
+        out_name = filename_from_template(cfg.filename_template, ticker, fdate, tdate, cfg.out_format)
+        out_path = (out_dir or cfg.out_dir) / out_name
+        write_rows(rows, out_path, cfg.out_format)
+        log.info(f"{ticker}: wrote {len(rows)} rows -> {out_path}")
+        return []
+    if cfg.include_ticker_col:
+        for r in rows:
+            r["ticker"] = ticker
+    return rows
+
+
+def emit_table(
+    cfg: AppConfig, ticker: str, table: Any, fdate: str, tdate: str, out_dir: Optional[Path] = None
+) -> Any:
+    """
+    Columnar counterpart of emit_rows; returns the table for the combined file.
+    """
+    if table.num_rows == 0:
+        log.warn(f"{ticker}: no data returned.")
+        return None
+    if cfg.per_ticker:
+        out_name = filename_from_template(cfg.filename_template, ticker, fdate, tdate, cfg.out_format)
+        out_path = (out_dir or cfg.out_dir) / out_name
+        write_table(table, out_path, cfg.out_format)
+        log.info(f"{ticker}: wrote {table.num_rows} rows -> {out_path}")
+        return None
+    return table
@@ -2,30 +2,65 @@ from __future__ import annotations
 
 import csv
 import json
+import os
+import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 
-try:
-	import pyarrow as pa  # type: ignore
-	import pyarrow.parquet as pq  # type: ignore
-	_PARQUET_OK = True
-except Exception:
-	_PARQUET_OK = False
+from .metrics import RATE_BUCKETS, REGISTRY
+
+# pyarrow is imported on first use (see _arrow), so CSV/JSON runs never load it
+pa: Any = None
+pacsv: Any = None
+ipc: Any = None
+pq: Any = None
+
+def _arrow(fmt: str) -> None:
+	global pa, pacsv, ipc, pq
+	if pa is not None:
+		return
+	try:
+		import pyarrow  # type: ignore
+		import pyarrow.csv  # type: ignore
+		import pyarrow.ipc  # type: ignore
+		import pyarrow.parquet  # type: ignore
+	except Exception:
+		raise RuntimeError(f"pyarrow is required for {fmt} output. Install with: pip install pyarrow")
+	pa, pacsv, ipc, pq = pyarrow, pyarrow.csv, pyarrow.ipc, pyarrow.parquet
 
 def ensure_dir(p: Path) -> None:
 	p.mkdir(parents=True, exist_ok=True)
 
+def _observe_write(fmt: str, rows: int, t0: float) -> None:
+	# rows written and rows/sec per write call, by output format
+	REGISTRY.counter("rows_written_total", format=fmt).inc(rows)
+	elapsed = time.perf_counter() - t0
+	if rows and elapsed > 0:
+		REGISTRY.histogram("write_rows_per_second", buckets=RATE_BUCKETS, format=fmt).observe(rows / elapsed)
+
 def write_rows(rows: List[Dict], out_path: Path, fmt: str) -> None:
+	t0 = time.perf_counter()
+	_write_rows(rows, out_path, fmt)
+	_observe_write(fmt.lower(), len(rows), t0)
+
+def _write_rows(rows: List[Dict], out_path: Path, fmt: str) -> None:
 	fmt = fmt.lower()
-	if fmt == "parquet":
-		if not _PARQUET_OK:
-			raise RuntimeError("pyarrow is required for Parquet output. Install with: pip install pyarrow")
+	if fmt in ("parquet", "feather"):
+		_arrow(fmt)
 		table = pa.Table.from_pylist(rows)
-		pq.write_table(table, str(out_path))
+		if fmt == "feather":
+			_write_ipc(table, out_path)
+		else:
+			pq.write_table(table, str(out_path))
 		return
 	if fmt == "json":
 		out_path.write_text(json.dumps(rows, indent=2) + "\n", encoding="utf-8")
 		return
+	if fmt == "jsonl":
+		with out_path.open("w", encoding="utf-8") as f:
+			for r in rows:
+				f.write(json.dumps(r) + "\n")
+		return
 	# CSV
 	if not rows:
 		out_path.write_text("", encoding="utf-8")
@@ -34,4 +69,183 @@ def write_rows(rows: List[Dict], out_path: Path, fmt: str) -> None:
 	with out_path.open("w", newline="", encoding="utf-8") as f:
 		writer = csv.DictWriter(f, fieldnames=fieldnames)
 		writer.writeheader()
-		writer.writerows(rows)
\ No newline at end of file
+		writer.writerows(rows)
+
+def _decoded(table: "pa.Table") -> "pa.Table":
+	# The Arrow CSV writer does not take dictionary columns, and an IPC file
+	# cannot change a dictionary between batches; decode them.
+	cols = [
+		c.cast(c.type.value_type) if pa.types.is_dictionary(c.type) else c
+		for c in table.columns
+	]
+	return pa.Table.from_arrays(cols, names=table.column_names)
+
+
+def _write_csv_table(table: "pa.Table", sink: Any, header: bool) -> None:
+	# Arrow always quotes header names; write a plain header like csv.DictWriter.
+	table = _decoded(table)
+	if header:
+		sink.write((",".join(table.column_names) + "\n").encode("utf-8"))
+	pacsv.write_csv(table, sink, write_options=pacsv.WriteOptions(include_header=False, quoting_style="needed"))
+
+
+def _write_ipc(table: "pa.Table", out_path: Path) -> None:
+	# Uncompressed, so readers can memory-map the file and use it in place.
+	table = _decoded(table)
+	with ipc.new_file(str(out_path), table.schema) as writer:
+		writer.write_table(table)
+
+
+def write_table(table: "pa.Table", out_path: Path, fmt: str) -> None:
+	"""
+	Columnar counterpart of write_rows for tables built by eodhd.columnar.
+	"""
+	t0 = time.perf_counter()
+	fmt = fmt.lower()
+	_arrow(fmt)
+	if fmt == "parquet":
+		pq.write_table(table, str(out_path))
+	elif fmt == "feather":
+		_write_ipc(table, out_path)
+	elif fmt == "csv":
+		with out_path.open("wb") as f:
+			_write_csv_table(table, f, header=True)
+	else:
+		_write_rows(_json_ready(table), out_path, fmt)
+	_observe_write(fmt, table.num_rows, t0)
+
+
+def _json_ready(table: "pa.Table") -> List[Dict]:
+	rows = table.to_pylist()
+	for r in rows:
+		d = r.get("date")
+		if d is not None and not isinstance(d, str):
+			r["date"] = d.isoformat()
+	return rows
+
+
+class StreamingWriter:
+	"""
+	Append-as-you-go writer for the combined output file.
+
+	Each `write(rows)` call appends one ticker's batch: a Parquet row group, an
+	Arrow IPC record batch ("feather"), CSV lines, or JSON Lines (used for both
+	"json" and "jsonl"). Data goes to a
+	`.part` file next to `out_path`, which is renamed over `out_path` only when
+	`close()` succeeds, so readers never see a half-written file.
+	"""
+
+	def __init__(self, out_path: Path, fmt: str):
+		self.out_path = out_path
+		self.fmt = fmt.lower()
+		self.tmp_path = out_path.with_name(out_path.name + ".part")
+		self.rows_written = 0
+		self._fh: Optional[Any] = None
+		self._csv: Optional[csv.DictWriter] = None
+		self._pq: Optional[Any] = None  # ParquetWriter, or the IPC writer for "feather"
+		self._schema: Optional[Any] = None
+		if self.fmt in ("parquet", "feather"):
+			_arrow(self.fmt)
+
+	def write(self, rows: List[Dict]) -> None:
+		if not rows:
+			return
+		t0 = time.perf_counter()
+		if self.fmt == "parquet":
+			self._write_parquet(rows)
+		elif self.fmt == "feather":
+			if self._schema is None:
+				table = pa.Table.from_pylist(rows)
+				self._schema = table.schema
+			else:
+				table = pa.Table.from_pylist(rows, schema=self._schema)
+			self._write_ipc(table)
+		elif self.fmt in ("json", "jsonl"):
+			if self._fh is None:
+				self._fh = self.tmp_path.open("w", encoding="utf-8")
+			self._fh.writelines(json.dumps(r) + "\n" for r in rows)
+		else:
+			if self._csv is None:
+				self._fh = self.tmp_path.open("w", newline="", encoding="utf-8")
+				self._csv = csv.DictWriter(self._fh, fieldnames=list(rows[0].keys()), extrasaction="ignore")
+				self._csv.writeheader()
+			self._csv.writerows(rows)
+		self.rows_written += len(rows)
+		_observe_write(self.fmt, len(rows), t0)
+
+	def write_table(self, table: "pa.Table") -> None:
+		"""
+		Append one columnar batch without going through row dicts.
+		"""
+		if table.num_rows == 0:
+			return
+		_arrow(self.fmt)
+		t0 = time.perf_counter()
+		if self.fmt == "parquet":
+			if self._pq is None:
+				self._pq = pq.ParquetWriter(str(self.tmp_path), table.schema)
+			self._pq.write_table(table)
+		elif self.fmt == "feather":
+			self._write_ipc(table)
+		elif self.fmt == "csv":
+			if self._fh is None:
+				self._fh = self.tmp_path.open("wb")
+			_write_csv_table(table, self._fh, header=self.rows_written == 0)
+		else:
+			self.write(_json_ready(table))
+			return
+		self.rows_written += table.num_rows
+		_observe_write(self.fmt, table.num_rows, t0)
+
+	def _write_ipc(self, table: "pa.Table") -> None:
+		table = _decoded(table)
+		if self._pq is None:
+			self._pq = ipc.new_file(str(self.tmp_path), table.schema)
+		# one record batch per ticker; readers skip whole batches by ticker
+		self._pq.write_table(table.combine_chunks())
+
+	def _write_parquet(self, rows: List[Dict]) -> None:
+		if self._pq is None:
+			table = pa.Table.from_pylist(rows)
+			self._schema = table.schema
+			self._pq = pq.ParquetWriter(str(self.tmp_path), self._schema)
+		else:
+			table = pa.Table.from_pylist(rows, schema=self._schema)
+		self._pq.write_table(table)
+
+	def close(self) -> None:
+		"""
+		Flush and atomically move the finished file into place.
+		"""
+		if self._pq is not None:
+			self._pq.close()
+		elif self._fh is not None:
+			self._fh.close()
+		elif self.fmt == "parquet":
+			pq.write_table(pa.Table.from_pylist([]), str(self.tmp_path))
+		elif self.fmt == "feather":
+			ipc.new_file(str(self.tmp_path), pa.schema([])).close()
+		else:
+			self.tmp_path.write_text("", encoding="utf-8")
+		self._pq = self._fh = self._csv = None
+		os.replace(self.tmp_path, self.out_path)
+
+	def __enter__(self) -> "StreamingWriter":
+		return self
+
+	def abort(self) -> None:
+		"""
+		Close without finalizing. The `.part` file is left behind for
+		inspection and the existing output (if any) is not replaced.
+		"""
+		if self._pq is not None:
+			self._pq.close()
+		elif self._fh is not None:
+			self._fh.close()
+		self._pq = self._fh = self._csv = None
+
+	def __exit__(self, exc_type, exc, tb) -> None:
+		if exc_type is None:
+			self.close()
+		else:
+			self.abort()
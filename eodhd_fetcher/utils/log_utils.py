@@ -1,9 +1,141 @@
+from __future__ import annotations
+
+import atexit
+import json
 import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, TextIO, Tuple
+
+# (wall time, level, message, fields, stream)
+Record = Tuple[float, str, str, Dict[str, Any], TextIO]
+
+
+class BackgroundLog:
+    """
+    Console log written by a daemon thread, so callers (the watcher's tick
+    loop, the fetch workers) only pay for a deque append. Records are
+    "[LEVEL] message key=value" lines (levels in `plain` are printed as-is)
+    or, with fmt="json", one JSON object per line. The target stream
+    (stdout unless given) is taken when the record is emitted, so redirected
+    stdout keeps working. The writer wakes every `interval` seconds; past
+    `max_queue` pending records new ones are dropped and counted rather than
+    blocking.
+    """
+
+    def __init__(
+        self,
+        fmt: str = "text",
+        max_queue: int = 10000,
+        interval: float = 0.05,
+        plain: Tuple[str, ...] = ("ALERT",),
+    ):
+        self.fmt = fmt
+        self.plain = plain
+        self.max_queue = max_queue
+        self.interval = interval
+        self.emitted = 0
+        self.dropped = 0
+        self._buf: Deque[Any] = deque()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def emit(self, level: str, msg: str, fields: Optional[Dict[str, Any]] = None, stream: Optional[TextIO] = None) -> None:
+        if self._thread is None:
+            self._start()
+        if len(self._buf) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._buf.append((time.time(), level, msg, fields or {}, stream or sys.stdout))
+        self.emitted += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        Wait until everything emitted so far has been written.
+        """
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._buf.append(done)
+        self._wake.set()
+        done.wait(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {"emitted": self.emitted, "dropped": self.dropped, "queued": len(self._buf)}
+
+    # ---------- writer ----------
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _format(self, rec: Record) -> str:
+        ts, level, msg, fields, _ = rec
+        if self.fmt == "json":
+            return json.dumps({"ts": round(ts, 3), "level": level, "msg": msg, **fields}, default=str, ensure_ascii=False)
+        if fields:
+            msg += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return msg if level in self.plain else f"[{level}] {msg}"
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            dirty = set()
+            while self._buf:
+                item = self._buf.popleft()
+                if isinstance(item, threading.Event):
+                    for s in dirty:
+                        _flush(s)
+                    dirty.clear()
+                    item.set()
+                    continue
+                stream = item[4]
+                try:
+                    stream.write(self._format(item) + "\n")
+                    dirty.add(stream)
+                except Exception:
+                    pass
+            for s in dirty:
+                _flush(s)
+
+
+def _flush(stream: TextIO) -> None:
+    try:
+        stream.flush()
+    except Exception:
+        pass
+
+
+# Fetch workers never wait on a slow terminal or pipe; info goes to stdout,
+# warnings and errors to stderr, and flush() runs at exit.
+LOG = BackgroundLog(plain=("INFO",))
+
+
+def configure(fmt: str = "text") -> None:
+    """
+    "text" keeps the plain lines; "json" writes one {"ts", "level", "msg"} object per line.
+    """
+    LOG.fmt = fmt
+
+
+def flush(timeout: float = 5.0) -> None:
+    """
+    Wait until everything logged so far has been written.
+    """
+    LOG.flush(timeout)
+
+
 def info(msg: str) -> None:
-    print(msg)
+    LOG.emit("INFO", msg)
 
 def warn(msg: str) -> None:
-    print(f"WARN: {msg}", file=sys.stderr)
-    
+    LOG.emit("WARN", msg, stream=sys.stderr)
+
 def error(msg: str) -> None:
-    print(f"ERROR: {msg}", file=sys.stderr)
\ No newline at end of file
+    LOG.emit("ERROR", msg, stream=sys.stderr)
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Upper bounds (seconds) for request latency: 10ms .. 60s
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Upper bounds (rows/sec) for write throughput
+RATE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 1e8)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1.0) -> None:
+        with self._lock:
+            self.value += n
+
+
+class Gauge:
+    """
+    Value read from `fn` whenever the registry is rendered (also used for
+    counters kept elsewhere, e.g. a dispatcher's sent/dropped totals).
+    """
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], float]):
+        self.fn = fn
+
+    @property
+    def value(self) -> float:
+        try:
+            return float(self.fn())
+        except Exception:
+            return float("nan")
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram; observe() is a bisect and three increments.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(bounds))
+        self.counts = [0] * (len(self.bounds) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, v: float) -> None:
+        i = bisect_left(self.bounds, v)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += v
+            self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Upper bound of the bucket holding the q-quantile (None if empty).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Registry:
+    """
+    Thread-safe named counters, gauges and histograms with optional labels,
+    dumped as JSON or in the Prometheus text format. Shared with
+    ibkr_price_watcher.metrics, which serves the same registry over HTTP;
+    `buckets` is the default for histograms created without their own.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._metrics: Dict[str, Tuple[str, str, Dict[Labels, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, help: str, labels: Dict[str, Any], make: Callable[[], Any]) -> Any:
+        key: Labels = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            entry = self._metrics.get(name)
+            if entry is None:
+                entry = self._metrics[name] = (kind, help, {})
+            series = entry[2]
+            m = series.get(key)
+            if m is None:
+                m = series[key] = make()
+            return m
+
+    def counter(self, name: str, help: str = "", **labels: Any) -> Counter:
+        return self._get("counter", name, help, labels, Counter)
+
+    def histogram(self, name: str, help: str = "", buckets: Optional[Tuple[float, ...]] = None, **labels: Any) -> Histogram:
+        return self._get("histogram", name, help, labels, lambda: Histogram(buckets or self.buckets))
+
+    def gauge(self, name: str, fn: Callable[[], float], help: str = "", kind: str = "gauge", **labels: Any) -> Gauge:
+        g = self._get(kind, name, help, labels, lambda: Gauge(fn))
+        g.fn = fn
+        return g
+
+    def _items(self) -> List[Tuple[str, str, str, List[Tuple[Labels, Any]]]]:
+        with self._lock:
+            return [(name, kind, help, list(series.items())) for name, (kind, help, series) in sorted(self._metrics.items())]
+
+    def snapshot(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for name, kind, _, series in self._items():
+            for labels, m in series:
+                key = name + _fmt_labels(labels)
+                if kind == "histogram":
+                    out[key] = {"count": m.count, "sum": round(m.sum, 6), "p50": m.quantile(0.5), "p99": m.quantile(0.99)}
+                else:
+                    out[key] = m.value
+        return out
+
+    def render(self) -> str:
+        out: List[str] = []
+        for name, kind, help, series in self._items():
+            if help:
+                out.append(f"# HELP {name} {help}")
+            out.append(f"# TYPE {name} {kind}")
+            for labels, m in series:
+                if kind != "histogram":
+                    out.append(f"{name}{_fmt_labels(labels)} {m.value!r}")
+                    continue
+                cum = 0
+                for bound, n in zip(m.bounds + (float("inf"),), m.counts):
+                    cum += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    out.append(f"{name}_bucket{_fmt_labels(labels + (('le', le),))} {cum}")
+                out.append(f"{name}_sum{_fmt_labels(labels)} {m.sum!r}")
+                out.append(f"{name}_count{_fmt_labels(labels)} {m.count}")
+        return "\n".join(out) + "\n"
+
+
+def _fmt_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+REGISTRY = Registry()
+
+
+class MetricsDump:
+    """
+    Rewrites `path` from a daemon thread every `interval` seconds and once more
+    on close(). A `.prom` path gets the Prometheus text format, anything else
+    a JSON snapshot; the file is replaced atomically either way.
+    """
+
+    def __init__(self, path: Path, interval: float = 15.0, registry: Registry = REGISTRY):
+        self.path = Path(path)
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self) -> None:
+        if self.path.suffix == ".prom":
+            data = self.registry.render()
+        else:
+            data = json.dumps({"ts": time.time(), "metrics": self.registry.snapshot()}, indent=1)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                pass
+
+    def start(self) -> "MetricsDump":
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
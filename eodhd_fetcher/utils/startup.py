@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+# Optional backends that a plain CSV/JSON run should never import
+HEAVY_MODULES = ("pyarrow", "numpy", "pandas")
+
+
+class StartupProfile:
+    """
+    Wall time per startup phase for --profile-startup. The clock starts when
+    the profile is created (this module's PROFILE: on first import, which
+    app.py does before anything else); each mark() closes the phase that has
+    run since the previous mark. `heavy_modules` are reported if imported;
+    ibkr_price_watcher.startup builds its own profile with its list.
+    """
+
+    def __init__(self, heavy_modules: Tuple[str, ...] = HEAVY_MODULES):
+        self.heavy_modules = heavy_modules
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "phases_ms": {name: round(s * 1000.0, 1) for name, s in self.phases},
+            "total_ms": round((self._last - self.t0) * 1000.0, 1),
+            "heavy_modules": [m for m in self.heavy_modules if m in sys.modules],
+        }
+
+    def format(self) -> str:
+        r = self.report()
+        phases = " ".join(f"{k}={v}" for k, v in r["phases_ms"].items())
+        return f"Startup profile (ms): {phases} total={r['total_ms']} heavy_modules={','.join(r['heavy_modules']) or 'none'}"
+
+
+PROFILE = StartupProfile()
@@ -0,0 +1,350 @@
+"""
+Backtest the symbol rules against EOD history written by eodhd_fetcher.
+
+    python -m ibkr_price_watcher.backtest eodhd_fetcher/outputs
+    python -m ibkr_price_watcher.backtest outputs/combined.parquet --grid pct_change_down=1,2,5 --grid price_scale=0.95,1,1.05
+
+Rules are evaluated as whole-array NumPy operations: every (symbol, rule)
+pair becomes one column, and its conditions collapse to an open interval
+lo < price < hi, so a rule holds on a bar when both comparisons pass. Edge
+triggering (fire when the rule starts holding, re-arm when it stops) is a
+shift-and-compare along the time axis. BUY fires open a long position and
+SELL fires close it. Price alerts (min_change_abs/pct and throttle) depend on
+the last alert sent, so they step through time once, vectorized across all
+tickers and grid points.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .rules import ABOVE_KEYS, BELOW_KEYS, _compile_condition
+
+INF = np.inf
+_DATED_NAME = re.compile(r"^(?P<ticker>.+?)_\d{4}-\d{2}-\d{2}_\d{4}-\d{2}-\d{2}$")
+_FORMATS = (".parquet", ".feather", ".csv", ".json", ".jsonl")
+
+# Grid axes: condition keys replace the configured value of every rule using
+# them, price_scale multiplies price_below/price_above, the rest override the
+# alert filter.
+GRID_KEYS = (
+    "pct_change_up", "pct_change_down", "price_scale", "min_change_abs", "min_change_pct", "throttle_seconds",
+)
+
+
+# ---------- data ----------
+
+def _read_frame(path: Path):
+    import pandas as pd
+
+    ext = path.suffix.lower()
+    if ext == ".parquet":
+        df = pd.read_parquet(path)
+    elif ext == ".feather":
+        df = pd.read_feather(path)
+    elif ext == ".csv":
+        df = pd.read_csv(path)
+    elif ext == ".jsonl":
+        df = pd.read_json(path, lines=True)
+    else:
+        try:
+            df = pd.read_json(path)
+        except ValueError:  # combined "json" output is written as JSON Lines
+            df = pd.read_json(path, lines=True)
+    if "ticker" not in df.columns:
+        m = _DATED_NAME.match(path.stem)
+        df["ticker"] = m.group("ticker") if m else path.stem
+    return df
+
+
+def load_bars(paths: Sequence[str | Path], price: str = "close") -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    (dates, tickers, prices[T, N]) from fetcher output files or directories.
+    Missing bars are forward-filled so a gap does not toggle a rule.
+    """
+    import pandas as pd
+
+    files: List[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files.extend(sorted(f for f in p.rglob("*") if f.suffix.lower() in _FORMATS and f.is_file()))
+        else:
+            files.append(p)
+    if not files:
+        raise FileNotFoundError(f"no fetcher output found in {', '.join(map(str, paths))}")
+    df = pd.concat([_read_frame(f)[["date", "ticker", price]] for f in files], ignore_index=True)
+    df["date"] = pd.to_datetime(df["date"].astype(str))
+    df["ticker"] = df["ticker"].astype(str)
+    wide = (
+        df.drop_duplicates(["date", "ticker"], keep="last")
+        .pivot(index="date", columns="ticker", values=price)
+        .sort_index()
+        .ffill()
+    )
+    return wide.index.values, [str(c) for c in wide.columns], wide.to_numpy(dtype=np.float64)
+
+
+def match_symbols(tickers: Sequence[str], symbols: Dict[str, Dict[str, Any]]) -> Dict[int, str]:
+    """
+    Column index -> symbol, matching EODHD tickers (AAPL.US) to symbol files (AAPL).
+    """
+    out: Dict[int, str] = {}
+    for i, t in enumerate(tickers):
+        sym = t.upper() if t.upper() in symbols else t.split(".")[0].upper()
+        if sym in symbols:
+            out[i] = sym
+    return out
+
+
+# ---------- rules ----------
+
+def rule_bounds(
+    sym: str, s_cfg: Dict[str, Any], overrides: Dict[str, float]
+) -> List[Tuple[str, str, float, float]]:
+    """
+    (name, action, lo, hi) per rule: the rule holds while lo < price < hi.
+    Rules with indicator conditions need tick data and are skipped.
+    """
+    baseline = s_cfg.get("baseline_price")
+    baseline = float(baseline) if baseline is not None else None
+    scale = overrides.get("price_scale", 1.0)
+    out: List[Tuple[str, str, float, float]] = []
+    for i, r_cfg in enumerate(s_cfg.get("rules") or []):
+        name = str(r_cfg.get("name", f"rule {i + 1}"))
+        lo, hi = -INF, INF
+        try:
+            when = r_cfg.get("when") or {}
+            if not when:
+                continue
+            for key, value in when.items():
+                if key not in BELOW_KEYS and key not in ABOVE_KEYS:
+                    raise ValueError(f"condition '{key}' is not supported in backtests")
+                v = float(overrides.get(key, value))
+                if key in ("price_below", "price_above"):
+                    v *= scale
+                t = _compile_condition(key, v, baseline)
+                if key in BELOW_KEYS:
+                    hi = min(hi, t)
+                else:
+                    lo = max(lo, t)
+        except (TypeError, ValueError) as e:
+            print(f"[WARN] {sym}: skipping rule '{name}': {e}")
+            continue
+        out.append((name, str(r_cfg.get("action", "")).upper(), lo, hi))
+    return out
+
+
+def grid_combos(grid: Dict[str, List[float]]) -> List[Dict[str, float]]:
+    if not grid:
+        return [{}]
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _edges(holds: np.ndarray) -> np.ndarray:
+    """
+    True where a condition starts holding (False before the first bar).
+    """
+    fire = holds.copy()
+    fire[1:] &= ~holds[:-1]
+    return fire
+
+
+# ---------- alerts ----------
+
+def price_alerts(
+    prices: np.ndarray, times: np.ndarray, min_abs: np.ndarray, min_pct: np.ndarray, throttle: np.ndarray
+) -> np.ndarray:
+    """
+    Alert counts [G, N] under PriceWatcher.on_tick semantics. `min_abs` and
+    `min_pct` are [G, N], `throttle` is [G, 1]; `times` are seconds.
+    """
+    G, N = min_abs.shape
+    last = np.full((G, N), np.nan)
+    last_t = np.full((G, N), -INF)
+    counts = np.zeros((G, N), dtype=np.int64)
+    use_pct = min_pct > 0.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for t in range(prices.shape[0]):
+            p = prices[t]
+            chg = np.abs(p - last)
+            passes = np.isnan(last) | (
+                (chg >= min_abs) & (~use_pct | (np.where(last != 0.0, chg / last * 100.0, 0.0) >= min_pct))
+            )
+            ok = ~np.isnan(p) & passes & (times[t] - last_t >= throttle)
+            counts += ok
+            last = np.where(ok, p, last)
+            last_t = np.where(ok, times[t], last_t)
+    return counts
+
+
+# ---------- backtest ----------
+
+def backtest(
+    dates: np.ndarray,
+    tickers: Sequence[str],
+    prices: np.ndarray,
+    symbols: Dict[str, Dict[str, Any]],
+    cfg: Dict[str, Any],
+    grid: Optional[Dict[str, List[float]]] = None,
+) -> Dict[str, Any]:
+    combos = grid_combos(grid or {})
+    cols = match_symbols(tickers, symbols)
+    T, N = prices.shape
+    G = len(combos)
+    dfl = cfg.get("defaults", {})
+
+    # one column per (symbol, rule); bounds per grid point
+    rule_col: List[int] = []
+    rule_name: List[str] = []
+    rule_action: List[str] = []
+    lo = []
+    hi = []
+    for g, combo in enumerate(combos):
+        lo_g, hi_g = [], []
+        for col, sym in cols.items():
+            for name, action, r_lo, r_hi in rule_bounds(sym, symbols[sym], combo):
+                if g == 0:
+                    rule_col.append(col)
+                    rule_name.append(name)
+                    rule_action.append(action)
+                lo_g.append(r_lo)
+                hi_g.append(r_hi)
+        lo.append(lo_g)
+        hi.append(hi_g)
+    R = len(rule_col)
+    col_idx = np.asarray(rule_col, dtype=np.intp)
+    lo_a = np.asarray(lo, dtype=np.float64).reshape(G, R)
+    hi_a = np.asarray(hi, dtype=np.float64).reshape(G, R)
+
+    # [T, G, R]: NaN prices compare False, so a ticker before its first bar never holds
+    pr = prices[:, None, col_idx]
+    holds = pr > lo_a
+    holds &= pr < hi_a
+    fire = _edges(holds)
+    triggers = fire.sum(axis=0)  # [G, R]
+
+    # positions: BUY opens, SELL closes; a bar where both fire keeps the position
+    # fires are sparse: scatter them instead of reducing the whole [T, G, R] array
+    signal = np.zeros((T, G, N), dtype=np.int16)
+    code = np.array([1 if a == "BUY" else -1 if a == "SELL" else 0 for a in rule_action], dtype=np.int16)
+    t_i, g_i, r_i = np.nonzero(fire & (code != 0))
+    np.add.at(signal, (t_i, g_i, col_idx[r_i]), code[r_i])
+    np.sign(signal, out=signal)
+    last_sig = np.where(signal != 0, np.arange(T)[:, None, None], 0)
+    np.maximum.accumulate(last_sig, axis=0, out=last_sig)
+    pos = np.take_along_axis(signal, last_sig, axis=0) > 0
+    n_entries = pos[0].astype(np.int64) + (pos[1:] & ~pos[:-1]).sum(axis=0) if T else np.zeros((G, N), np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ret = np.nan_to_num(prices[1:] / prices[:-1] - 1.0, nan=0.0, posinf=0.0, neginf=0.0)
+    strat = np.prod(1.0 + pos[:-1] * ret[:, None, :], axis=0) - 1.0 if T > 1 else np.zeros((G, N))
+
+    # price alerts
+    times = dates.astype("datetime64[s]").astype(np.float64)
+    min_abs = np.empty((G, N))
+    min_pct = np.empty((G, N))
+    for c in range(N):
+        s_cfg = symbols.get(cols.get(c, ""), {})
+        min_abs[:, c] = float(s_cfg.get("min_change_abs", dfl.get("min_change_abs", 0.0)))
+        min_pct[:, c] = float(s_cfg.get("min_change_pct", dfl.get("min_change_pct", 0.0)))
+    throttle = np.full((G, 1), float(cfg.get("throttle_seconds", 0)))
+    for g, combo in enumerate(combos):
+        if "min_change_abs" in combo:
+            min_abs[g] = combo["min_change_abs"]
+        if "min_change_pct" in combo:
+            min_pct[g] = combo["min_change_pct"]
+        if "throttle_seconds" in combo:
+            throttle[g] = combo["throttle_seconds"]
+    alerts = price_alerts(prices, times, min_abs, min_pct, throttle)
+
+    matched = sorted(cols)
+    rules_of: Dict[int, List[int]] = {}
+    for r, c in enumerate(rule_col):
+        rules_of.setdefault(c, []).append(r)
+    results = []
+    for g, combo in enumerate(combos):
+        by_rule: Dict[str, int] = {}
+        for r in range(R):
+            by_rule[rule_name[r]] = by_rule.get(rule_name[r], 0) + int(triggers[g, r])
+        tickers_out = {
+            tickers[c]: {
+                "symbol": cols[c],
+                "triggers": {rule_name[r]: int(triggers[g, r]) for r in rules_of.get(c, ())},
+                "price_alerts": int(alerts[g, c]),
+                "entries": int(n_entries[g, c]),
+                "position": int(pos[-1, g, c]) if T else 0,
+                "return_pct": round(float(strat[g, c]) * 100.0, 3),
+            }
+            for c in matched
+        }
+        results.append({
+            "params": combo,
+            "triggers": by_rule,
+            "price_alerts": int(alerts[g, matched].sum()) if matched else 0,
+            "entries": int(n_entries[g, matched].sum()) if matched else 0,
+            "open_positions": int(pos[-1, g, matched].sum()) if T and matched else 0,
+            "mean_return_pct": round(float(strat[g, matched].mean()) * 100.0, 3) if matched else None,
+            "tickers": tickers_out,
+        })
+    return {
+        "bars": T,
+        "tickers": N,
+        "matched_symbols": len(matched),
+        "rules": R,
+        "from": str(dates[0])[:10] if T else None,
+        "to": str(dates[-1])[:10] if T else None,
+        "results": results,
+    }
+
+
+def _parse_grid(items: Sequence[str]) -> Dict[str, List[float]]:
+    grid: Dict[str, List[float]] = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        key = key.strip()
+        if key not in GRID_KEYS:
+            raise SystemExit(f"--grid: unknown key '{key}' (choose from {', '.join(GRID_KEYS)})")
+        grid[key] = [float(v) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def _main() -> None:
+    from .config import load_config
+    from .symbols import load_symbols
+
+    ap = argparse.ArgumentParser(description="Backtest symbol rules over eodhd_fetcher output")
+    ap.add_argument("paths", nargs="+", help="fetcher output files or directories (csv/parquet/json/jsonl)")
+    ap.add_argument("--symbols-dir", help="symbol JSON directory (default: config paths.symbols_dir)")
+    ap.add_argument("--price", default="close", choices=["close", "adjusted_close"])
+    ap.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2,...",
+                    help=f"sweep a parameter; keys: {', '.join(GRID_KEYS)}")
+    ap.add_argument("--per-ticker", action="store_true", help="include per-ticker results")
+    ap.add_argument("--out", help="write the JSON report to this file")
+    args = ap.parse_args()
+
+    cfg = load_config()
+    symbols = load_symbols(args.symbols_dir or cfg["paths"]["symbols_dir"])
+    t0 = time.perf_counter()
+    dates, tickers, prices = load_bars(args.paths, price=args.price)
+    t1 = time.perf_counter()
+    report = backtest(dates, tickers, prices, symbols, cfg, _parse_grid(args.grid))
+    t2 = time.perf_counter()
+    report["seconds"] = {"load": round(t1 - t0, 3), "evaluate": round(t2 - t1, 3)}
+    if not args.per_ticker:
+        for r in report["results"]:
+            r.pop("tickers")
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    _main()
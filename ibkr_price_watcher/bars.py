@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from . import log
+
+NAN = float("nan")
+
+# Output columns, in the order eodhd_fetcher's write_rows produces them for
+# EOD rows with the ticker column added. `date` is "YYYY-MM-DD HH:MM:SS" (UTC,
+# bar start) and adjusted_close equals close for intraday bars.
+COLUMNS = ("date", "open", "high", "low", "close", "adjusted_close", "volume", "ticker")
+
+
+def interval_label(seconds: int) -> str:
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+class _BarBuffer:
+    """
+    Preallocated columns for up to `capacity` completed bars.
+    """
+
+    __slots__ = ("capacity", "n", "start", "sym", "open", "high", "low", "close", "volume")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.n = 0
+        self.start = array("q", bytes(8 * capacity))
+        self.sym = array("i", bytes(4 * capacity))
+        self.open = array("d", bytes(8 * capacity))
+        self.high = array("d", bytes(8 * capacity))
+        self.low = array("d", bytes(8 * capacity))
+        self.close = array("d", bytes(8 * capacity))
+        self.volume = array("d", bytes(8 * capacity))
+
+
+class _Series:
+    """
+    Open bars of one interval for every symbol slot, plus the buffer that
+    completed bars are appended to.
+    """
+
+    __slots__ = ("interval", "label", "start", "o", "h", "l", "c", "v", "buf")
+
+    def __init__(self, interval: int, slots: int, buf: _BarBuffer):
+        self.interval = interval
+        self.label = interval_label(interval)
+        self.start = array("q", [-1]) * slots  # bar start (epoch seconds), -1 = no open bar
+        self.o = array("d", bytes(8 * slots))
+        self.h = array("d", bytes(8 * slots))
+        self.l = array("d", bytes(8 * slots))
+        self.c = array("d", bytes(8 * slots))
+        self.v = array("d", bytes(8 * slots))
+        self.buf = buf
+
+    def grow(self, slots: int) -> None:
+        extra = slots - len(self.start)
+        if extra > 0:
+            self.start.extend(array("q", [-1]) * extra)
+            for col in (self.o, self.h, self.l, self.c, self.v):
+                col.extend(array("d", bytes(8 * extra)))
+
+
+class BarAggregator:
+    """
+    Builds OHLCV bars (1s and 1m by default) per symbol from
+    pendingTickersEvent batches, in preallocated columnar buffers.
+
+    Completed bars are handed off in batches, by `flush()` or when a buffer
+    fills up, to a single writer thread. It writes Parquet files under
+    `<directory>/<interval>/<YYYY-MM-DD>/` with the schema of the fetcher's
+    Parquet output, so intraday and daily bars can be read together. Nothing
+    on the event loop touches the disk.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        intervals: Sequence[int] = (1, 60),
+        buffer_rows: int = 65536,
+        ticker_suffix: str = ".US",
+    ):
+        try:
+            import pyarrow  # noqa: F401
+        except Exception:
+            raise RuntimeError("pyarrow is required for bar output. Install with: pip install pyarrow")
+        self.dir = Path(directory)
+        self.buffer_rows = max(1, int(buffer_rows))
+        self.ticker_suffix = ticker_suffix
+        self.tickers: List[str] = []               # slot -> output ticker name
+        self._slots: Dict[int, int] = {}           # conId -> slot
+        self._cum_volume = array("d")              # last cumulative volume per slot
+        self._free: List[_BarBuffer] = []
+        self._free_lock = threading.Lock()
+        self.series = [_Series(int(iv), 0, self._new_buffer()) for iv in sorted(set(intervals))]
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bar-writer")
+        self._pending: List[Future] = []
+        self._seq = 0
+        self.bars_written = 0
+        self.files_written = 0
+
+    # ---------- buffers ----------
+
+    def _new_buffer(self) -> _BarBuffer:
+        with self._free_lock:
+            if self._free:
+                buf = self._free.pop()
+                buf.n = 0
+                return buf
+        return _BarBuffer(self.buffer_rows)
+
+    def _release(self, buf: _BarBuffer) -> None:
+        with self._free_lock:
+            self._free.append(buf)
+
+    def _slot(self, contract: Any) -> int:
+        slot = len(self.tickers)
+        self.tickers.append(f"{contract.symbol}{self.ticker_suffix}")
+        self._slots[contract.conId] = slot
+        self._cum_volume.append(NAN)
+        for s in self.series:
+            s.grow(slot + 1)
+        return slot
+
+    # ---------- tick path ----------
+
+    def on_tickers(self, tickers: Iterable[Any], now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        slots = self._slots
+        cum = self._cum_volume
+        for t in tickers:
+            price = t.last
+            if price is None or price != price:
+                continue
+            c = t.contract
+            slot = slots.get(c.conId)
+            if slot is None:
+                slot = self._slot(c)
+            dv = 0.0
+            vol = t.volume
+            if vol == vol and vol is not None:
+                prev = cum[slot]
+                if prev == prev and vol > prev:
+                    dv = vol - prev
+                cum[slot] = vol
+            for s in self.series:
+                start = int(now // s.interval) * s.interval
+                if s.start[slot] != start:
+                    if s.start[slot] >= 0:
+                        self._emit(s, slot)
+                    s.start[slot] = start
+                    s.o[slot] = s.h[slot] = s.l[slot] = s.c[slot] = price
+                    s.v[slot] = dv
+                else:
+                    if price > s.h[slot]:
+                        s.h[slot] = price
+                    elif price < s.l[slot]:
+                        s.l[slot] = price
+                    s.c[slot] = price
+                    s.v[slot] += dv
+
+    def _emit(self, s: _Series, slot: int) -> None:
+        buf = s.buf
+        i = buf.n
+        buf.start[i] = s.start[slot]
+        buf.sym[i] = slot
+        buf.open[i] = s.o[slot]
+        buf.high[i] = s.h[slot]
+        buf.low[i] = s.l[slot]
+        buf.close[i] = s.c[slot]
+        buf.volume[i] = s.v[slot]
+        buf.n = i + 1
+        if buf.n == buf.capacity:
+            self._hand_off(s)
+
+    # ---------- flushing ----------
+
+    def _hand_off(self, s: _Series) -> None:
+        buf = s.buf
+        if buf.n == 0:
+            return
+        s.buf = self._new_buffer()
+        self._seq += 1
+        names = list(self.tickers)
+        fut = self._writer.submit(self._write, s.label, buf, names, self._seq)
+        self._pending.append(fut)
+
+    def flush(self, now: Optional[float] = None, close_open: bool = False) -> None:
+        """
+        Close bars whose interval has ended (all open bars if `close_open`)
+        and queue every completed bar for writing.
+        """
+        now = time.time() if now is None else now
+        for s in self.series:
+            cutoff = now - s.interval
+            for slot in range(len(s.start)):
+                start = s.start[slot]
+                if start >= 0 and (close_open or start <= cutoff):
+                    self._emit(s, slot)
+                    s.start[slot] = -1
+            self._hand_off(s)
+        self._reap()
+
+    async def run(self, flush_seconds: float = 30.0) -> None:
+        while True:
+            await asyncio.sleep(flush_seconds)
+            self.flush()
+
+    def _reap(self) -> None:
+        still: List[Future] = []
+        for fut in self._pending:
+            if not fut.done():
+                still.append(fut)
+            elif fut.exception() is not None:
+                log.warn(f"Bar flush failed: {fut.exception()}")
+        self._pending = still
+
+    def _write(self, label: str, buf: _BarBuffer, names: List[str], seq: int) -> None:
+        """
+        Writer thread: turn one buffer into Parquet files (one per UTC day).
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        try:
+            n = buf.n
+            start = np.frombuffer(buf.start, dtype=np.int64, count=n)
+            days = start // 86400
+            for day in np.unique(days):
+                idx = np.nonzero(days == day)[0]
+                ts = pa.array(start[idx], type=pa.timestamp("s"))
+                close = pa.array(np.frombuffer(buf.close, dtype=np.float64, count=n)[idx])
+                table = pa.table({
+                    "date": pc.strftime(ts, format="%Y-%m-%d %H:%M:%S"),
+                    "open": pa.array(np.frombuffer(buf.open, dtype=np.float64, count=n)[idx]),
+                    "high": pa.array(np.frombuffer(buf.high, dtype=np.float64, count=n)[idx]),
+                    "low": pa.array(np.frombuffer(buf.low, dtype=np.float64, count=n)[idx]),
+                    "close": close,
+                    "adjusted_close": close,
+                    "volume": pa.array(np.rint(np.frombuffer(buf.volume, dtype=np.float64, count=n)[idx]).astype(np.int64)),
+                    "ticker": pa.array(names, type=pa.string()).take(
+                        pa.array(np.frombuffer(buf.sym, dtype=np.int32, count=n)[idx])
+                    ),
+                })
+                date = time.strftime("%Y-%m-%d", time.gmtime(int(day) * 86400))
+                out = self.dir / label / date
+                out.mkdir(parents=True, exist_ok=True)
+                path = out / f"bars-{time.strftime('%H%M%S')}-{seq:06d}.parquet"
+                tmp = path.with_name(path.name + ".part")
+                pq.write_table(table, str(tmp))
+                tmp.replace(path)
+                self.files_written += 1
+            self.bars_written += n
+        finally:
+            self._release(buf)
+
+    def close(self) -> None:
+        """
+        Write everything, including bars still open, and stop the writer thread.
+        """
+        self.flush(close_open=True)
+        self._writer.shutdown(wait=True)
+        self._reap()
@@ -41,6 +41,17 @@ def load_config() -> Dict[str, Any]:
     ib_cfg = file_cfg.get("ib", {})
     discord_cfg = file_cfg.get("discord", {})
     defaults_cfg = file_cfg.get("defaults", {})
+    journal_cfg = file_cfg.get("journal", {})
+    reload_cfg = file_cfg.get("symbols_reload", {})
+    cache_cfg = file_cfg.get("contract_cache", {})
+    lines_cfg = file_cfg.get("market_data_lines", {})
+    shards_cfg = file_cfg.get("shards", {})
+    bars_cfg = file_cfg.get("bars", {})
+    signals_cfg = file_cfg.get("signals", {})
+    orders_cfg = file_cfg.get("orders", {})
+    snapshot_cfg = file_cfg.get("state_snapshot", {})
+    metrics_cfg = file_cfg.get("metrics", {})
+    logging_cfg = file_cfg.get("logging", {})
 
     merged: Dict[str, Any] = {
         "ib": {
@@ -48,15 +59,94 @@ def load_config() -> Dict[str, Any]:
             "port": int(os.getenv("IB_PORT", ib_cfg.get("port", 7497))),
             "clientId": int(os.getenv("IB_CLIENT_ID", ib_cfg.get("clientId", 1001))),
             "useDelayed": _env_bool("IB_USE_DELAYED", ib_cfg.get("useDelayed", False)),
+            # reconnect in-process with exponential backoff when the connection drops
+            "reconnect": _env_bool("IB_RECONNECT", ib_cfg.get("reconnect", True)),
+            "reconnect_max_backoff_seconds": float(ib_cfg.get("reconnect_max_backoff_seconds", 60)),
         },
         "discord": {
             "webhook_url": os.getenv("DISCORD_WEBHOOK_URL", discord_cfg.get("webhook_url", "")),
+            # bounded alert queue; batches beyond this are dropped, never block ticks
+            "queue_size": int(os.getenv("DISCORD_QUEUE_SIZE", discord_cfg.get("queue_size", 1000))),
         },
         "throttle_seconds": float(os.getenv("THROTTLE_SECONDS", file_cfg.get("throttle_seconds", 2))),
         "defaults": {
             "min_change_abs": float(os.getenv("DEFAULT_MIN_CHANGE_ABS", defaults_cfg.get("min_change_abs", 0.0))),
             "min_change_pct": float(os.getenv("DEFAULT_MIN_CHANGE_PCT", defaults_cfg.get("min_change_pct", 0.0))),
         },
+        # optional binary tick journal (replay with `python -m ibkr_price_watcher.replay`)
+        "journal": {
+            "enabled": _env_bool("TICK_JOURNAL_ENABLED", journal_cfg.get("enabled", False)),
+            "dir": os.getenv("TICK_JOURNAL_DIR", journal_cfg.get("dir", str(PROJECT_ROOT / "journal"))),
+            "max_mb": float(os.getenv("TICK_JOURNAL_MAX_MB", journal_cfg.get("max_mb", 256))),
+        },
+        # intraday OHLCV bars from the tick stream, flushed to Parquet off the event loop
+        "bars": {
+            "enabled": _env_bool("BARS_ENABLED", bars_cfg.get("enabled", False)),
+            "dir": os.getenv("BARS_DIR", bars_cfg.get("dir", str(PROJECT_ROOT / "bars"))),
+            "intervals": [int(i) for i in bars_cfg.get("intervals", [1, 60])],
+            "flush_seconds": float(bars_cfg.get("flush_seconds", 30)),
+            "buffer_rows": int(bars_cfg.get("buffer_rows", 65536)),
+            "ticker_suffix": bars_cfg.get("ticker_suffix", ".US"),
+        },
+        # pick up added/removed/edited symbol files without restarting
+        "symbols_reload": {
+            "enabled": _env_bool("SYMBOLS_RELOAD", reload_cfg.get("enabled", False)),
+            "interval_seconds": float(os.getenv("SYMBOLS_RELOAD_SECONDS", reload_cfg.get("interval_seconds", 2))),
+        },
+        # qualified-contract cache for fast startup; misses are qualified in chunks
+        "contract_cache": {
+            "enabled": _env_bool("CONTRACT_CACHE", cache_cfg.get("enabled", True)),
+            "path": os.getenv("CONTRACT_CACHE_PATH", cache_cfg.get("path", str(PROJECT_ROOT / "cache" / "contracts.json"))),
+            "ttl_hours": float(cache_cfg.get("ttl_hours", 168)),
+            "chunk_size": int(cache_cfg.get("chunk_size", 50)),
+            "chunk_pause_seconds": float(cache_cfg.get("chunk_pause_seconds", 1.0)),
+        },
+        # share the account's concurrent market-data lines across large universes
+        "market_data_lines": {
+            "max_lines": int(os.getenv("IB_MAX_LINES", lines_cfg.get("max_lines", 100))),
+            "reserve_lines": int(lines_cfg.get("reserve_lines", 20)),
+            "mode": os.getenv("IB_LINES_MODE", lines_cfg.get("mode", "rotate")),
+            "dwell_seconds": float(lines_cfg.get("dwell_seconds", 3)),
+            "report_seconds": float(lines_cfg.get("report_seconds", 60)),
+        },
+        # count > 1 runs one watcher process per shard, clientIds ib.clientId + 0..count-1
+        "shards": {
+            "count": int(os.getenv("WATCHER_SHARDS", shards_cfg.get("count", 1))),
+            "heartbeat_seconds": float(shards_cfg.get("heartbeat_seconds", 5)),
+            "heartbeat_timeout_seconds": float(shards_cfg.get("heartbeat_timeout_seconds", 30)),
+            "restart_backoff_seconds": float(shards_cfg.get("restart_backoff_seconds", 1)),
+            "max_backoff_seconds": float(shards_cfg.get("max_backoff_seconds", 60)),
+            "report_seconds": float(shards_cfg.get("report_seconds", 60)),
+        },
+        # signal providers declared by strategy files in the symbols dir
+        "signals": {
+            "enabled": _env_bool("SIGNALS_ENABLED", signals_cfg.get("enabled", True)),
+            "state_dir": os.getenv("SIGNALS_STATE_DIR", signals_cfg.get("state_dir", str(PROJECT_ROOT / "cache" / "signals"))),
+        },
+        # place_order rules only send real orders when this is switched on;
+        # otherwise their decisions are logged as in a strategy's backtest_mode
+        "orders": {
+            "enabled": _env_bool("ORDERS_ENABLED", orders_cfg.get("enabled", False)),
+        },
+        # last-sent prices/times saved periodically and on disconnect, restored at startup
+        "state_snapshot": {
+            "enabled": _env_bool("STATE_SNAPSHOT", snapshot_cfg.get("enabled", True)),
+            "dir": os.getenv("STATE_SNAPSHOT_DIR", snapshot_cfg.get("dir", str(PROJECT_ROOT / "cache" / "watcher_state"))),
+            "interval_seconds": float(snapshot_cfg.get("interval_seconds", 5)),
+            "max_age_seconds": float(snapshot_cfg.get("max_age_seconds", 900)),
+        },
+        # counters/histograms (tick batches, on_tick time, alert queue lag) on a local
+        # Prometheus endpoint (shard N on port + 1 + N, 0 = off) and/or a JSON file
+        "metrics": {
+            "enabled": _env_bool("METRICS_ENABLED", metrics_cfg.get("enabled", False)),
+            "port": int(os.getenv("METRICS_PORT", metrics_cfg.get("port", 9108))),
+            "json_path": os.getenv("METRICS_JSON", metrics_cfg.get("json_path", "")),
+            "json_interval_seconds": float(metrics_cfg.get("json_interval_seconds", 15)),
+        },
+        # console log written from a background thread; "text" or "json" lines
+        "logging": {
+            "format": os.getenv("LOG_FORMAT", logging_cfg.get("format", "text")),
+        },
         # allow overriding symbols dir via env; default to PROJECT_ROOT/symbols
         "paths": {
             "symbols_dir": os.getenv("SYMBOLS_DIR", str(PROJECT_ROOT / "symbols")),
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from . import log
+
+if TYPE_CHECKING:
+    import requests
+
+# Default API roots per "source" in signal_providers.congress_trades.
+SOURCES = {"quiverquant": "https://api.quiverquant.com/beta/live"}
+
+# Canonical record fields; a strategy's "fields" block maps them to feed columns.
+FIELDS = (
+    "actor", "ticker", "transaction_type", "transaction_date", "reported_date",
+    "amount_low", "amount_high", "chamber",
+)
+_DATE_FIELDS = ("transaction_date", "reported_date")
+_AMOUNT_FIELDS = ("amount_low", "amount_high")
+
+
+# ---------- records ----------
+
+def normalize_record(raw: Dict[str, Any], fields: Dict[str, str], normalize: bool = True) -> Dict[str, Any]:
+    """
+    Canonical record from one feed row: renamed through `fields`, and with
+    `normalize` also trimmed strings, upper-case tickers, ISO dates and float
+    amounts.
+    """
+    rec = {name: raw.get(fields.get(name, name)) for name in FIELDS}
+    if not normalize:
+        return rec
+    for k, v in rec.items():
+        if isinstance(v, str):
+            rec[k] = v.strip()
+    if rec["ticker"]:
+        rec["ticker"] = str(rec["ticker"]).upper()
+    for k in _DATE_FIELDS:
+        if rec[k]:
+            rec[k] = str(rec[k])[:10]
+    for k in _AMOUNT_FIELDS:
+        try:
+            rec[k] = float(str(rec[k]).replace("$", "").replace(",", "")) if rec[k] not in (None, "") else None
+        except ValueError:
+            rec[k] = None
+    return rec
+
+
+class DedupIndex:
+    """
+    Seen-record index: a 64-bit hash of the `key_fields` values per record,
+    evicted `lookback` seconds after it was first seen unless the record's
+    reported_date is still on or after the polling cursor (the feed returns
+    those again on every poll). Lookups are O(1); eviction pops from the
+    front of an insertion-ordered deque, so a large backfill costs O(n) overall.
+    """
+
+    def __init__(self, key_fields: Iterable[str], lookback: float):
+        self.key_fields = tuple(key_fields)
+        self.lookback = lookback
+        self.seen: Dict[int, float] = {}
+        self.reported: Dict[int, str] = {}
+        self._order: Deque[Tuple[float, int]] = deque()
+
+    def key(self, rec: Dict[str, Any]) -> int:
+        raw = "\x1f".join(str(rec.get(f, "")).lower() for f in self.key_fields)
+        return int.from_bytes(hashlib.blake2b(raw.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def add(self, rec: Dict[str, Any], now: float) -> bool:
+        """
+        Record `rec`; returns False if it was already seen within the lookback.
+        """
+        k = self.key(rec)
+        if k in self.seen:
+            return False
+        self.seen[k] = now
+        self.reported[k] = str(rec.get("reported_date") or "")
+        self._order.append((now, k))
+        return True
+
+    def evict(self, now: float, keep_from: Optional[str] = None) -> None:
+        """
+        Drop keys first seen more than `lookback` ago, except those reported
+        on or after `keep_from` (or without a reported date), which the feed
+        can still return; they are re-stamped and checked again later.
+        """
+        cutoff = now - self.lookback
+        order, seen, reported = self._order, self.seen, self.reported
+        while order and order[0][0] < cutoff:
+            _, k = order.popleft()
+            if seen.get(k, now) >= cutoff:
+                continue
+            r = reported.get(k, "")
+            if keep_from is not None and (not r or r >= keep_from):
+                seen[k] = now
+                order.append((now, k))
+                continue
+            del seen[k]
+            reported.pop(k, None)
+
+    def __len__(self) -> int:
+        return len(self.seen)
+
+    def to_state(self) -> List[List[Any]]:
+        return [[k, ts, self.reported.get(k, "")] for ts, k in self._order]
+
+    def load_state(self, items: Iterable[Iterable[Any]]) -> None:
+        for k, ts, *rest in items:
+            self.seen[int(k)] = float(ts)
+            self.reported[int(k)] = str(rest[0]) if rest else ""
+            self._order.append((float(ts), int(k)))
+
+
+# ---------- rules ----------
+
+def compile_predicate(p: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    """
+    One {"field", "op", "value"} predicate as a closure, with its constant
+    prepared once (lower-cased needle for icontains, frozenset for in).
+    """
+    field = p["field"]
+    op = str(p.get("op", "eq")).lower()
+    value = p.get("value")
+    if op == "eq":
+        return lambda r: r.get(field) == value
+    if op == "ne":
+        return lambda r: r.get(field) != value
+    if op == "in":
+        members = frozenset(value or ())
+        return lambda r: r.get(field) in members
+    if op == "not_in":
+        members = frozenset(value or ())
+        return lambda r: r.get(field) not in members
+    if op == "icontains":
+        needle = str(value).lower()
+        return lambda r: needle in str(r.get(field) or "").lower()
+    if op in ("gte", "lte", "gt", "lt"):
+        bound = float(value)
+        cmp = {
+            "gte": lambda x: x >= bound, "lte": lambda x: x <= bound,
+            "gt": lambda x: x > bound, "lt": lambda x: x < bound,
+        }[op]
+        return lambda r: r.get(field) is not None and cmp(float(r[field]))
+    raise ValueError(f"unknown op '{op}'")
+
+
+def compile_when(when: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    if "all" in when:
+        preds = tuple(compile_predicate(p) if "field" in p else compile_when(p) for p in when["all"])
+        return lambda r: all(f(r) for f in preds)
+    if "any" in when:
+        preds = tuple(compile_predicate(p) if "field" in p else compile_when(p) for p in when["any"])
+        return lambda r: any(f(r) for f in preds)
+    return compile_predicate(when)
+
+
+def _ticker_constraint(when: Dict[str, Any]) -> Optional[frozenset]:
+    """
+    Tickers a rule can match, if its top-level "all" pins the ticker field.
+    """
+    for p in when.get("all", ()):
+        if p.get("field") == "ticker":
+            op = str(p.get("op", "eq")).lower()
+            if op == "eq":
+                return frozenset([str(p.get("value")).upper()])
+            if op == "in":
+                return frozenset(str(v).upper() for v in p.get("value") or ())
+    return None
+
+
+class StrategyRule:
+    __slots__ = ("name", "match", "then", "tickers")
+
+    def __init__(self, name: str, match: Callable[[Dict[str, Any]], bool], then: Dict[str, Any], tickers: Optional[frozenset]):
+        self.name = name
+        self.match = match
+        self.then = then
+        self.tickers = tickers
+
+
+class RuleIndex:
+    """
+    Strategy rules indexed by the ticker they pin, so a record is only tested
+    against rules that can match it.
+    """
+
+    def __init__(self, rules: List[StrategyRule]):
+        self.rules = rules
+        self.by_ticker: Dict[str, List[StrategyRule]] = {}
+        self.wildcard: List[StrategyRule] = []
+        for r in rules:
+            if r.tickers is None:
+                self.wildcard.append(r)
+            else:
+                for t in r.tickers:
+                    self.by_ticker.setdefault(t, []).append(r)
+
+    def matches(self, rec: Dict[str, Any]) -> List[StrategyRule]:
+        cands = self.by_ticker.get(rec.get("ticker") or "", ())
+        out = [r for r in cands if r.match(rec)]
+        out.extend(r for r in self.wildcard if r.match(rec))
+        return out
+
+
+def compile_strategy_rules(name: str, strategy: Dict[str, Any]) -> RuleIndex:
+    rules: List[StrategyRule] = []
+    for i, r_cfg in enumerate(strategy.get("rules") or []):
+        r_name = str(r_cfg.get("name", f"rule {i + 1}"))
+        when = r_cfg.get("when") or {}
+        try:
+            rules.append(StrategyRule(r_name, compile_when(when), r_cfg.get("then") or {}, _ticker_constraint(when)))
+        except (KeyError, TypeError, ValueError) as e:
+            log.warn(f"{name}: skipping rule '{r_name}': {e}")
+    return RuleIndex(rules)
+
+
+# ---------- provider ----------
+
+class Signal:
+    __slots__ = ("strategy", "rule", "record")
+
+    def __init__(self, strategy: str, rule: StrategyRule, record: Dict[str, Any]):
+        self.strategy = strategy
+        self.rule = rule
+        self.record = record
+
+    def describe(self) -> str:
+        r = self.record
+        action = self.rule.then.get("action", "")
+        return (
+            f"🏛️ **{r.get('actor')}** {r.get('transaction_type')} **{r.get('ticker')}** "
+            f"(traded {r.get('transaction_date')}, reported {r.get('reported_date')}) "
+            f"→ {self.strategy} rule **{self.rule.name}** ({action})"
+        )
+
+
+class CongressTradesProvider:
+    """
+    Polls a congress-trades feed for one strategy file.
+
+    Each poll asks only for records reported since the cursor (the newest
+    reported_date seen, inclusive); the first poll goes back `since_days`
+    and, unless `signal_backfill` is set, only primes the index.
+    New records pass the hashed dedup index, then the ticker-indexed rules;
+    matches become Signals, subject to the per-symbol cooldown. Cursor and
+    dedup keys persist in `state_path`, so a restart does not replay them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        strategy_cfg: Dict[str, Any],
+        state_path: str | Path,
+        base_url: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        timeout: float = 30.0,
+    ):
+        p_cfg = strategy_cfg["signal_providers"]["congress_trades"]
+        self.name = name
+        self.source = str(p_cfg.get("source", "quiverquant"))
+        self.base_url = (base_url or p_cfg.get("base_url") or SOURCES.get(self.source, "")).rstrip("/")
+        if not self.base_url:
+            raise ValueError(f"{name}: no base_url for source '{self.source}'")
+        self.endpoint = str(p_cfg.get("endpoint", "congresstrading")).strip("/")
+        key_env = p_cfg.get("api_key_env")
+        self.api_key = os.getenv(key_env, "") if key_env else ""
+        if key_env and not self.api_key:
+            raise ValueError(f"${key_env} is not set")
+        self.poll_interval = float(p_cfg.get("poll_interval_sec", 300))
+        self.since_days = int(p_cfg.get("since_days", 30))
+        self.cursor_param = str(p_cfg.get("cursor_param", "since"))
+        self.fields: Dict[str, str] = dict(p_cfg.get("fields") or {})
+        self.normalize = bool(p_cfg.get("normalize", True))
+        # the first poll only primes cursor + dedup unless backfill should trade
+        self.signal_backfill = bool(p_cfg.get("signal_backfill", False))
+        d_cfg = strategy_cfg.get("dedup") or {}
+        self.dedup_enabled = bool(d_cfg.get("enabled", True))
+        self.dedup = DedupIndex(
+            d_cfg.get("key_fields") or ("actor", "ticker", "transaction_date", "transaction_type"),
+            float(d_cfg.get("lookback_hours", 240)) * 3600,
+        )
+        strategy = strategy_cfg.get("strategy") or {}
+        self.rules = compile_strategy_rules(name, strategy)
+        self.cooldown = float((strategy.get("cooldown") or {}).get("per_symbol_minutes", 0)) * 60
+        self.backtest_mode = bool(strategy_cfg.get("backtest_mode", False))
+        self.state_path = Path(state_path)
+        if session is None:
+            import requests
+
+            session = requests.Session()
+        self.session = session
+        self.timeout = timeout
+        self.cursor: Optional[str] = None
+        self._last_fire: Dict[str, float] = {}
+        self.stats = {"polls": 0, "records": 0, "new": 0, "signals": 0, "cooldown": 0, "errors": 0}
+        self._load_state()
+
+    # ---------- state ----------
+
+    def _load_state(self) -> None:
+        if not self.state_path.exists():
+            return
+        try:
+            st = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            log.warn(f"{self.name}: ignoring unreadable state {self.state_path}: {e}")
+            return
+        self.cursor = st.get("cursor")
+        self.dedup.load_state(st.get("seen") or [])
+        self._last_fire = {k: float(v) for k, v in (st.get("last_fire") or {}).items()}
+
+    def save_state(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.parent / (self.state_path.name + ".tmp")
+        tmp.write_text(json.dumps({
+            "cursor": self.cursor, "seen": self.dedup.to_state(), "last_fire": self._last_fire,
+        }), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    # ---------- polling ----------
+
+    def since(self, today: Optional[dt.date] = None) -> str:
+        if self.cursor:
+            return self.cursor
+        today = today or dt.date.today()
+        return (today - dt.timedelta(days=self.since_days)).isoformat()
+
+    def fetch(self, since: str) -> List[Dict[str, Any]]:
+        headers = {"Accept": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        resp = self.session.get(
+            f"{self.base_url}/{self.endpoint}", params={self.cursor_param: since}, headers=headers, timeout=self.timeout
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        return data if isinstance(data, list) else data.get("data", [])
+
+    def process(
+        self, rows: Iterable[Dict[str, Any]], since: str, now: Optional[float] = None, emit: bool = True
+    ) -> List[Signal]:
+        """
+        Normalize, dedup and match one batch of feed rows; advances the cursor.
+        With `emit` False the rows only prime the index and cooldowns are untouched.
+        """
+        now = time.time() if now is None else now
+        self.dedup.evict(now, keep_from=since)
+        fresh: List[Dict[str, Any]] = []
+        cursor = self.cursor or since
+        for raw in rows:
+            self.stats["records"] += 1
+            rec = normalize_record(raw, self.fields, self.normalize)
+            reported = rec.get("reported_date") or ""
+            if reported and reported < since:
+                continue  # the feed ignored the cursor parameter
+            if self.dedup_enabled and not self.dedup.add(rec, now):
+                continue
+            if reported > cursor:
+                cursor = reported
+            fresh.append(rec)
+        self.cursor = cursor
+        self.stats["new"] += len(fresh)
+
+        if not emit:
+            return []
+        fresh.sort(key=lambda r: (r.get("reported_date") or "", r.get("transaction_date") or ""))
+        signals: List[Signal] = []
+        for rec in fresh:
+            for rule in self.rules.matches(rec):
+                sym = str(rule.then.get("order", {}).get("symbol") or rec.get("ticker") or "")
+                if self.cooldown and now - self._last_fire.get(sym, -self.cooldown) < self.cooldown:
+                    self.stats["cooldown"] += 1
+                    continue
+                self._last_fire[sym] = now
+                signals.append(Signal(self.name, rule, rec))
+        self.stats["signals"] += len(signals)
+        return signals
+
+    def poll(self) -> List[Signal]:
+        """
+        One fetch + process + state save; blocking, run it off the event loop.
+        """
+        since = self.since()
+        emit = self.cursor is not None or self.signal_backfill
+        rows = self.fetch(since)
+        signals = self.process(rows, since, emit=emit)
+        if not emit:
+            log.info(f"{self.name}: primed with {len(self.dedup)} records reported since {since}")
+        self.stats["polls"] += 1
+        self.save_state()
+        return signals
+
+    async def run(self, on_signal: Callable[[Signal], None]) -> None:
+        loop = asyncio.get_running_loop()
+        mode = " (backtest mode: signals are logged only)" if self.backtest_mode else ""
+        log.info(f"{self.name}: polling {self.base_url}/{self.endpoint} every {self.poll_interval:g}s{mode}")
+        while True:
+            try:
+                signals = await loop.run_in_executor(None, self.poll)
+                for s in signals:
+                    on_signal(s)
+            except Exception as e:
+                self.stats["errors"] += 1
+                log.warn(f"{self.name}: poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from . import log
+
+if TYPE_CHECKING:
+    from ib_insync import Contract
+
+# Symbol-file fields that identify the IB contract; changing any of them
+# means the subscription has to be replaced, not just retuned.
+CONTRACT_FIELDS = ("symbol", "secType", "exchange", "currency")
+
+
+def build_contract(sym: str, s_cfg: Dict[str, Any]) -> Contract:
+    """
+    Unqualified IB contract for one symbol file.
+    """
+    from ib_insync import Contract, Stock
+
+    if s_cfg.get("secType", "STK").upper() == "STK":
+        return Stock(symbol=sym, exchange=s_cfg.get("exchange", "SMART"), currency=s_cfg.get("currency", "USD"))
+    c = Contract()
+    c.symbol = sym
+    c.secType = s_cfg.get("secType", "STK")
+    c.exchange = s_cfg.get("exchange", "SMART")
+    c.currency = s_cfg.get("currency", "USD")
+    return c
+
+
+def contract_key(sym: str, s_cfg: Dict[str, Any]) -> tuple:
+    defaults = {"secType": "STK", "exchange": "SMART", "currency": "USD"}
+    return (sym, *(str(s_cfg.get(f, defaults[f])).upper() for f in CONTRACT_FIELDS[1:]))
+
+
+def _cache_key(sym: str, s_cfg: Dict[str, Any]) -> str:
+    return "|".join(contract_key(sym, s_cfg))
+
+
+# Contract fields worth keeping from a qualified contract.
+_CACHED_FIELDS = ("conId", "symbol", "secType", "exchange", "primaryExchange", "currency", "localSymbol", "tradingClass")
+
+
+class ContractCache:
+    """
+    On-disk cache of qualified contracts keyed by the symbol-file fields
+    symbol/secType/exchange/currency. Cached entries are used immediately at
+    startup; entries older than `ttl` seconds are re-qualified in the background.
+    """
+
+    def __init__(self, path: str | Path, ttl: float = 7 * 24 * 3600):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception as e:
+                log.warn(f"Ignoring unreadable contract cache {self.path}: {e}")
+
+    def get(self, sym: str, s_cfg: Dict[str, Any]) -> Optional[Contract]:
+        e = self.entries.get(_cache_key(sym, s_cfg))
+        if not e or not e.get("conId"):
+            return None
+        from ib_insync import Contract
+
+        return Contract(**{f: e[f] for f in _CACHED_FIELDS if f in e})
+
+    def is_stale(self, sym: str, s_cfg: Dict[str, Any], now: Optional[float] = None) -> bool:
+        e = self.entries.get(_cache_key(sym, s_cfg))
+        return e is None or ((now or time.time()) - float(e.get("ts", 0))) > self.ttl
+
+    def put(self, sym: str, s_cfg: Dict[str, Any], contract: Contract) -> None:
+        e = {f: getattr(contract, f) for f in _CACHED_FIELDS}
+        e["ts"] = time.time()
+        self.entries[_cache_key(sym, s_cfg)] = e
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # merge with what other processes (watcher shards) saved meanwhile
+        if self.path.exists():
+            try:
+                on_disk = json.loads(self.path.read_text(encoding="utf-8"))
+                for k, e in on_disk.items():
+                    if float(e.get("ts", 0)) > float(self.entries.get(k, {}).get("ts", 0)):
+                        self.entries[k] = e
+            except Exception:
+                pass
+        tmp = self.path.parent / f"{self.path.name}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(self.entries, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+async def qualify_chunked(
+    ib: Any, contracts: List[Contract], chunk_size: int = 50, pause: float = 1.0
+) -> List[Contract]:
+    """
+    qualifyContractsAsync in chunks with a pause in between, to stay under
+    IB's request pacing limits with large universes.
+    """
+    out: List[Contract] = []
+    for i in range(0, len(contracts), max(1, chunk_size)):
+        if i:
+            await asyncio.sleep(pause)
+        out.extend(await ib.qualifyContractsAsync(*contracts[i:i + chunk_size]))
+    return out
+
+
+async def resolve_contracts(
+    ib: Any,
+    symbols: Dict[str, Dict[str, Any]],
+    cache: Optional[ContractCache] = None,
+    chunk_size: int = 50,
+    pause: float = 1.0,
+) -> List[Contract]:
+    """
+    Qualified contracts for `symbols`: cache hits are returned as-is, misses
+    are qualified in pacing-aware chunks and written back to the cache.
+    """
+    hits: List[Contract] = []
+    misses: Dict[str, Dict[str, Any]] = {}
+    for sym, s_cfg in symbols.items():
+        c = cache.get(sym, s_cfg) if cache is not None else None
+        if c is not None:
+            hits.append(c)
+        else:
+            misses[sym] = s_cfg
+    qualified = await qualify_chunked(
+        ib, [build_contract(s, c) for s, c in misses.items()], chunk_size, pause
+    )
+    if cache is not None and qualified:
+        for c in qualified:
+            if c.symbol in misses:
+                cache.put(c.symbol, misses[c.symbol], c)
+        cache.save()
+    if cache is not None:
+        log.info(f"Contracts: {len(hits)} from cache, {len(qualified)}/{len(misses)} qualified")
+    return hits + qualified
+
+
+async def refresh_cache(
+    ib: Any,
+    symbols: Dict[str, Dict[str, Any]],
+    cache: ContractCache,
+    chunk_size: int = 50,
+    pause: float = 1.0,
+) -> None:
+    """
+    Background task: re-qualify cached contracts past their TTL.
+    """
+    stale = {s: c for s, c in symbols.items() if cache.is_stale(s, c)}
+    if not stale:
+        return
+    qualified = await qualify_chunked(ib, [build_contract(s, c) for s, c in stale.items()], chunk_size, pause)
+    for c in qualified:
+        s_cfg = stale.get(c.symbol)
+        if s_cfg is None:
+            continue
+        old = cache.get(c.symbol, s_cfg)
+        if old is not None and old.conId != c.conId:
+            log.warn(f"{c.symbol}: conId changed {old.conId} -> {c.conId}; restart to resubscribe")
+        cache.put(c.symbol, s_cfg, c)
+    cache.save()
+    log.info(f"Contract cache refreshed: {len(qualified)}/{len(stale)}")
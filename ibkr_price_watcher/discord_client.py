@@ -1,19 +1,182 @@
 from __future__ import annotations
 
-from typing import Optional
-import requests
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-def post_discord(webhook_url: str, content: str, username: Optional[str] = None) -> None:
+from . import log
+from .metrics import REGISTRY
+
+if TYPE_CHECKING:
+    import requests
+
+# Discord rejects message content longer than this.
+DISCORD_MAX_CONTENT = 2000
+
+
+class AlertDispatcher:
+    """
+    Background Discord sender so alert production never blocks the tick loop.
+
+    `submit()` only does a non-blocking put onto a bounded queue; a worker thread
+    drains everything queued, packs lines into as few messages as Discord's size
+    limit allows, and posts them over one pooled session, honouring 429
+    `retry_after`. When the queue is full the batch is dropped and counted.
+    Batches carry their submit time, so the worker records queue lag.
+    """
+
+    def __init__(
+        self,
+        webhook_url: str,
+        username: Optional[str] = None,
+        max_queue: int = 1000,
+        max_attempts: int = 5,
+        timeout: float = 10.0,
+    ):
+        self.webhook_url = webhook_url
+        self.username = username
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._q: "queue.Queue[Optional[Tuple[float, List[str]]]]" = queue.Queue(maxsize=max_queue)
+        import requests
+
+        self._session = requests.Session()
+        self._thread: Optional[threading.Thread] = None
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._lag = REGISTRY.histogram("alert_queue_lag_seconds", "Time alert batches wait before the Discord worker takes them")
+        REGISTRY.gauge("alert_queue_depth", lambda: self.queue_depth, "Alert batches waiting for the Discord worker")
+        for name, help in (
+            ("sent", "Discord messages posted"),
+            ("dropped", "Alert lines dropped on a full queue"),
+            ("failed", "Discord messages given up on"),
+        ):
+            REGISTRY.gauge(f"alerts_{name}_total", lambda n=name: getattr(self, n), help, kind="counter")
+
+    # ---------- producer side (tick loop) ----------
+
+    def submit(self, lines: List[str]) -> bool:
+        """
+        Queue one batch of alert lines. Never blocks; returns False if dropped.
+        """
+        if not lines:
+            return True
+        try:
+            self._q.put_nowait((time.monotonic(), list(lines)))
+            return True
+        except queue.Full:
+            self.dropped += len(lines)
+            return False
+
+    @property
+    def queue_depth(self) -> int:
+        return self._q.qsize()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queue_depth": self.queue_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> "AlertDispatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="discord-alerts", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Stop the worker after it has sent what is already queued.
+        """
+        if self._thread is None:
+            return
+        try:
+            self._q.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+        self._session.close()
+
+    # ---------- worker ----------
+
+    def _drain(self, first: Tuple[float, List[str]]) -> tuple[List[str], bool]:
+        now = time.monotonic()
+        self._lag.observe(now - first[0])
+        lines = list(first[1])
+        stop = False
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            self._lag.observe(now - item[0])
+            lines.extend(item[1])
+        return lines, stop
+
+    @staticmethod
+    def _pack(lines: List[str]) -> List[str]:
+        messages: List[str] = []
+        cur = ""
+        for line in lines:
+            line = line[:DISCORD_MAX_CONTENT]
+            if cur and len(cur) + 1 + len(line) > DISCORD_MAX_CONTENT:
+                messages.append(cur)
+                cur = line
+            else:
+                cur = f"{cur}\n{line}" if cur else line
+        if cur:
+            messages.append(cur)
+        return messages
+
+    def _run(self) -> None:
+        while True:
+            first = self._q.get()
+            if first is None:
+                return
+            lines, stop = self._drain(first)
+            for content in self._pack(lines):
+                self._post(content)
+            if stop:
+                return
+
+    def _post(self, content: str) -> None:
+        payload: Dict[str, Any] = {"content": content}
+        if self.username:
+            payload["username"] = self.username
+        for _ in range(self.max_attempts):
+            try:
+                r = self._session.post(self.webhook_url, json=payload, timeout=self.timeout)
+                if r.status_code == 429:
+                    time.sleep(_retry_after(r))
+                    continue
+                r.raise_for_status()
+                self.sent += 1
+                return
+            except Exception as e:
+                log.warn(f"Discord webhook failed: {e}")
+                break
+        self.failed += 1
+
+
+def _retry_after(resp: requests.Response) -> float:
     """
-    Post a simple text message to a Discord webhook.
+    Seconds to wait after a Discord 429 (JSON `retry_after`, else the header).
     """
-    if not webhook_url:
-        return
-    payload = {"content": content}
-    if username:
-        payload["username"] = username
     try:
-        r = requests.post(webhook_url, json=payload, timeout=10)
-        r.raise_for_status()
-    except Exception as e:
-        print(f"[WARN] Discord webhook failed: {e}")
+        return max(0.0, float(resp.json().get("retry_after")))
+    except Exception:
+        pass
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", 1.0)))
+    except Exception:
+        return 1.0
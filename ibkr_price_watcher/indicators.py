@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import math
+from abc import ABC, abstractmethod
+from array import array
+from typing import Any, Dict, List, Optional
+
+from . import log
+
+# A symbol file declares named indicators, which its rules can then reference:
+#
+#   "indicators": {
+#       "vwap5m":  {"type": "vwap", "window": "5m"},
+#       "ema20":   {"type": "ema", "span": 20},           # ticks; or "halflife": "1m"
+#       "high30m": {"type": "high", "window": "30m"},
+#       "low30m":  {"type": "low", "window": "30m"},
+#       "vol5m":   {"type": "volatility", "window": "5m"}
+#   }
+#
+# Windowed indicators keep a fixed ring of `buckets` time buckets (default 120,
+# so a 5m window has 2.5s resolution); every update is O(1) and nothing is
+# recomputed over the window.
+
+DEFAULT_BUCKETS = 120
+_UNITS = {"s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(v: Any) -> float:
+    """
+    Seconds from a number or a string like "30s", "5m", "1h".
+    """
+    if isinstance(v, (int, float)):
+        return float(v)
+    s = str(v).strip().lower()
+    if s and s[-1] in _UNITS:
+        return float(s[:-1]) * _UNITS[s[-1]]
+    return float(s)
+
+
+class EMA:
+    """
+    Exponential moving average, per tick (`span`) or per time (`halflife`).
+    """
+
+    __slots__ = ("alpha", "halflife", "value", "_t")
+
+    def __init__(self, span: Optional[float] = None, halflife: Optional[float] = None):
+        if not span and not halflife:
+            raise ValueError("ema needs 'span' or 'halflife'")
+        self.alpha = 2.0 / (float(span) + 1.0) if span else 0.0
+        self.halflife = halflife
+        self.value: Optional[float] = None
+        self._t = 0.0
+
+    def update(self, now: float, price: float, volume: float) -> None:
+        v = self.value
+        if v is None:
+            self.value = price
+        elif self.halflife:
+            self.value = v + (1.0 - 0.5 ** ((now - self._t) / self.halflife)) * (price - v)
+        else:
+            self.value = v + self.alpha * (price - v)
+        self._t = now
+
+
+class _Buckets(ABC):
+    """
+    Ring of `n` time buckets covering `window` seconds. `_slot(now)` returns
+    the ring index for `now`, clearing (via `_clear`) every bucket that fell
+    out of the window since the last update.
+    """
+
+    __slots__ = ("n", "width", "cur")
+
+    def __init__(self, window: float, buckets: int):
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.n = max(1, int(buckets))
+        self.width = window / self.n
+        self.cur = -1  # absolute index of the newest bucket
+
+    def _slot(self, now: float) -> int:
+        b = int(now // self.width)
+        cur = self.cur
+        if b > cur:
+            if cur < 0 or b - cur >= self.n:
+                for i in range(self.n):
+                    self._clear(i)
+            else:
+                for k in range(cur + 1, b + 1):
+                    self._clear(k % self.n)
+            self.cur = b
+        return self.cur % self.n
+
+    @abstractmethod
+    def _clear(self, i: int) -> None:
+        ...
+
+
+class VWAP(_Buckets):
+    """
+    Rolling volume-weighted average price. Falls back to the plain average
+    price when the window saw no volume (e.g. delayed data without sizes).
+    """
+
+    __slots__ = ("pv", "vol", "px", "cnt", "t_pv", "t_vol", "t_px", "t_cnt", "value")
+
+    def __init__(self, window: float, buckets: int = DEFAULT_BUCKETS):
+        super().__init__(window, buckets)
+        self.pv = array("d", bytes(8 * self.n))
+        self.vol = array("d", bytes(8 * self.n))
+        self.px = array("d", bytes(8 * self.n))
+        self.cnt = array("d", bytes(8 * self.n))
+        self.t_pv = self.t_vol = self.t_px = self.t_cnt = 0.0
+        self.value: Optional[float] = None
+
+    def _clear(self, i: int) -> None:
+        self.t_pv -= self.pv[i]
+        self.t_vol -= self.vol[i]
+        self.t_px -= self.px[i]
+        self.t_cnt -= self.cnt[i]
+        self.pv[i] = self.vol[i] = self.px[i] = self.cnt[i] = 0.0
+
+    def update(self, now: float, price: float, volume: float) -> None:
+        i = self._slot(now)
+        self.pv[i] += price * volume
+        self.vol[i] += volume
+        self.px[i] += price
+        self.cnt[i] += 1.0
+        self.t_pv += price * volume
+        self.t_vol += volume
+        self.t_px += price
+        self.t_cnt += 1.0
+        if self.t_vol > 1e-9:
+            self.value = self.t_pv / self.t_vol
+        else:
+            self.value = self.t_px / self.t_cnt if self.t_cnt >= 1.0 else None
+
+
+class RollingExtreme(_Buckets):
+    """
+    Rolling high (sign=1) or low (sign=-1) over the window, kept in a
+    monotonic deque of per-bucket extremes stored in a preallocated ring.
+    `prior` is the extreme before the latest price, for "new high" checks.
+    """
+
+    __slots__ = ("sign", "d_idx", "d_val", "head", "size", "value", "prior")
+
+    def __init__(self, window: float, buckets: int = DEFAULT_BUCKETS, sign: int = 1):
+        super().__init__(window, buckets)
+        self.sign = 1.0 if sign > 0 else -1.0
+        cap = self.n + 1
+        self.d_idx = array("q", bytes(8 * cap))
+        self.d_val = array("d", bytes(8 * cap))
+        self.head = 0
+        self.size = 0
+        self.value: Optional[float] = None
+        self.prior: Optional[float] = None
+
+    def _clear(self, i: int) -> None:
+        pass  # expiry is by bucket index in update()
+
+    def update(self, now: float, price: float, volume: float) -> None:
+        self._slot(now)
+        b = self.cur
+        cap = self.n + 1
+        d_idx, d_val = self.d_idx, self.d_val
+        # drop buckets that left the window
+        while self.size and d_idx[self.head] <= b - self.n:
+            self.head = (self.head + 1) % cap
+            self.size -= 1
+        self.prior = self.sign * d_val[self.head] if self.size else None
+
+        v = self.sign * price
+        tail = (self.head + self.size - 1) % cap
+        if not (self.size and d_idx[tail] == b and d_val[tail] >= v):
+            while self.size and d_val[(self.head + self.size - 1) % cap] <= v:
+                self.size -= 1
+            tail = (self.head + self.size) % cap
+            d_idx[tail] = b
+            d_val[tail] = v
+            self.size += 1
+        self.value = self.sign * d_val[self.head]
+
+
+class Volatility(_Buckets):
+    """
+    Rolling standard deviation of tick-to-tick log returns, in percent.
+    """
+
+    __slots__ = ("s1", "s2", "cnt", "t1", "t2", "tn", "last", "value")
+
+    def __init__(self, window: float, buckets: int = DEFAULT_BUCKETS):
+        super().__init__(window, buckets)
+        self.s1 = array("d", bytes(8 * self.n))
+        self.s2 = array("d", bytes(8 * self.n))
+        self.cnt = array("d", bytes(8 * self.n))
+        self.t1 = self.t2 = self.tn = 0.0
+        self.last: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def _clear(self, i: int) -> None:
+        self.t1 -= self.s1[i]
+        self.t2 -= self.s2[i]
+        self.tn -= self.cnt[i]
+        self.s1[i] = self.s2[i] = self.cnt[i] = 0.0
+
+    def update(self, now: float, price: float, volume: float) -> None:
+        i = self._slot(now)
+        last, self.last = self.last, price
+        if last is None or last <= 0.0 or price <= 0.0:
+            return
+        r = math.log(price / last)
+        self.s1[i] += r
+        self.s2[i] += r * r
+        self.cnt[i] += 1.0
+        self.t1 += r
+        self.t2 += r * r
+        self.tn += 1.0
+        n = self.tn
+        if n >= 2.0:
+            var = (self.t2 - self.t1 * self.t1 / n) / (n - 1.0)
+            self.value = math.sqrt(var) * 100.0 if var > 0.0 else 0.0
+        else:
+            self.value = None
+
+
+def _make(spec: Dict[str, Any]):
+    kind = str(spec.get("type", "")).lower()
+    if kind == "ema":
+        hl = spec.get("halflife")
+        return EMA(span=spec.get("span"), halflife=parse_duration(hl) if hl is not None else None)
+    window = parse_duration(spec.get("window", "5m"))
+    buckets = int(spec.get("buckets", DEFAULT_BUCKETS))
+    if kind == "vwap":
+        return VWAP(window, buckets)
+    if kind in ("high", "low"):
+        return RollingExtreme(window, buckets, sign=1 if kind == "high" else -1)
+    if kind == "volatility":
+        return Volatility(window, buckets)
+    raise ValueError(f"unknown indicator type '{kind}'")
+
+
+class Indicators:
+    """
+    The indicators of one symbol, updated together on every tick.
+    """
+
+    __slots__ = ("by_name", "_items", "_last_volume")
+
+    def __init__(self, by_name: Dict[str, Any]):
+        self.by_name = by_name
+        self._items: List[Any] = list(by_name.values())
+        self._last_volume: Optional[float] = None
+
+    def update(self, now: float, price: float, cum_volume: Optional[float]) -> None:
+        """
+        `cum_volume` is the ticker's cumulative session volume; the traded
+        volume of this tick is its increase since the previous tick.
+        """
+        dv = 0.0
+        if cum_volume is not None and cum_volume == cum_volume:
+            lv = self._last_volume
+            if lv is not None and cum_volume > lv:
+                dv = cum_volume - lv
+            self._last_volume = cum_volume
+        for ind in self._items:
+            ind.update(now, price, dv)
+
+    def values(self) -> Dict[str, Optional[float]]:
+        return {name: ind.value for name, ind in self.by_name.items()}
+
+
+def build_indicators(sym: str, s_cfg: Dict[str, Any]) -> Optional[Indicators]:
+    """
+    Indicators declared in a symbol file; invalid ones are skipped with a warning.
+    """
+    raw = s_cfg.get("indicators") or {}
+    by_name: Dict[str, Any] = {}
+    for name, spec in raw.items():
+        try:
+            by_name[str(name)] = _make(spec or {})
+        except (TypeError, ValueError) as e:
+            log.warn(f"{sym}: skipping indicator '{name}': {e}")
+    return Indicators(by_name) if by_name else None
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# File layout: 16-byte header, then fixed-width little-endian records.
+MAGIC = b"SBTJ"
+VERSION = 1
+HEADER = struct.Struct("<4sHH8x")           # magic, version, record size
+RECORD = struct.Struct("<qqdddd")            # ts_ns, conId, last, bid, ask, size
+SYMBOLS_FILE = "symbols.json"                 # conId -> symbol, shared by all journal files
+
+NAN = float("nan")
+
+
+def _num(v: Any) -> float:
+    return NAN if v is None else float(v)
+
+
+class TickJournal:
+    """
+    Append-only binary journal of the tickers delivered by pendingTickersEvent.
+
+    Every ticker in a batch is written with the same timestamp, so a replay can
+    rebuild the original batches. Files rotate once they would exceed
+    `max_bytes`; conId -> symbol names are kept in a small sidecar JSON.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 256 * 1024 * 1024):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(int(max_bytes), HEADER.size + RECORD.size)
+        self.symbols: Dict[int, str] = _load_symbols(self.dir)
+        self._symbols_dirty = False
+        self._seq = 0
+        self._fh = None
+        self._size = 0
+        self.records = 0
+        self._open_next()
+
+    def _open_next(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+        self._seq += 1
+        name = f"ticks-{time.strftime('%Y%m%d-%H%M%S')}-{self._seq:03d}.tj"
+        self.path = self.dir / name
+        self._fh = open(self.path, "wb")
+        self._fh.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self._size = HEADER.size
+
+    def record(self, tickers: Iterable[Any]) -> None:
+        """
+        Append one pendingTickersEvent batch.
+        """
+        ts = time.time_ns()
+        buf = bytearray()
+        pack = RECORD.pack
+        for t in tickers:
+            c = t.contract
+            con_id = int(c.conId or 0)
+            if con_id not in self.symbols:
+                self.symbols[con_id] = c.symbol
+                self._symbols_dirty = True
+            buf += pack(ts, con_id, _num(t.last), _num(t.bid), _num(t.ask), _num(t.lastSize))
+        if not buf:
+            return
+        if self._size + len(buf) > self.max_bytes and self._size > HEADER.size:
+            self._open_next()
+        self._fh.write(buf)
+        self._size += len(buf)
+        self.records += len(buf) // RECORD.size
+        if self._symbols_dirty:
+            self._write_symbols()
+
+    def _write_symbols(self) -> None:
+        tmp = self.dir / (SYMBOLS_FILE + ".tmp")
+        tmp.write_text(json.dumps({str(k): v for k, v in self.symbols.items()}), encoding="utf-8")
+        os.replace(tmp, self.dir / SYMBOLS_FILE)
+        self._symbols_dirty = False
+
+    def flush(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self._symbols_dirty:
+            self._write_symbols()
+
+
+def _load_symbols(directory: Path) -> Dict[int, str]:
+    p = directory / SYMBOLS_FILE
+    if not p.exists():
+        return {}
+    try:
+        return {int(k): str(v) for k, v in json.loads(p.read_text(encoding="utf-8")).items()}
+    except Exception:
+        return {}
+
+
+def journal_files(path: str | Path) -> List[Path]:
+    """
+    A single journal file, or every *.tj file in a directory in write order.
+    """
+    p = Path(path)
+    if p.is_dir():
+        return sorted(p.glob("*.tj"))
+    return [p]
+
+
+def load_symbol_map(path: str | Path) -> Dict[int, str]:
+    p = Path(path)
+    return _load_symbols(p if p.is_dir() else p.parent)
+
+
+class JournalReader:
+    """
+    Memory-mapped, read-only view over one journal file.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._f = open(self.path, "rb")
+        size = os.fstat(self._f.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"{self.path}: not a tick journal")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rec_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or rec_size != RECORD.size:
+            raise ValueError(f"{self.path}: unsupported journal (magic={magic!r}, v{version})")
+        # ignore a torn trailing record from a crash
+        self.count = (size - HEADER.size) // RECORD.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Tuple[int, int, float, float, float, float]]:
+        end = HEADER.size + self.count * RECORD.size
+        return RECORD.iter_unpack(memoryview(self._mm)[HEADER.size:end])
+
+    def to_numpy(self):
+        """
+        Zero-copy NumPy structured array over the mapped records.
+        """
+        import numpy as np
+
+        dtype = np.dtype([
+            ("ts_ns", "<i8"), ("conId", "<i8"),
+            ("last", "<f8"), ("bid", "<f8"), ("ask", "<f8"), ("size", "<f8"),
+        ])
+        return np.frombuffer(self._mm, dtype=dtype, count=self.count, offset=HEADER.size)
+
+    def close(self) -> None:
+        try:
+            self._mm.close()
+        except BufferError:
+            # a memoryview or NumPy array still references the map
+            pass
+        self._f.close()
+
+    def __enter__(self) -> "JournalReader":
+        return self
+
+    def __exit__(self, *exc: Optional[BaseException]) -> None:
+        self.close()
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import log
+
+if TYPE_CHECKING:
+    from ib_insync import Contract
+
+
+class Subscription:
+    """
+    A market-data line: the qualified contract and its Ticker (None while the
+    symbol is waiting for a rotation slot).
+    """
+
+    __slots__ = ("contract", "ticker")
+
+    def __init__(self, contract: Contract, ticker: Any = None):
+        self.contract = contract
+        self.ticker = ticker
+
+    def price(self) -> Optional[float]:
+        t = self.ticker
+        if t is None:
+            return None
+        last = t.last
+        if last is None or last != last:
+            last = t.marketPrice()
+        return last
+
+    def quote(self) -> Optional[Tuple[float, float]]:
+        """
+        Latest (bid, ask) held by the ticker, if both sides are valid.
+        """
+        t = self.ticker
+        if t is None:
+            return None
+        bid, ask = t.bid, t.ask
+        if bid is None or ask is None or not (0.0 < bid <= ask < float("inf")):
+            return None
+        return bid, ask
+
+
+def symbol_priority(s_cfg: Dict[str, Any]) -> float:
+    try:
+        return float(s_cfg.get("priority") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _pct(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(pct / 100.0 * len(values)))], 3)
+
+
+class LineScheduler:
+    """
+    Shares IB's limited concurrent market-data lines across a larger universe.
+
+    While everything fits in `max_lines`, every symbol streams. Beyond that the
+    highest-`priority` symbols keep permanent streaming lines (at most
+    `max_lines - reserve_lines`) and the rest share the remaining lines:
+    `mode="rotate"` streams them in batches for `dwell` seconds each,
+    `mode="snapshot"` polls them with snapshot requests on the same cadence.
+
+    Every tick batch is fed to `on_tickers`, which tracks the gap between
+    updates per symbol; `report()` turns that into effective refresh latency.
+    """
+
+    def __init__(
+        self,
+        ib: Any,
+        max_lines: int = 100,
+        reserve_lines: int = 20,
+        mode: str = "rotate",
+        dwell: float = 3.0,
+    ):
+        if mode not in ("rotate", "snapshot"):
+            raise ValueError(f"market_data_lines.mode must be 'rotate' or 'snapshot', got {mode!r}")
+        self.ib = ib
+        self.max_lines = max(1, int(max_lines))
+        self.reserve_lines = max(1, min(int(reserve_lines), self.max_lines))
+        self.mode = mode
+        self.dwell = dwell
+        self.subs: Dict[str, Subscription] = {}
+        self.priority: Dict[str, float] = {}
+        self.streaming: Set[str] = set()
+        self.pool: List[str] = []      # symbols sharing the rotating lines, in cycle order
+        self.active: List[str] = []    # rotating symbols currently holding a line
+        self._cursor = 0
+        self._by_conid: Dict[int, str] = {}
+        self.last_seen: Dict[str, float] = {}
+        self.max_gap: Dict[str, float] = {}
+        self._since = monotonic()
+
+    # ---------- universe ----------
+
+    def add(self, contract: Contract, priority: float = 0.0) -> None:
+        """
+        Register a qualified contract; call rebalance() once after a batch of adds.
+        """
+        sym = contract.symbol
+        self.subs[sym] = Subscription(contract)
+        self.priority[sym] = priority
+        if contract.conId:
+            self._by_conid[contract.conId] = sym
+
+    def remove(self, sym: str) -> None:
+        sub = self.subs.pop(sym, None)
+        if sub is None:
+            return
+        if sub.ticker is not None and (sym in self.streaming or sym in self.active):
+            self.ib.cancelMktData(sub.contract)
+        self.priority.pop(sym, None)
+        self.streaming.discard(sym)
+        if sym in self.active:
+            self.active.remove(sym)
+        self._by_conid.pop(sub.contract.conId, None)
+        self.last_seen.pop(sym, None)
+        self.max_gap.pop(sym, None)
+
+    def set_priority(self, sym: str, priority: float) -> None:
+        if sym in self.priority:
+            self.priority[sym] = priority
+
+    def price(self, sym: str) -> Optional[float]:
+        sub = self.subs.get(sym)
+        return sub.price() if sub is not None else None
+
+    def quote(self, sym: str) -> Optional[Tuple[float, float]]:
+        sub = self.subs.get(sym)
+        return sub.quote() if sub is not None else None
+
+    def rebalance(self) -> None:
+        """
+        Recompute which symbols stream permanently and (un)subscribe the difference.
+        """
+        syms = list(self.subs)
+        if len(syms) <= self.max_lines:
+            want = set(syms)
+        else:
+            ranked = sorted((s for s in syms if self.priority[s] > 0), key=lambda s: -self.priority[s])
+            want = set(ranked[: self.max_lines - self.reserve_lines])
+            rest = [s for s in syms if s not in want]
+            if len(rest) <= self.max_lines - len(want):
+                want.update(rest)
+
+        for sym in self.streaming - want:
+            self._cancel(sym)
+        for sym in want - self.streaming:
+            if sym in self.active:
+                self.active.remove(sym)  # already holds a line
+            else:
+                self._subscribe(sym)
+        self.streaming = want
+        self.pool = [s for s in syms if s not in want]
+        if self._cursor >= len(self.pool):
+            self._cursor = 0
+
+    def resubscribe(self) -> None:
+        """
+        Request every held line again after a reconnect; IB drops all market
+        data subscriptions with the connection.
+        """
+        for sym in self.streaming | set(self.active):
+            self._subscribe(sym)
+
+    # ---------- rotation ----------
+
+    def rotate(self) -> None:
+        """
+        Hand the shared lines to the next batch of pooled symbols.
+        """
+        if self.mode == "rotate":
+            for sym in self.active:
+                self._cancel(sym)
+            self.active = []
+        free = self.max_lines - len(self.streaming)
+        if not self.pool or free <= 0:
+            return
+        n = len(self.pool)
+        batch = [self.pool[(self._cursor + i) % n] for i in range(min(free, n))]
+        self._cursor = (self._cursor + len(batch)) % n
+        for sym in batch:
+            self._subscribe(sym, snapshot=self.mode == "snapshot")
+        if self.mode == "rotate":
+            self.active = batch
+
+    async def run(self, report_seconds: float = 60.0) -> None:
+        next_report = monotonic() + report_seconds
+        while True:
+            if self.pool:
+                self.rotate()
+            await asyncio.sleep(self.dwell)
+            if report_seconds > 0 and monotonic() >= next_report:
+                next_report += report_seconds
+                self.log_report()
+
+    def _subscribe(self, sym: str, snapshot: bool = False) -> None:
+        sub = self.subs[sym]
+        sub.ticker = self.ib.reqMktData(sub.contract, "", snapshot, False)
+
+    def _cancel(self, sym: str) -> None:
+        sub = self.subs.get(sym)
+        if sub is not None and sub.ticker is not None:
+            self.ib.cancelMktData(sub.contract)
+
+    # ---------- refresh latency ----------
+
+    def on_tickers(self, tickers: Iterable[Any]) -> None:
+        now = monotonic()
+        by_conid, last_seen, max_gap = self._by_conid, self.last_seen, self.max_gap
+        for t in tickers:
+            sym = by_conid.get(t.contract.conId)
+            if sym is None:
+                continue
+            prev = last_seen.get(sym)
+            if prev is not None and now - prev > max_gap.get(sym, 0.0):
+                max_gap[sym] = now - prev
+            last_seen[sym] = now
+
+    def refresh_latency(self, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        Worst gap between updates per symbol since the last report, counting
+        the time since its latest update; None if it was never updated.
+        """
+        now = now or monotonic()
+        out: Dict[str, Optional[float]] = {}
+        for sym in self.subs:
+            seen = self.last_seen.get(sym)
+            out[sym] = None if seen is None else max(self.max_gap.get(sym, 0.0), now - seen)
+        return out
+
+    def report(self, reset: bool = False) -> Dict[str, Any]:
+        now = monotonic()
+        lat = self.refresh_latency(now)
+        tiers: Dict[str, Any] = {}
+        for tier, members in (("streaming", self.streaming), ("pooled", self.pool)):
+            vals = [lat[s] for s in members if lat.get(s) is not None]
+            tiers[tier] = {
+                "symbols": len(members),
+                "never_updated": sum(1 for s in members if lat.get(s) is None),
+                "refresh_s_p50": _pct(vals, 50),
+                "refresh_s_p99": _pct(vals, 99),
+                "refresh_s_max": round(max(vals), 3) if vals else None,
+            }
+        out = {
+            "mode": self.mode if self.pool else "stream",
+            "max_lines": self.max_lines,
+            "window_s": round(now - self._since, 1),
+            **tiers,
+        }
+        if reset:
+            self.max_gap.clear()
+            self._since = now
+        return out
+
+    def log_report(self) -> None:
+        r = self.report(reset=True)
+        s, p = r["streaming"], r["pooled"]
+        msg = f"Lines: {s['symbols']} streaming (refresh p50 {s['refresh_s_p50']}s, max {s['refresh_s_max']}s)"
+        if p["symbols"]:
+            msg += (
+                f", {p['symbols']} {r['mode']} (refresh p50 {p['refresh_s_p50']}s, max {p['refresh_s_max']}s,"
+                f" {p['never_updated']} never updated)"
+            )
+        log.info(msg)
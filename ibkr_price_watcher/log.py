@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from typing import Any
+
+# BackgroundLog is the fetcher's (eodhd_fetcher/utils/log_utils.py)
+from eodhd_fetcher.utils.log_utils import BackgroundLog
+
+LOG = BackgroundLog()
+
+
+def configure(fmt: str = "text") -> None:
+    LOG.fmt = fmt
+
+
+def info(msg: str, **fields: Any) -> None:
+    LOG.emit("INFO", msg, fields)
+
+
+def warn(msg: str, **fields: Any) -> None:
+    LOG.emit("WARN", msg, fields)
+
+
+def alert(msg: str, **fields: Any) -> None:
+    LOG.emit("ALERT", msg, fields)
+
+
+def flush(timeout: float = 5.0) -> None:
+    LOG.flush(timeout)
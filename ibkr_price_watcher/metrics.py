@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from eodhd_fetcher.utils.metrics import Counter, Gauge, Histogram, MetricsDump, Registry  # noqa: F401
+
+from . import log
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Counter, Gauge, Histogram and Registry are the fetcher's (eodhd_fetcher/utils/metrics.py);
+# this module adds the watcher's buckets, the HTTP endpoint and the periodic JSON dump.
+
+# Upper bounds (seconds) for latency histograms: 1µs .. 10s
+LATENCY_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+REGISTRY = Registry(LATENCY_BUCKETS)
+
+
+# ---------- exposure ----------
+
+def serve(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Prometheus endpoint (GET /metrics) on a daemon thread.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+    return httpd
+
+
+def expose(m_cfg: Dict[str, Any], shard: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    Start the endpoint from the `metrics` config section; with shards, the
+    supervisor serves `port` and shard N serves port + 1 + N.
+    """
+    port = int(m_cfg.get("port") or 0)
+    if port <= 0:
+        return None
+    port += 0 if shard is None else shard + 1
+    try:
+        httpd = serve(port)
+    except OSError as e:
+        log.warn(f"Metrics endpoint not started on port {port}: {e}")
+        return None
+    log.info(f"Metrics at http://127.0.0.1:{port}/metrics")
+    return httpd
+
+
+def json_path(m_cfg: Dict[str, Any], shard: Optional[int] = None) -> Optional[Path]:
+    """
+    Path of the periodic JSON dump (watcher-metrics.json -> watcher-metrics-<shard>.json).
+    """
+    raw = m_cfg.get("json_path") or ""
+    if not raw:
+        return None
+    p = Path(raw)
+    return p if shard is None else p.with_name(f"{p.stem}-{shard}{p.suffix}")
+
+
+def write_json(path: str | Path, registry: Registry = REGISTRY) -> None:
+    MetricsDump(Path(path), 0, registry).write()
+
+
+async def dump_json(path: str | Path, interval: float, registry: Registry = REGISTRY) -> None:
+    """
+    Rewrite `path` with a JSON snapshot every `interval` seconds (from the executor).
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await loop.run_in_executor(None, write_json, path, registry)
+        except OSError as e:
+            log.warn(f"Could not write metrics to {path}: {e}")
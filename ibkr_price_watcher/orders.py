@@ -0,0 +1,509 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import math
+import time
+from collections import deque
+from time import perf_counter
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from . import log
+from .congress import Signal
+from .contracts import resolve_contracts
+from .lines import LineScheduler, _pct
+
+# A strategy file's order path:
+#
+#   "routing": {"only_if_market_open": true, "market_session": "REG", "allowed_days": ["Mon", ...],
+#               "exchange_timezone": "America/New_York"},
+#   "risk":    {"max_daily_notional_usd", "max_positions", "max_order_notional_usd",
+#               "max_slippage_bps", "cancel_after_sec"},
+#   rules[].then: {"action": "place_order", "order": {...}, "safety": {"limit_from_nbbo_bps", "reject_if_spread_bps_gt"}}
+#
+# Limit prices come from the bid/ask already streaming through the
+# LineScheduler; the order path never requests market data of its own.
+
+_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+EXCHANGE_TZ = "America/New_York"
+# session -> (open, close) in exchange time, minutes after midnight
+SESSIONS = {"REG": (9 * 60 + 30, 16 * 60), "EXT": (4 * 60, 20 * 60)}
+INF = float("inf")
+
+
+class RiskGate:
+    """
+    Pre-trade limits of one strategy. Running counters (committed notional
+    for the day, positions, working orders, last order per symbol) are
+    updated on submit, fill and completion, so `check()` is constant-time.
+
+    Notional is committed at the limit price when an order is submitted and
+    the unfilled part is released when it completes. After a (re)start the
+    counters are rebuilt from the account with `seed()`. Allowed days, session
+    hours and the daily rollover are all in the exchange time zone `tz`.
+    Exchange holidays are not known; the session check covers weekdays and
+    hours only.
+    """
+
+    def __init__(
+        self,
+        max_daily_notional: float = INF,
+        max_positions: float = INF,
+        max_order_notional: float = INF,
+        cooldown: float = 0.0,
+        allowed_days: Optional[List[str]] = None,
+        session: Optional[str] = None,
+        tz: str = EXCHANGE_TZ,
+    ):
+        self.max_daily_notional = max_daily_notional
+        self.max_positions = max_positions
+        self.max_order_notional = max_order_notional
+        self.cooldown = cooldown
+        self.allowed_days = frozenset(_DAYS.index(d[:3].title()) for d in allowed_days) if allowed_days else None
+        self.session = SESSIONS[session.upper()] if session else None
+        self.tz = ZoneInfo(tz)
+        self.daily_notional = 0.0
+        self.positions: Dict[str, float] = {}
+        self.working: Dict[str, int] = {}
+        self.held: Set[str] = set()   # symbols with a position or a working order
+        self.last_order: Dict[str, float] = {}
+        self._day_end = -INF
+
+    @classmethod
+    def from_strategy(cls, s_cfg: Dict[str, Any]) -> "RiskGate":
+        """
+        Gate from a strategy file's `risk`/`routing` sections; ValueError for
+        an unknown market_session, exchange_timezone or allowed day.
+        """
+        risk = s_cfg.get("risk") or {}
+        routing = s_cfg.get("routing") or {}
+        cooldown = (s_cfg.get("strategy") or {}).get("cooldown") or {}
+
+        def limit(key: str) -> float:
+            v = risk.get(key)
+            return float(v) if v is not None else INF
+
+        session = routing.get("market_session", "REG") if routing.get("only_if_market_open") else None
+        if session is not None and str(session).upper() not in SESSIONS:
+            raise ValueError(f"routing.market_session must be one of {', '.join(SESSIONS)}, got {session!r}")
+        tz = routing.get("exchange_timezone") or EXCHANGE_TZ
+        try:
+            ZoneInfo(tz)
+        except (ValueError, ZoneInfoNotFoundError):
+            raise ValueError(f"routing.exchange_timezone {tz!r} is not a known time zone")
+        days = routing.get("allowed_days")
+        bad = [d for d in days or [] if str(d)[:3].title() not in _DAYS]
+        if bad:
+            raise ValueError(f"routing.allowed_days has unknown days: {', '.join(map(str, bad))}")
+
+        return cls(
+            max_daily_notional=limit("max_daily_notional_usd"),
+            max_positions=limit("max_positions"),
+            max_order_notional=limit("max_order_notional_usd"),
+            cooldown=float(cooldown.get("per_symbol_minutes", 0)) * 60,
+            allowed_days=days,
+            session=session,
+            tz=tz,
+        )
+
+    # ---------- checks ----------
+
+    def _roll(self, now: float) -> None:
+        # counters are per exchange day; recompute the boundary only when crossed
+        if now < self._day_end:
+            return
+        local = dt.datetime.fromtimestamp(now, self.tz)
+        midnight = dt.datetime.combine(local.date() + dt.timedelta(days=1), dt.time(), self.tz)
+        self._day_end = midnight.timestamp()
+        self.daily_notional = 0.0
+
+    def check(self, symbol: str, side: str, notional: float, now: float) -> Optional[str]:
+        """
+        Reason code if the order may not be sent, or None if it passes.
+        """
+        self._roll(now)
+        t = dt.datetime.fromtimestamp(now, self.tz)
+        if self.allowed_days is not None and t.weekday() not in self.allowed_days:
+            return "day_not_allowed"
+        if self.session is not None:
+            minute = t.hour * 60 + t.minute
+            if t.weekday() >= 5 or not (self.session[0] <= minute < self.session[1]):
+                return "market_closed"
+        if notional > self.max_order_notional:
+            return "max_order_notional"
+        if self.daily_notional + notional > self.max_daily_notional:
+            return "max_daily_notional"
+        if side == "BUY" and symbol not in self.held and len(self.held) >= self.max_positions:
+            return "max_positions"
+        last = self.last_order.get(symbol)
+        if last is not None and now - last < self.cooldown:
+            return "cooldown"
+        return None
+
+    # ---------- counters ----------
+
+    def seed(self, positions: Dict[str, float], daily_notional: float, working: Dict[str, int], now: float) -> None:
+        """
+        Replace the counters with the account's view: open positions, notional
+        committed today and working orders per symbol.
+        """
+        self._roll(now)
+        self.daily_notional = daily_notional
+        self.positions = {s: q for s, q in positions.items() if q}
+        self.working = {s: n for s, n in working.items() if n}
+        self.held = set(self.positions) | set(self.working)
+        for sym in self.working:
+            self.last_order[sym] = max(self.last_order.get(sym, -INF), now)
+
+    def _touch(self, symbol: str) -> None:
+        if self.positions.get(symbol) or self.working.get(symbol):
+            self.held.add(symbol)
+        else:
+            self.held.discard(symbol)
+
+    def on_submit(self, symbol: str, notional: float, now: float) -> None:
+        self._roll(now)
+        self.daily_notional += notional
+        self.working[symbol] = self.working.get(symbol, 0) + 1
+        self.last_order[symbol] = now
+        self._touch(symbol)
+
+    def on_fill(self, symbol: str, side: str, shares: float) -> None:
+        self.positions[symbol] = self.positions.get(symbol, 0.0) + (shares if side == "BUY" else -shares)
+        self._touch(symbol)
+
+    def on_done(self, symbol: str, unfilled_notional: float) -> None:
+        self.daily_notional = max(0.0, self.daily_notional - unfilled_notional)
+        n = self.working.get(symbol, 0) - 1
+        if n > 0:
+            self.working[symbol] = n
+        else:
+            self.working.pop(symbol, None)
+        self._touch(symbol)
+
+
+class _Live:
+    __slots__ = ("symbol", "side", "limit", "timer")
+
+    def __init__(self, symbol: str, side: str, limit: float, timer: Any):
+        self.symbol = symbol
+        self.side = side
+        self.limit = limit
+        self.timer = timer
+
+
+class OrderRouter:
+    """
+    Sends a strategy's orders on the watcher's IB connection.
+
+    Each decision (quote lookup, limit price, sizing, risk check, placeOrder)
+    runs synchronously on the event loop and its latency is recorded. Orders
+    still working after `cancel_after` seconds are cancelled by a
+    loop.call_later timer, which is dropped as soon as the order completes.
+    With `dry_run` (the strategy's backtest_mode) decisions are logged only.
+
+    Orders carry the router's name as orderRef, so `sync()` can find them
+    again after a restart or reconnect and rebuild the risk counters.
+    """
+
+    def __init__(
+        self,
+        ib: Any,
+        lines: LineScheduler,
+        gate: RiskGate,
+        name: str = "orders",
+        cancel_after: float = 15.0,
+        max_slippage_bps: Optional[float] = None,
+        dry_run: bool = False,
+        alerts: Optional[Any] = None,
+        notify_fills: bool = True,
+        notify_errors: bool = True,
+        clock: Any = time.time,
+        universe: Optional[Iterable[str]] = None,
+    ):
+        self.ib = ib
+        self.lines = lines
+        self.gate = gate
+        self.name = name
+        self.cancel_after = cancel_after
+        self.max_slippage_bps = max_slippage_bps
+        self.dry_run = dry_run
+        self.alerts = alerts
+        self.notify_fills = notify_fills
+        self.notify_errors = notify_errors
+        self.clock = clock
+        # symbols whose account positions count towards max_positions (None = all)
+        self.universe = frozenset(s.upper() for s in universe) if universe is not None else None
+        self._live: Dict[int, _Live] = {}
+        self.latency_ms: Deque[float] = deque(maxlen=10_000)
+        self.counts = {"submitted": 0, "filled": 0, "cancelled": 0, "rejected": 0, "dry_run": 0}
+        self.rejects: Dict[str, int] = {}
+
+    @classmethod
+    def from_strategy(
+        cls,
+        name: str,
+        s_cfg: Dict[str, Any],
+        ib: Any,
+        lines: LineScheduler,
+        alerts: Optional[Any] = None,
+        live: bool = False,
+    ) -> "OrderRouter":
+        """
+        Router for one strategy file. Orders are only placed with `live`
+        (config orders.enabled) and the strategy not in backtest_mode.
+        """
+        risk = s_cfg.get("risk") or {}
+        a_cfg = s_cfg.get("alerts") or {}
+        slip = risk.get("max_slippage_bps")
+        return cls(
+            ib, lines, RiskGate.from_strategy(s_cfg), name=name,
+            cancel_after=float(risk.get("cancel_after_sec", 15)),
+            max_slippage_bps=float(slip) if slip is not None else None,
+            dry_run=not live or bool(s_cfg.get("backtest_mode", False)),
+            alerts=alerts,
+            notify_fills=bool(a_cfg.get("on_fill", True)),
+            notify_errors=bool(a_cfg.get("on_error", True)),
+            universe=universe_symbols(s_cfg),
+        )
+
+    # ---------- decisions ----------
+
+    def _price(self, side: str, quote: Tuple[float, float], safety: Dict[str, Any]) -> Optional[float]:
+        """
+        Limit price `limit_from_nbbo_bps` through the far side of the quote,
+        capped at `max_slippage_bps` from the mid; None if the spread is too wide.
+        """
+        bid, ask = quote
+        mid = (bid + ask) / 2.0
+        max_spread = safety.get("reject_if_spread_bps_gt")
+        if max_spread is not None and (ask - bid) / mid * 1e4 > float(max_spread):
+            return None
+        bps = float(safety.get("limit_from_nbbo_bps", 0)) / 1e4
+        slip = self.max_slippage_bps / 1e4 if self.max_slippage_bps is not None else None
+        if side == "BUY":
+            limit = ask * (1.0 + bps)
+            if slip is not None:
+                limit = min(limit, mid * (1.0 + slip))
+            return math.floor(limit * 100.0 + 1e-9) / 100.0
+        limit = bid * (1.0 - bps)
+        if slip is not None:
+            limit = max(limit, mid * (1.0 - slip))
+        return math.ceil(limit * 100.0 - 1e-9) / 100.0
+
+    def submit(
+        self,
+        symbol: str,
+        side: str,
+        order_cfg: Dict[str, Any],
+        safety: Optional[Dict[str, Any]] = None,
+        reason: str = "",
+    ) -> Optional[Any]:
+        """
+        Decide on and place one order; returns the Trade, or None if rejected.
+        """
+        t0 = perf_counter()
+        side = side.upper()
+        safety = safety or {}
+        trade = None
+        try:
+            quote = self.lines.quote(symbol)
+            sub = self.lines.subs.get(symbol)
+            if sub is None or quote is None:
+                return self._reject(symbol, "no_quote" if sub is not None else "not_subscribed")
+            limit = self._price(side, quote, safety)
+            if limit is None:
+                return self._reject(symbol, "spread", f"bid {quote[0]:g} / ask {quote[1]:g}")
+            mode = str(order_cfg.get("quantity_mode", "shares"))
+            value = float(order_cfg.get("quantity_value", 0))
+            qty = math.floor(value / limit) if mode == "notional_usd" else math.floor(value)
+            if qty <= 0:
+                return self._reject(symbol, "zero_quantity", f"@ {limit:.2f}")
+            notional = qty * limit
+            now = self.clock()
+            why = self.gate.check(symbol, side, notional, now)
+            if why is not None:
+                return self._reject(
+                    symbol, why, f"{side} {qty} @ {limit:.2f}, today {self.gate.daily_notional:.2f}"
+                )
+
+            from ib_insync import LimitOrder, MarketOrder
+
+            tif = str(order_cfg.get("time_in_force", "DAY"))
+            if str(order_cfg.get("type", "MKT")).upper() == "MKT" and not safety:
+                order = MarketOrder(side, qty, tif=tif, orderRef=self.name)
+            else:
+                order = LimitOrder(side, qty, limit, tif=tif, orderRef=self.name)
+            # a market order has no limit; the computed price is only its sizing reference
+            price = f"LMT {limit:.2f}" if order.orderType == "LMT" else f"MKT (ref {limit:.2f})"
+            if self.dry_run:
+                self.counts["dry_run"] += 1
+                log.info(f"{self.name}: would {side} {qty} {symbol} {price} ({reason})")
+                return None
+            trade = self.ib.placeOrder(sub.contract, order)
+            self.gate.on_submit(symbol, notional, now)
+        finally:
+            self.latency_ms.append((perf_counter() - t0) * 1000.0)
+
+        self.counts["submitted"] += 1
+        self._track(trade, symbol, side, limit)
+        log.info(f"{self.name}: {side} {qty} {symbol} {price} sent ({reason})")
+        return trade
+
+    def _track(self, trade: Any, symbol: str, side: str, limit: float) -> None:
+        timer = asyncio.get_running_loop().call_later(self.cancel_after, self._expire, trade)
+        self._live[trade.order.orderId] = _Live(symbol, side, limit, timer)
+        trade.fillEvent += self._on_fill
+        trade.statusEvent += self._on_status
+
+    def _reject(self, symbol: str, why: str, detail: str = "") -> None:
+        self.counts["rejected"] += 1
+        self.rejects[why] = self.rejects.get(why, 0) + 1
+        text = f"{why} ({detail})" if detail else why
+        log.warn(f"{self.name}: {symbol} order rejected: {text}")
+        if self.notify_errors and self.alerts is not None:
+            self.alerts.submit([f"⛔ {self.name}: **{symbol}** order rejected: {text}"])
+        return None
+
+    def on_signal(self, signal: Signal) -> Optional[Any]:
+        then = signal.rule.then
+        order_cfg = then.get("order") or {}
+        symbol = str(order_cfg.get("symbol") or signal.record.get("ticker") or "").upper()
+        side = str(order_cfg.get("action") or order_cfg.get("side") or "BUY")
+        return self.submit(symbol, side, order_cfg, then.get("safety"), reason=signal.rule.name)
+
+    # ---------- account state ----------
+
+    def sync(self) -> None:
+        """
+        Rebuild the risk counters from the IB account: positions in the
+        strategy's universe, today's fills of orders with this router's
+        orderRef, and its still-working orders, which are tracked (and
+        cancelled after `cancel_after`) as if just sent. Run after connecting
+        and after every reconnect, when IB hands out new Trade objects.
+        """
+        now = self.clock()
+        for live in self._live.values():
+            live.timer.cancel()
+        self._live.clear()
+
+        positions: Dict[str, float] = {}
+        for p in self.ib.positions():
+            sym = p.contract.symbol
+            if self.universe is None or sym in self.universe:
+                positions[sym] = positions.get(sym, 0.0) + float(p.position)
+
+        today = dt.datetime.fromtimestamp(now, self.gate.tz).date()
+        committed = 0.0
+        for f in self.ib.fills():
+            ex = f.execution
+            if ex.orderRef == self.name and ex.time.astimezone(self.gate.tz).date() == today:
+                committed += float(ex.shares) * float(ex.price)
+
+        working: Dict[str, int] = {}
+        adopted = []
+        for trade in self.ib.openTrades():
+            order = trade.order
+            if order.orderRef != self.name or trade.isDone():
+                continue
+            sym = trade.contract.symbol
+            limit = float(order.lmtPrice) if order.orderType == "LMT" else self._mid(sym)
+            committed += max(0.0, float(order.totalQuantity) - float(trade.filled())) * limit
+            working[sym] = working.get(sym, 0) + 1
+            adopted.append((trade, sym, order.action, limit))
+
+        self.gate.seed(positions, committed, working, now)
+        for trade, sym, side, limit in adopted:
+            self._track(trade, sym, side, limit)
+        log.info(
+            f"{self.name}: {len(self.gate.held)} symbols held, {len(adopted)} working orders, "
+            f"{committed:.2f} committed today"
+        )
+
+    def _mid(self, symbol: str) -> float:
+        quote = self.lines.quote(symbol)
+        return (quote[0] + quote[1]) / 2.0 if quote is not None else 0.0
+
+    # ---------- order lifecycle ----------
+
+    def _on_fill(self, trade: Any, fill: Any) -> None:
+        live = self._live.get(trade.order.orderId)
+        if live is None:
+            return
+        ex = fill.execution
+        self.gate.on_fill(live.symbol, live.side, float(ex.shares))
+        if self.notify_fills and self.alerts is not None:
+            self.alerts.submit([f"✅ {self.name}: {live.side} {ex.shares:g} **{live.symbol}** @ {ex.price:.2f}"])
+
+    def _on_status(self, trade: Any) -> None:
+        # Filled / Cancelled / ApiCancelled, or Inactive when IB rejects it
+        if trade.isDone() or trade.orderStatus.status == "Inactive":
+            self._done(trade)
+
+    def _done(self, trade: Any) -> None:
+        live = self._live.pop(trade.order.orderId, None)
+        if live is None:
+            return
+        live.timer.cancel()
+        remaining = max(0.0, float(trade.order.totalQuantity) - float(trade.filled()))
+        self.gate.on_done(live.symbol, remaining * live.limit)
+        if remaining == 0.0:
+            self.counts["filled"] += 1
+        else:
+            self.counts["cancelled"] += 1
+            log.info(
+                f"{self.name}: {live.symbol} order {trade.order.orderId} "
+                f"{trade.orderStatus.status.lower()}, {remaining:g} unfilled"
+            )
+
+    def _expire(self, trade: Any) -> None:
+        live = self._live.get(trade.order.orderId)
+        # a dry run never touches orders, including ones adopted by sync()
+        if live is None or trade.isDone() or self.dry_run:
+            return
+        log.info(f"{self.name}: {live.symbol} order {trade.order.orderId} working after {self.cancel_after:g}s; cancelling")
+        self.ib.cancelOrder(trade.order)
+
+    def stats(self) -> Dict[str, Any]:
+        lat = list(self.latency_ms)
+        return {
+            **self.counts,
+            "working": len(self._live),
+            "rejects": dict(self.rejects),
+            "daily_notional": round(self.gate.daily_notional, 2),
+            "decision_ms_p50": _pct(lat, 50),
+            "decision_ms_p99": _pct(lat, 99),
+        }
+
+
+def universe_symbols(s_cfg: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Symbol-file style contract settings for everything a strategy may
+    trade: its `universe` plus the symbols of its place_order rules.
+    """
+    out: Dict[str, Dict[str, Any]] = {str(s).upper(): {} for s in s_cfg.get("universe") or []}
+    for rule in (s_cfg.get("strategy") or {}).get("rules") or []:
+        order = (rule.get("then") or {}).get("order") or {}
+        if order.get("symbol"):
+            out[str(order["symbol"]).upper()] = {
+                "secType": order.get("asset_class", "STK"),
+                "exchange": order.get("exchange", "SMART"),
+                "currency": order.get("currency", "USD"),
+            }
+    return out
+
+
+async def watch_universe(ib: Any, lines: LineScheduler, symbols: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Stream quotes for strategy symbols the watcher does not already follow,
+    so their orders can be priced.
+    """
+    missing = {s: c for s, c in symbols.items() if s not in lines.subs}
+    if not missing:
+        return
+    for c in await resolve_contracts(ib, missing, None, 50, 0.0):
+        # well above any symbol-file priority, so these keep a streaming line
+        lines.add(c, priority=1e9)
+    lines.rebalance()
+    log.info(f"Streaming quotes for strategy symbols: {', '.join(sorted(missing))}")
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from . import log
+from .contracts import ContractCache, contract_key, resolve_contracts
+from .lines import LineScheduler, symbol_priority
+from .symbols import load_symbol_files, shard_of
+
+
+def scan_mtimes(symbols_dir: str | Path) -> Dict[str, int]:
+    """
+    {file name: mtime_ns} for every *.json in the symbols directory.
+    """
+    out: Dict[str, int] = {}
+    try:
+        with os.scandir(symbols_dir) as it:
+            for e in it:
+                if e.name.endswith(".json") and e.is_file():
+                    out[e.name] = e.stat().st_mtime_ns
+    except FileNotFoundError:
+        pass
+    return out
+
+
+def diff_symbols(
+    old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]
+) -> Tuple[List[str], List[str], List[str], List[str]]:
+    """
+    Compare two loaded symbol sets. Returns (added, removed, resubscribe,
+    retuned): `resubscribe` changed a contract field, `retuned` changed only
+    thresholds/rules/labels and keeps its market-data line.
+    """
+    added = [s for s in new if s not in old]
+    removed = [s for s in old if s not in new]
+    resubscribe: List[str] = []
+    retuned: List[str] = []
+    for s in new:
+        if s not in old or new[s] == old[s]:
+            continue
+        if contract_key(s, new[s]) != contract_key(s, old[s]):
+            resubscribe.append(s)
+        else:
+            retuned.append(s)
+    return added, removed, resubscribe, retuned
+
+
+class SymbolsReloader:
+    """
+    Polls the symbols directory by mtime and applies only the difference:
+    new contracts are handed to the line scheduler, removed ones give up their
+    line, and everything else that changed gets an in-place threshold/rule swap.
+
+    A file that does not parse (e.g. caught half-written) keeps the symbol
+    it held before, and the files' mtimes are only recorded once a reload
+    was applied, so failed reloads are retried on the next poll. Symbols
+    that IB could not qualify are left out and their files keep the old
+    mtime as well, so they are retried on every poll until they qualify.
+    """
+
+    def __init__(
+        self,
+        ib: Any,
+        watcher: Any,
+        symbols_dir: str | Path,
+        lines: LineScheduler,
+        cache: Optional[ContractCache] = None,
+        chunk: Tuple[int, float] = (50, 1.0),
+        shard: Optional[Tuple[int, int]] = None,
+    ):
+        self.ib = ib
+        self.watcher = watcher
+        self.symbols_dir = symbols_dir
+        self.lines = lines
+        self.cache = cache
+        self.chunk = chunk
+        self.shard = shard  # (index, count): only apply this shard's symbols
+        self._mtimes = scan_mtimes(symbols_dir)
+        files, _ = load_symbol_files(symbols_dir)
+        self._files: Dict[str, str] = {name: sym for name, (sym, _) in files.items()}  # file -> symbol
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check()
+            except Exception as e:
+                log.warn(f"Symbol reload failed: {e}")
+
+    async def check(self) -> bool:
+        """
+        Reload if any symbol file was added, removed or touched.
+        """
+        mtimes = scan_mtimes(self.symbols_dir)
+        if mtimes == self._mtimes:
+            return False
+        files, failed = load_symbol_files(self.symbols_dir)
+        new = dict(files.values())
+        current = self.watcher.symbols
+        for name in failed:
+            sym = self._files.get(name)
+            if sym is not None and sym in current and sym not in new:
+                new[sym] = current[sym]
+        if self.shard is not None:
+            index, count = self.shard
+            new = {s: c for s, c in new.items() if shard_of(s, count) == index}
+        missing = await self.apply(new)
+
+        # unreadable or unqualified files keep their old mtime so they are read again
+        retry = failed + [name for name, (sym, _) in files.items() if sym in missing]
+        for name in retry:
+            if name in self._mtimes:
+                mtimes[name] = self._mtimes[name]
+            else:
+                mtimes.pop(name, None)
+        self._mtimes = mtimes
+        self._files = {
+            **{name: self._files[name] for name in failed if name in self._files},
+            **{name: sym for name, (sym, _) in files.items()},
+        }
+        return True
+
+    async def apply(self, new: Dict[str, Dict[str, Any]]) -> Set[str]:
+        """
+        Apply `new` as the symbol set; returns the symbols that could not be
+        qualified (left out of the watcher).
+        """
+        added, removed, resubscribe, retuned = diff_symbols(dict(self.watcher.symbols), new)
+        if not (added or removed or resubscribe or retuned):
+            return set()
+
+        # qualify first: if that fails nothing has changed and check() retries
+        to_add = added + resubscribe
+        qualified = await resolve_contracts(self.ib, {s: new[s] for s in to_add}, self.cache, *self.chunk) if to_add else []
+
+        for sym in removed + resubscribe:
+            self.lines.remove(sym)
+            self.watcher.remove_symbol(sym)
+
+        missing = set(to_add) - {c.symbol for c in qualified}
+        for c in qualified:
+            self.watcher.add_symbol(c.symbol, new[c.symbol])
+            self.watcher.bind(c)
+            self.lines.add(c, symbol_priority(new[c.symbol]))
+        if missing:
+            log.warn(f"Could not qualify: {', '.join(sorted(missing))}; retrying on the next poll")
+
+        for sym in retuned:
+            self.lines.set_priority(sym, symbol_priority(new[sym]))
+            self.watcher.update_symbol(sym, new[sym], self.lines.price(sym))
+        self.lines.rebalance()
+
+        log.info(
+            f"Symbols reloaded: +{len(added)} -{len(removed)} "
+            f"resubscribed {len(resubscribe)} retuned {len(retuned)}"
+        )
+        return missing
@@ -0,0 +1,129 @@
+"""
+Replay a tick journal through PriceWatcher without an IB connection.
+
+    python -m ibkr_price_watcher.replay ./journal            # as fast as possible
+    python -m ibkr_price_watcher.replay ./journal --speed 1  # recorded speed
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .journal import JournalReader, journal_files, load_symbol_map
+
+
+class ReplayContract:
+    __slots__ = ("symbol", "conId")
+
+    def __init__(self, symbol: str, conId: int):
+        self.symbol = symbol
+        self.conId = conId
+
+
+class ReplayTicker:
+    """
+    Just enough of ib_insync.Ticker for PriceWatcher.on_tick.
+    """
+
+    __slots__ = ("contract", "last", "bid", "ask", "lastSize", "volume")
+
+    def __init__(self, contract: ReplayContract):
+        self.contract = contract
+        self.last = self.bid = self.ask = self.lastSize = float("nan")
+        self.volume = float("nan")  # not journaled; VWAP falls back to the average price
+
+    def marketPrice(self) -> float:
+        last, bid, ask = self.last, self.bid, self.ask
+        if bid == bid and ask == ask and bid > 0 and ask > 0:
+            if last == last and bid <= last <= ask:
+                return last
+            return (bid + ask) / 2
+        return last
+
+
+def replay(path: str | Path, watcher: Any, speed: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Feed every journal record under `path` through `watcher.on_tick`, one
+    recorded batch at a time. `speed=None` runs flat out; `speed=1.0` sleeps to
+    reproduce the recorded timing (2.0 = twice as fast, ...). The watcher's
+    clock follows the recorded timestamps, so throttling and indicator windows
+    behave as they did live at any speed.
+    """
+    symbols = load_symbol_map(path)
+    tickers: Dict[int, ReplayTicker] = {}
+    for con_id, sym in symbols.items():
+        rt = ReplayTicker(ReplayContract(sym, con_id))
+        tickers[con_id] = rt
+        watcher.bind(rt.contract)
+
+    clock = [0.0]
+    watcher.clock = lambda: clock[0]
+    on_tick = watcher.on_tick
+    n_ticks = n_batches = 0
+    first_ts: Optional[int] = None
+    batch_ts: Optional[int] = None
+    wall0 = time.perf_counter()
+
+    for f in journal_files(path):
+        with JournalReader(f) as reader:
+            for ts, con_id, last, bid, ask, size in reader:
+                if ts != batch_ts:
+                    if batch_ts is not None:
+                        watcher.flush_alerts()
+                        n_batches += 1
+                    batch_ts = ts
+                    clock[0] = ts / 1e9
+                    if first_ts is None:
+                        first_ts = ts
+                    if speed:
+                        delay = (ts - first_ts) / 1e9 / speed - (time.perf_counter() - wall0)
+                        if delay > 0:
+                            time.sleep(delay)
+                rt = tickers.get(con_id)
+                if rt is None:
+                    rt = tickers[con_id] = ReplayTicker(ReplayContract(f"#{con_id}", con_id))
+                rt.last, rt.bid, rt.ask, rt.lastSize = last, bid, ask, size
+                on_tick(rt)
+                n_ticks += 1
+    if batch_ts is not None:
+        watcher.flush_alerts()
+        n_batches += 1
+
+    elapsed = time.perf_counter() - wall0
+    return {
+        "ticks": n_ticks,
+        "batches": n_batches,
+        "seconds": round(elapsed, 4),
+        "ticks_per_sec": round(n_ticks / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def _main() -> None:
+    from . import log
+    from .config import load_config
+    from .symbols import load_symbols
+    from .watcher import PriceWatcher
+
+    ap = argparse.ArgumentParser(description="Replay a tick journal through PriceWatcher")
+    ap.add_argument("path", help="journal file or directory")
+    ap.add_argument("--speed", type=float, default=None, help="1.0 = recorded speed; omit for max speed")
+    ap.add_argument("--quiet", action="store_true", help="suppress per-alert console output")
+    args = ap.parse_args()
+
+    cfg = load_config()
+    symbols = load_symbols(cfg["paths"]["symbols_dir"])
+    watcher = PriceWatcher(None, cfg, symbols)
+    out = io.StringIO() if args.quiet else None
+    with contextlib.redirect_stdout(out) if out is not None else contextlib.nullcontext():
+        stats = replay(args.path, watcher, speed=args.speed)
+    log.flush()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from . import log
+from .indicators import Indicators, RollingExtreme
+
+INF = math.inf
+_NO_FIRE: Tuple["Rule", ...] = ()
+
+# Condition keys understood in a rule's "when" block, and which side they sit on.
+BELOW_KEYS = ("price_below", "pct_change_down")
+ABOVE_KEYS = ("price_above", "pct_change_up")
+# Conditions against the symbol's rolling indicators (see indicators.py); their
+# threshold moves every tick, so they are checked individually.
+INDICATOR_KEYS = ("above_indicator", "below_indicator", "indicator_above", "indicator_below", "new_high", "new_low")
+
+
+class Rule:
+    __slots__ = ("name", "action", "need", "sat")
+
+    def __init__(self, name: str, action: str, need: int):
+        self.name = name
+        self.action = action
+        self.need = need  # number of conditions in "when" (all must hold)
+        self.sat = 0      # how many of them currently hold
+
+
+class _IndicatorCondition(ABC):
+    """
+    One condition whose threshold comes from a rolling indicator.
+    `held` tracks whether it currently holds, for edge triggering.
+    """
+
+    __slots__ = ("rule", "ind", "k", "held")
+
+    def __init__(self, rule: Rule, ind: Any, k: float):
+        self.rule = rule
+        self.ind = ind
+        self.k = k
+        self.held = False
+
+    @abstractmethod
+    def holds(self, price: float) -> bool:
+        ...
+
+
+class _PriceAbove(_IndicatorCondition):
+    __slots__ = ()
+
+    def holds(self, price: float) -> bool:
+        v = self.ind.value
+        return v is not None and price >= v * self.k
+
+
+class _PriceBelow(_IndicatorCondition):
+    __slots__ = ()
+
+    def holds(self, price: float) -> bool:
+        v = self.ind.value
+        return v is not None and price <= v * self.k
+
+
+class _ValueAbove(_IndicatorCondition):
+    __slots__ = ()
+
+    def holds(self, price: float) -> bool:
+        v = self.ind.value
+        return v is not None and v > self.k
+
+
+class _ValueBelow(_IndicatorCondition):
+    __slots__ = ()
+
+    def holds(self, price: float) -> bool:
+        v = self.ind.value
+        return v is not None and v < self.k
+
+
+class _NewExtreme(_IndicatorCondition):
+    """
+    Price beyond the window's high (k=1) or low (k=-1) before this tick.
+    """
+
+    __slots__ = ()
+
+    def holds(self, price: float) -> bool:
+        p = self.ind.prior
+        return p is not None and (price - p) * self.k > 0.0
+
+
+class SymbolRules:
+    """
+    Rules of one symbol compiled into two sorted threshold arrays.
+
+    A "below" condition i holds while price < below[i]; an "above" condition j
+    holds while price > above[j]. Since both arrays are sorted, the set of true
+    conditions is a suffix of `below` and a prefix of `above`, and it only
+    changes when the price leaves the band [lo, hi) around the current split
+    points. The common tick is therefore four float comparisons; crossing a
+    threshold costs a bisect plus the conditions actually crossed.
+
+    Rules are edge-triggered: a rule fires when its last condition becomes
+    true and re-arms once any of its conditions stops holding. Indicator
+    conditions have moving thresholds and are checked on every tick, after
+    the static ones; symbols without them keep the four-comparison fast path.
+    """
+
+    __slots__ = (
+        "symbol", "rules", "dynamic",
+        "below", "below_rule", "kb", "lo_b", "hi_b",
+        "above", "above_rule", "ka", "lo_a", "hi_a",
+    )
+
+    def __init__(
+        self,
+        symbol: str,
+        rules: List[Rule],
+        below: List[Tuple[float, int]],
+        above: List[Tuple[float, int]],
+        dynamic: Optional[List[_IndicatorCondition]] = None,
+    ):
+        self.symbol = symbol
+        self.rules = rules
+        self.dynamic = dynamic or []
+        below.sort()
+        above.sort()
+        self.below = [t for t, _ in below]
+        self.below_rule = [rules[i] for _, i in below]
+        self.above = [t for t, _ in above]
+        self.above_rule = [rules[i] for _, i in above]
+        # Start with no condition true.
+        self._set_below(len(self.below))
+        self._set_above(0)
+
+    def _set_below(self, k: int) -> None:
+        self.kb = k
+        self.lo_b = self.below[k - 1] if k > 0 else -INF
+        self.hi_b = self.below[k] if k < len(self.below) else INF
+
+    def _set_above(self, k: int) -> None:
+        self.ka = k
+        self.lo_a = self.above[k - 1] if k > 0 else -INF
+        self.hi_a = self.above[k] if k < len(self.above) else INF
+
+    def evaluate(self, price: float) -> Sequence[Rule]:
+        """
+        Feed one price; returns the rules that fired on this tick (usually none).
+        """
+        if self.lo_b <= price < self.hi_b and self.lo_a < price <= self.hi_a:
+            if not self.dynamic:
+                return _NO_FIRE
+            fired: List[Rule] = []
+        else:
+            fired = self._crossings(price)
+        for c in self.dynamic:
+            h = c.holds(price)
+            if h is not c.held:
+                c.held = h
+                r = c.rule
+                if h:
+                    r.sat += 1
+                    if r.sat == r.need:
+                        fired.append(r)
+                else:
+                    r.sat -= 1
+
+        # A rule whose conditions toggled both ways in one jump only counts if it still holds.
+        return [r for r in fired if r.sat == r.need] if fired else _NO_FIRE
+
+    def _crossings(self, price: float) -> List[Rule]:
+        """
+        Move the split points to `price`; returns rules whose last static condition became true.
+        """
+        fired: List[Rule] = []
+        kb = bisect_right(self.below, price)
+        if kb != self.kb:
+            if kb < self.kb:
+                for r in self.below_rule[kb:self.kb]:
+                    r.sat += 1
+                    if r.sat == r.need:
+                        fired.append(r)
+            else:
+                for r in self.below_rule[self.kb:kb]:
+                    r.sat -= 1
+            self._set_below(kb)
+
+        ka = bisect_left(self.above, price)
+        if ka != self.ka:
+            if ka > self.ka:
+                for r in self.above_rule[self.ka:ka]:
+                    r.sat += 1
+                    if r.sat == r.need:
+                        fired.append(r)
+            else:
+                for r in self.above_rule[ka:self.ka]:
+                    r.sat -= 1
+            self._set_above(ka)
+        return fired
+
+
+def _compile_condition(key: str, value: float, baseline: float | None) -> float:
+    """
+    Threshold for one condition, expressed with the strict comparisons used
+    by SymbolRules (price < t for below, price > t for above).
+    """
+    if key == "price_below":
+        return value
+    if key == "price_above":
+        return value
+    if baseline is None:
+        raise ValueError(f"{key} needs 'baseline_price'")
+    if key == "pct_change_up":
+        # price >= baseline * (1 + x%)  <=>  price > nextafter(..., -inf)
+        return math.nextafter(baseline * (1.0 + value / 100.0), -INF)
+    # pct_change_down: price <= baseline * (1 - x%)
+    return math.nextafter(baseline * (1.0 - value / 100.0), INF)
+
+
+def _compile_indicator_condition(key: str, value: Any, indicators: Optional[Indicators]) -> Tuple[type, Any, float]:
+    """
+    (condition class, indicator, k) for one indicator condition. `value` is an
+    indicator name or {"indicator": name, "pct": x} / {"indicator": name, "value": x}.
+    """
+    spec = value if isinstance(value, dict) else {"indicator": value}
+    name = str(spec.get("indicator", ""))
+    ind = indicators.by_name.get(name) if indicators is not None else None
+    if ind is None:
+        raise ValueError(f"{key} refers to unknown indicator '{name}'")
+    if key in ("new_high", "new_low"):
+        if not isinstance(ind, RollingExtreme):
+            raise ValueError(f"{key} needs a high/low indicator, '{name}' is not one")
+        return _NewExtreme, ind, 1.0 if key == "new_high" else -1.0
+    if key == "above_indicator":
+        return _PriceAbove, ind, 1.0 + float(spec.get("pct", 0.0)) / 100.0
+    if key == "below_indicator":
+        return _PriceBelow, ind, 1.0 - float(spec.get("pct", 0.0)) / 100.0
+    if "value" not in spec:
+        raise ValueError(f"{key} needs a 'value'")
+    return (_ValueAbove if key == "indicator_above" else _ValueBelow), ind, float(spec["value"])
+
+
+def compile_symbol_rules(sym: str, s_cfg: Dict[str, Any], indicators: Optional[Indicators] = None) -> SymbolRules | None:
+    """
+    Compile the `rules` list of one symbol file against its indicators.
+    Invalid rules are skipped with a warning; returns None when the symbol
+    has no usable rules.
+    """
+    raw = s_cfg.get("rules") or []
+    baseline = s_cfg.get("baseline_price")
+    baseline = float(baseline) if baseline is not None else None
+
+    rules: List[Rule] = []
+    below: List[Tuple[float, int]] = []
+    above: List[Tuple[float, int]] = []
+    dynamic: List[_IndicatorCondition] = []
+    for i, r_cfg in enumerate(raw):
+        name = str(r_cfg.get("name", f"rule {i + 1}"))
+        when = r_cfg.get("when") or {}
+        conds: List[Tuple[bool, float]] = []
+        ind_conds: List[Tuple[type, Any, float]] = []
+        try:
+            for key, value in when.items():
+                if key in INDICATOR_KEYS:
+                    ind_conds.append(_compile_indicator_condition(key, value, indicators))
+                elif key in BELOW_KEYS or key in ABOVE_KEYS:
+                    conds.append((key in BELOW_KEYS, _compile_condition(key, float(value), baseline)))
+                else:
+                    raise ValueError(f"unknown condition '{key}'")
+        except (TypeError, ValueError) as e:
+            log.warn(f"{sym}: skipping rule '{name}': {e}")
+            continue
+        if not conds and not ind_conds:
+            log.warn(f"{sym}: skipping rule '{name}': empty 'when'")
+            continue
+        idx = len(rules)
+        rule = Rule(name, str(r_cfg.get("action", "")).upper(), len(conds) + len(ind_conds))
+        rules.append(rule)
+        for is_below, thr in conds:
+            (below if is_below else above).append((thr, idx))
+        for cls, ind, k in ind_conds:
+            dynamic.append(cls(rule, ind, k))
+
+    if not rules:
+        return None
+    return SymbolRules(sym, rules, below, above, dynamic)
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import multiprocessing as mp
+import queue
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import log, metrics
+from .startup import PROFILE
+from .discord_client import AlertDispatcher
+from .symbols import shard_of
+
+
+def partition(symbols: Dict[str, Dict[str, Any]], count: int) -> List[Dict[str, Dict[str, Any]]]:
+    parts: List[Dict[str, Dict[str, Any]]] = [{} for _ in range(count)]
+    for sym, s_cfg in symbols.items():
+        parts[shard_of(sym, count)][sym] = s_cfg
+    return parts
+
+
+def shard_config(cfg: Dict[str, Any], index: int, count: int) -> Dict[str, Any]:
+    """
+    Config for one shard: its own clientId (base + index), an equal share of
+    the account's market-data lines, its own journal/bars directories, and no Discord
+    webhook (alerts go back to the supervisor).
+    """
+    out = copy.deepcopy(cfg)
+    out["shard"] = {"index": index, "count": count}
+    out["ib"]["clientId"] = int(cfg["ib"]["clientId"]) + index
+    out["discord"]["webhook_url"] = ""
+    lines = out.setdefault("market_data_lines", {})
+    lines["max_lines"] = max(1, int(lines.get("max_lines", 100)) // count)
+    lines["reserve_lines"] = max(1, int(lines.get("reserve_lines", 20)) // count)
+    for section in ("journal", "bars"):
+        if section in out:
+            out[section]["dir"] = str(Path(out[section]["dir"]) / f"shard{index}")
+    return out
+
+
+class QueueAlerts:
+    """
+    AlertDispatcher stand-in inside a shard: forwards each alert batch to the
+    supervisor's queue without blocking the event loop.
+    """
+
+    def __init__(self, index: int, out: Any):
+        self.index = index
+        self.out = out
+        self.submitted = 0
+        self.dropped = 0
+
+    def submit(self, lines: List[str]) -> None:
+        try:
+            self.out.put_nowait(("alerts", self.index, lines))
+            self.submitted += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"submitted": self.submitted, "dropped": self.dropped}
+
+    def close(self) -> None:
+        pass
+
+
+async def _shard_async(
+    index: int,
+    cfg: Dict[str, Any],
+    symbols: Dict[str, Dict[str, Any]],
+    out: Any,
+    ib_factory: Optional[Callable[[], Any]],
+    heartbeat: float,
+) -> None:
+    from ib_insync import IB
+
+    from .watcher import run_async
+
+    ib = ib_factory() if ib_factory is not None else IB()
+    sink = QueueAlerts(index, out)
+    ticks = 0
+
+    def count_ticks(tickers: Any) -> None:
+        nonlocal ticks
+        ticks += len(tickers)
+
+    ib.pendingTickersEvent += count_ticks
+
+    async def beat() -> None:
+        while True:
+            metrics = {"ticks": ticks, "symbols": len(symbols), "ts": time.time(), **sink.stats()}
+            try:
+                out.put_nowait(("metrics", index, metrics))
+            except queue.Full:
+                pass
+            await asyncio.sleep(heartbeat)
+
+    hb = asyncio.ensure_future(beat())
+    try:
+        await run_async(cfg, symbols, ib=ib, alerts=sink)
+    finally:
+        hb.cancel()
+
+
+def _shard_main(
+    index: int,
+    cfg: Dict[str, Any],
+    symbols: Dict[str, Dict[str, Any]],
+    out: Any,
+    ib_factory: Optional[Callable[[], Any]],
+    heartbeat: float,
+) -> None:
+    # the supervisor owns Ctrl+C and stops shards with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    asyncio.run(_shard_async(index, cfg, symbols, out, ib_factory, heartbeat))
+
+
+class _Shard:
+    __slots__ = ("index", "symbols", "proc", "started", "failures", "restart_at", "restarts", "metrics")
+
+    def __init__(self, index: int, symbols: Dict[str, Dict[str, Any]]):
+        self.index = index
+        self.symbols = symbols
+        self.proc: Any = None
+        self.started = 0.0
+        self.failures = 0          # consecutive short-lived runs, for backoff
+        self.restart_at: Optional[float] = None
+        self.restarts = 0
+        self.metrics: Dict[str, Any] = {}
+
+
+class ShardSupervisor:
+    """
+    Runs the watcher as `count` worker processes, each on its own IB
+    connection (clientId = ib.clientId + shard index) with a stable share of
+    the symbols. Alert batches and heartbeat metrics come back over one
+    queue; the supervisor owns the single Discord dispatcher. A shard that
+    exits with an error or stops sending heartbeats is restarted with
+    exponential backoff while the others keep running.
+    """
+
+    def __init__(
+        self,
+        cfg: Dict[str, Any],
+        symbols: Dict[str, Dict[str, Any]],
+        count: Optional[int] = None,
+        ib_factory: Optional[Callable[[], Any]] = None,
+    ):
+        s_cfg = cfg.get("shards", {})
+        self.cfg = cfg
+        self.count = max(1, int(count or s_cfg.get("count", 1)))
+        self.ib_factory = ib_factory
+        self.heartbeat = float(s_cfg.get("heartbeat_seconds", 5))
+        self.heartbeat_timeout = float(s_cfg.get("heartbeat_timeout_seconds", 30))
+        self.backoff = float(s_cfg.get("restart_backoff_seconds", 1))
+        self.max_backoff = float(s_cfg.get("max_backoff_seconds", 60))
+        self.report_seconds = float(s_cfg.get("report_seconds", 60))
+        self.ctx = mp.get_context("spawn")
+        self.queue = self.ctx.Queue(maxsize=int(cfg["discord"].get("queue_size", 1000)) * self.count)
+        self.shards = [_Shard(i, part) for i, part in enumerate(partition(symbols, self.count))]
+        self.alerts: Optional[AlertDispatcher] = None
+        self._httpd: Any = None
+        self._stopping = False
+
+    # ---------- process management ----------
+
+    def _start(self, shard: _Shard) -> None:
+        shard.proc = self.ctx.Process(
+            target=_shard_main,
+            args=(
+                shard.index, shard_config(self.cfg, shard.index, self.count), shard.symbols,
+                self.queue, self.ib_factory, self.heartbeat,
+            ),
+            name=f"watcher-shard-{shard.index}",
+            daemon=True,
+        )
+        shard.proc.start()
+        shard.started = time.monotonic()
+        shard.restart_at = None
+        shard.metrics = {}
+        log.info(f"Shard {shard.index} started (pid {shard.proc.pid}, {len(shard.symbols)} symbols)")
+
+    def _check(self, shard: _Shard, now: float) -> None:
+        p = shard.proc
+        if shard.restart_at is not None:
+            if now >= shard.restart_at:
+                shard.restarts += 1
+                self._start(shard)
+            return
+        if p is None:
+            return
+        if p.is_alive():
+            last = shard.metrics.get("received", shard.started)
+            if now - last > self.heartbeat_timeout:
+                log.warn(f"Shard {shard.index} silent for {now - last:.0f}s; killing")
+                p.kill()
+            return
+        p.join(0)
+        if p.exitcode == 0:
+            log.info(f"Shard {shard.index} finished")
+            shard.proc = None
+            return
+        # crashed: back off harder on repeated quick failures
+        shard.failures = 0 if now - shard.started > self.max_backoff else shard.failures + 1
+        delay = min(self.max_backoff, self.backoff * (2 ** shard.failures))
+        log.warn(f"Shard {shard.index} exited with code {p.exitcode}; restarting in {delay:.1f}s")
+        shard.restart_at = now + delay
+
+    def _drain(self, timeout: float) -> None:
+        try:
+            msg = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            kind, index, payload = msg
+            if kind == "alerts":
+                if self.alerts is not None:
+                    self.alerts.submit(payload)
+            elif kind == "metrics":
+                payload["received"] = time.monotonic()
+                self.shards[index].metrics = payload
+            try:
+                msg = self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "shards": self.count,
+            "up": sum(1 for s in self.shards if s.proc is not None and s.proc.is_alive()),
+            "restarts": sum(s.restarts for s in self.shards),
+            "ticks": sum(s.metrics.get("ticks", 0) for s in self.shards),
+            "alerts": sum(s.metrics.get("submitted", 0) for s in self.shards),
+            "dropped": sum(s.metrics.get("dropped", 0) for s in self.shards),
+        }
+
+    # ---------- run ----------
+
+    def run(self) -> None:
+        """
+        Start every shard and supervise until Ctrl+C (or stop()).
+        """
+        log.configure(self.cfg.get("logging", {}).get("format", "text"))
+        m_cfg = self.cfg.get("metrics", {})
+        if m_cfg.get("enabled"):
+            metrics.REGISTRY.gauge("watcher_shards_up", lambda: self.status()["up"], "Shard processes alive")
+            metrics.REGISTRY.gauge("watcher_shard_restarts_total", lambda: self.status()["restarts"], kind="counter")
+            self._httpd = metrics.expose(m_cfg)
+        if self.cfg["discord"]["webhook_url"]:
+            self.alerts = AlertDispatcher(
+                self.cfg["discord"]["webhook_url"],
+                username="IBKR Price Watcher",
+                max_queue=self.cfg["discord"].get("queue_size", 1000),
+            ).start()
+        log.info(f"Starting {self.count} watcher shards (clientId {self.cfg['ib']['clientId']}+)")
+        # shards without symbols run too: hot-reloaded symbols may hash to them,
+        # and shard 0 always runs the signal providers and order routers
+        for shard in self.shards:
+            self._start(shard)
+        PROFILE.mark("shards")
+        if self.cfg.get("profile_startup"):
+            log.info(PROFILE.format())
+        next_report = time.monotonic() + self.report_seconds
+        try:
+            while not self._stopping:
+                self._drain(0.2)
+                now = time.monotonic()
+                for shard in self.shards:
+                    self._check(shard, now)
+                if self.report_seconds > 0 and now >= next_report:
+                    next_report += self.report_seconds
+                    log.info(f"Shards: {self.status()}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def stop(self) -> None:
+        self._stopping = True
+
+    def shutdown(self) -> None:
+        for shard in self.shards:
+            if shard.proc is not None and shard.proc.is_alive():
+                shard.proc.terminate()
+        for shard in self.shards:
+            if shard.proc is not None:
+                shard.proc.join(5)
+                if shard.proc.is_alive():
+                    shard.proc.kill()
+        self._drain(0)
+        log.info(f"Shards stopped: {self.status()}")
+        if self.alerts is not None:
+            log.info(f"Discord alerts: {self.alerts.stats()}")
+            self.alerts.close()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+        log.flush()
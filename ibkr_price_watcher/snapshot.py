@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import log
+
+VERSION = 1
+
+# symbol -> [last sent price, wall time of the last alert, last seen price]
+Entry = List[Optional[float]]
+
+
+class StateSnapshot:
+    """
+    Periodic on-disk copy of each symbol's alert state (last sent price, when
+    it was sent, and the last price seen), so a restarted watcher keeps its
+    thresholds and throttles instead of alerting every symbol on its first tick.
+
+    Each process writes its own file in `directory` (watcher-<shard>.json) by
+    atomic replace; restore() reads all of them, newest entry per symbol wins,
+    so a symbol that moved shard keeps its state. Files older than `max_age`
+    seconds are ignored. Send times are kept as wall-clock time and mapped
+    back onto the watcher's monotonic clock when restored.
+    """
+
+    def __init__(self, directory: str | Path, shard: int = 0, max_age: float = 900.0):
+        self.dir = Path(directory)
+        self.path = self.dir / f"watcher-{shard}.json"
+        self.max_age = max_age
+        self.saves = 0
+        self._lock = threading.Lock()  # periodic writes run in the executor
+
+    # ---------- save ----------
+
+    def collect(self, watcher: Any, price: Callable[[str], Optional[float]]) -> Dict[str, Any]:
+        """
+        Snapshot payload; `price(sym)` gives the last seen price (LineScheduler.price).
+        """
+        now_wall, now = time.time(), watcher.clock()
+        symbols: Dict[str, Entry] = {}
+        for sym, st in watcher.states.items():
+            seen = price(sym)
+            if seen is not None and seen != seen:
+                seen = None
+            if st.last_price is None and seen is None:
+                continue
+            sent = now_wall - (now - st.last_sent) if st.last_sent > -math.inf else None
+            symbols[sym] = [st.last_price, sent, seen]
+        return {"v": VERSION, "saved_at": now_wall, "symbols": symbols}
+
+    def write(self, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, separators=(",", ":"))
+        with self._lock:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.parent / f"{self.path.name}.{os.getpid()}.tmp"
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, self.path)
+            self.saves += 1
+
+    def save(self, watcher: Any, price: Callable[[str], Optional[float]]) -> None:
+        try:
+            self.write(self.collect(watcher, price))
+        except OSError as e:
+            log.warn(f"Could not write state snapshot {self.path}: {e}")
+
+    async def run(self, watcher: Any, price: Callable[[str], Optional[float]], interval: float) -> None:
+        """
+        Save every `interval` seconds; the payload is built on the loop, the
+        file is written from the default executor.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await loop.run_in_executor(None, self.write, self.collect(watcher, price))
+            except OSError as e:
+                log.warn(f"Could not write state snapshot {self.path}: {e}")
+
+    # ---------- restore ----------
+
+    def load(self, now: Optional[float] = None) -> Dict[str, Entry]:
+        """
+        Entries of every fresh snapshot file in the directory, newest file first wins.
+        """
+        now = time.time() if now is None else now
+        snaps = []
+        for p in self.dir.glob("watcher-*.json"):
+            try:
+                data = json.loads(p.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if data.get("v") != VERSION or now - float(data.get("saved_at", 0)) > self.max_age:
+                continue
+            snaps.append(data)
+        out: Dict[str, Entry] = {}
+        for data in sorted(snaps, key=lambda d: d["saved_at"], reverse=True):
+            for sym, entry in data.get("symbols", {}).items():
+                out.setdefault(sym, entry)
+        return out
+
+    def restore(self, watcher: Any, now: Optional[float] = None) -> int:
+        """
+        Apply the saved state to the watcher's symbols; returns how many were
+        restored. Rules are primed with the last seen price, so conditions that
+        already held before the restart do not fire again.
+        """
+        now_wall = time.time() if now is None else now
+        clock = watcher.clock()
+        n = 0
+        for sym, (last_price, sent, seen) in self.load(now_wall).items():
+            st = watcher.states.get(sym)
+            if st is None:
+                continue
+            if last_price is not None:
+                st.last_price = float(last_price)
+                if sent is not None:
+                    st.last_sent = clock - max(0.0, now_wall - float(sent))
+            prime = seen if seen is not None else last_price
+            if st.rules is not None and prime is not None:
+                st.rules.evaluate(float(prime))
+            n += 1
+        return n
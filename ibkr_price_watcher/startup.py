@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+# StartupProfile is the fetcher's (eodhd_fetcher/utils/startup.py)
+from eodhd_fetcher.utils.startup import StartupProfile
+
+# Backends loaded only by the modes that need them (ib_insync: live connection,
+# requests: Discord/signal providers, pyarrow/numpy: bars)
+HEAVY_MODULES = ("ib_insync", "requests", "pyarrow", "numpy", "pandas")
+
+# Phase timings from process start (first import of this module, at the top
+# of app.py) to "listening". Each shard process keeps its own.
+PROFILE = StartupProfile(HEAVY_MODULES)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional
+
+from .indicators import Indicators, build_indicators
+from .rules import SymbolRules, compile_symbol_rules
+
+
+class SymbolState:
+    """
+    Everything on_tick needs for one symbol, resolved once at subscribe time:
+    thresholds and throttle as plain floats, the rolling indicators and the
+    rules compiled against them, and the last sent price / send time.
+    """
+
+    __slots__ = (
+        "symbol", "label", "min_abs", "min_pct", "throttle", "indicators", "rules", "last_price", "last_sent",
+    )
+
+    def __init__(
+        self,
+        symbol: str,
+        label: str,
+        min_abs: float,
+        min_pct: float,
+        throttle: float,
+        rules: Optional[SymbolRules],
+        indicators: Optional[Indicators] = None,
+    ):
+        self.symbol = symbol
+        self.label = label
+        self.min_abs = min_abs
+        self.min_pct = min_pct
+        self.throttle = throttle
+        self.indicators = indicators
+        self.rules = rules
+        self.last_price: Optional[float] = None
+        self.last_sent = -math.inf  # watcher clock time of the last alert
+
+
+def build_state(
+    sym: str, s_cfg: Dict[str, Any], cfg: Dict[str, Any], indicators: Optional[Indicators] = None
+) -> SymbolState:
+    """
+    `indicators` lets a reload keep the rolling history of an unchanged
+    indicator block instead of starting from empty windows.
+    """
+    dfl = cfg.get("defaults", {})
+    nick = s_cfg.get("nickname")
+    if indicators is None:
+        indicators = build_indicators(sym, s_cfg)
+    return SymbolState(
+        symbol=sym,
+        label=f"{nick} ({sym})" if nick else sym,
+        min_abs=float(s_cfg.get("min_change_abs", dfl.get("min_change_abs", 0.0))),
+        min_pct=float(s_cfg.get("min_change_pct", dfl.get("min_change_pct", 0.0))),
+        throttle=float(cfg.get("throttle_seconds", 0)),
+        rules=compile_symbol_rules(sym, s_cfg, indicators),
+        indicators=indicators,
+    )
@@ -1,33 +1,82 @@
 from __future__ import annotations
 
 import json
+import zlib
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, List, Tuple
 
-def load_symbols(symbols_dir: str | Path) -> Dict[str, Dict[str, Any]]:
+from . import log
+
+
+def is_strategy(data: Dict[str, Any]) -> bool:
     """
-    Load one JSON per symbol from `symbols_dir`. Keys are uppercased symbols.
+    Strategy files (e.g. congress_aapl_autobuy.json) share the symbols
+    directory but describe signal providers rather than one symbol.
+    """
+    return "signal_providers" in data or "strategy" in data
+
+
+def load_symbol_files(symbols_dir: str | Path) -> Tuple[Dict[str, Tuple[str, Dict[str, Any]]], List[str]]:
+    """
+    Per-file view of load_symbols: {file name: (SYMBOL, config)}, and the
+    names of files that could not be read (e.g. half-written JSON).
     """
     p = Path(symbols_dir)
     p.mkdir(parents=True, exist_ok=True)
 
-    out: Dict[str, Dict[str, Any]] = {}
+    files: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    failed: List[str] = []
     for f in p.glob("*.json"):
         try:
             data = json.loads(f.read_text(encoding="utf-8"))
             sym = str(data.get("symbol", "")).strip().upper()
+            if not sym and is_strategy(data):
+                continue
             if not sym:
-                print(f"[WARN] {f.name} missing 'symbol', skipping")
+                log.warn(f"{f.name} missing 'symbol', skipping")
                 continue
             # sane defaults
             data.setdefault("exchange", "SMART")
             data.setdefault("currency", "USD")
             data.setdefault("secType", "STK")
-            out[sym] = data
+            files[f.name] = (sym, data)
         except Exception as e:
-            print(f"[WARN] Failed reading {f.name}: {e}")
+            log.warn(f"Failed reading {f.name}: {e}")
+            failed.append(f.name)
+    return files, failed
+
+
+def load_symbols(symbols_dir: str | Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Load one JSON per symbol from `symbols_dir`. Keys are uppercased symbols.
+    """
+    files, _ = load_symbol_files(symbols_dir)
+    out: Dict[str, Dict[str, Any]] = dict(files.values())
 
     if not out:
-        print("[WARN] No symbols found. Add JSON files like AAPL.json to your symbols directory.")
+        log.warn("No symbols found. Add JSON files like AAPL.json to your symbols directory.")
+
+    return out
+
 
+def load_strategies(symbols_dir: str | Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the strategy files from `symbols_dir`, keyed by their "name" (or file stem).
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    for f in Path(symbols_dir).glob("*.json"):
+        try:
+            data = json.loads(f.read_text(encoding="utf-8"))
+        except Exception as e:
+            log.warn(f"Failed reading {f.name}: {e}")
+            continue
+        if isinstance(data, dict) and not data.get("symbol") and is_strategy(data):
+            out[str(data.get("name") or f.stem)] = data
     return out
+
+
+def shard_of(sym: str, count: int) -> int:
+    """
+    Stable shard index for a symbol (same answer in every process and run).
+    """
+    return zlib.crc32(sym.encode("utf-8")) % count if count > 1 else 0
@@ -1,128 +1,463 @@
 from __future__ import annotations
 
-import time
-from typing import Dict, Any, Optional, List
+import asyncio
+from pathlib import Path
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Dict, Any, Optional, List
 
-from ib_insync import IB, util, Stock, Contract
-from .discord_client import post_discord
+from . import log, metrics
+from .bars import BarAggregator
+from .congress import CongressTradesProvider, Signal
+from .contracts import ContractCache, refresh_cache, resolve_contracts
+from .discord_client import AlertDispatcher
+from .journal import TickJournal
+from .lines import LineScheduler, symbol_priority
+from .orders import OrderRouter, universe_symbols, watch_universe
+from .reload import SymbolsReloader
+from .snapshot import StateSnapshot
+from .startup import PROFILE
+from .state import SymbolState, build_state
+from .symbols import load_strategies
+
+if TYPE_CHECKING:
+    from ib_insync import IB, Contract
 
 class PriceWatcher:
-    def __init__(self, ib: IB, cfg: Dict[str, Any], symbols: Dict[str, Dict[str, Any]]):
+    def __init__(
+        self,
+        ib: IB,
+        cfg: Dict[str, Any],
+        symbols: Dict[str, Dict[str, Any]],
+        alerts: Optional[AlertDispatcher] = None,
+    ):
         self.ib = ib
         self.cfg = cfg
         self.symbols = symbols
-        self.last_sent_price: Dict[str, float] = {}
-        self.last_sent_time: Dict[str, float] = {}
+        self.alerts = alerts
+        # per-symbol thresholds, rules and last-sent state, resolved once
+        self.states: Dict[str, SymbolState] = {
+            sym: build_state(sym, s_cfg, cfg) for sym, s_cfg in symbols.items()
+        }
+        self._by_conid: Dict[int, SymbolState] = {}
+        # time source for throttling and indicator windows; replay swaps in recorded time
+        self.clock = monotonic
+        # alert lines produced during the current pendingTickersEvent batch
+        self._pending: List[str] = []
+        self.price_alerts = 0
+        self.rule_alerts = 0
 
-    # ---------- helpers ----------
+    def bind(self, contract: Contract) -> None:
+        """
+        Index a qualified contract's conId so on_tick finds its state directly.
+        """
+        st = self.states.get(contract.symbol)
+        if st is not None and contract.conId:
+            self._by_conid[contract.conId] = st
 
-    def _passes_thresholds(self, sym: str, new_price: float) -> bool:
-        prev = self.last_sent_price.get(sym)
-        if prev is None:
-            return True  # first tick
+    # ---------- symbol set changes (hot reload) ----------
 
-        s_cfg = self.symbols[sym]
-        dfl = self.cfg.get("defaults", {})
-        min_abs = float(s_cfg.get("min_change_abs", dfl.get("min_change_abs", 0.0)))
-        min_pct = float(s_cfg.get("min_change_pct", dfl.get("min_change_pct", 0.0)))
+    def add_symbol(self, sym: str, s_cfg: Dict[str, Any]) -> None:
+        self.symbols[sym] = s_cfg
+        self.states[sym] = build_state(sym, s_cfg, self.cfg)
 
-        abs_change = abs(new_price - prev)
-        pct_change = (abs_change / prev * 100.0) if prev else 0.0
+    def remove_symbol(self, sym: str) -> None:
+        self.symbols.pop(sym, None)
+        st = self.states.pop(sym, None)
+        if st is not None:
+            self._by_conid = {k: v for k, v in self._by_conid.items() if v is not st}
 
-        if abs_change < min_abs:
-            return False
-        if min_pct > 0.0 and pct_change < min_pct:
-            return False
-        return True
+    def update_symbol(self, sym: str, s_cfg: Dict[str, Any], price: Optional[float] = None) -> None:
+        """
+        Swap in new thresholds/rules for an already-subscribed symbol, keeping
+        its last-sent state. Rules are primed with `price` (if known) so a
+        reload does not re-fire rules whose condition already held.
+        """
+        old = self.states.get(sym)
+        keep = old is not None and s_cfg.get("indicators") == self.symbols.get(sym, {}).get("indicators")
+        new = build_state(sym, s_cfg, self.cfg, old.indicators if keep else None)
+        if old is not None:
+            new.last_price = old.last_price
+            new.last_sent = old.last_sent
+        if new.rules is not None and price is not None and price == price:
+            new.rules.evaluate(price)
+        self.symbols[sym] = s_cfg
+        self.states[sym] = new
+        for con_id, st in self._by_conid.items():
+            if st is old:
+                self._by_conid[con_id] = new
 
-    def _throttled(self, sym: str) -> bool:
-        throttle = float(self.cfg.get("throttle_seconds", 0))
-        if throttle <= 0:
-            return False
-        last_t = self.last_sent_time.get(sym, 0.0)
-        return (time.time() - last_t) < throttle
+    @property
+    def last_sent_price(self) -> Dict[str, float]:
+        return {s: st.last_price for s, st in self.states.items() if st.last_price is not None}
 
-    def _symbol_label(self, sym: str) -> str:
-        nick = self.symbols[sym].get("nickname")
-        return f"{nick} ({sym})" if nick else sym
+    @property
+    def last_sent_time(self) -> Dict[str, float]:
+        """
+        Clock time (time.monotonic() when live) of each symbol's last alert.
+        """
+        return {s: st.last_sent for s, st in self.states.items() if st.last_price is not None}
 
     # ---------- tick handler ----------
 
     def on_tick(self, ticker) -> None:
-        sym = ticker.contract.symbol
+        c = ticker.contract
+        st = self._by_conid.get(c.conId) or self.states.get(c.symbol)
+        if st is None:
+            return
         last = ticker.last
         if last is None:
             last = ticker.marketPrice()
         if last is None or last != last:  # None or NaN
             return
 
-        if not self._passes_thresholds(sym, last):
-            return
-        if self._throttled(sym):
+        if st.indicators is not None:
+            st.indicators.update(self.clock(), last, ticker.volume)
+        if st.rules is not None:
+            for rule in st.rules.evaluate(last):
+                self._on_rule(st, rule, last)
+
+        prev = st.last_price
+        if prev is not None:  # the first tick always passes
+            abs_change = abs(last - prev)
+            if abs_change < st.min_abs:
+                return
+            if st.min_pct > 0.0 and (abs_change / prev * 100.0 if prev else 0.0) < st.min_pct:
+                return
+
+        now = self.clock()
+        if now - st.last_sent < st.throttle:
             return
 
-        self.last_sent_price[sym] = last
-        self.last_sent_time[sym] = time.time()
+        st.last_price = last
+        st.last_sent = now
+
+        content = f"💹 **{st.label}** last price: **{last:.4f}**"
+        self.price_alerts += 1
+        self._pending.append(content)
+        log.alert(content)
 
-        content = f"💹 **{self._symbol_label(sym)}** last price: **{last:.4f}**"
-        webhook = self.cfg["discord"]["webhook_url"]
-        if webhook:
-            post_discord(webhook, content, username="IBKR Price Watcher")
-        print(content)
+    def _on_rule(self, st: SymbolState, rule, price: float) -> None:
+        content = f"🔔 **{st.label}** rule **{rule.name}** ({rule.action}) hit at **{price:.4f}**"
+        self.rule_alerts += 1
+        self._pending.append(content)
+        log.alert(content)
+
+    def flush_alerts(self) -> None:
+        """
+        Hand the alerts of one tick batch to the dispatcher as a single item,
+        so they go out combined instead of one webhook call per symbol.
+        """
+        if not self._pending:
+            return
+        if self.alerts is not None:
+            self.alerts.submit(self._pending)
+        self._pending = []
 
 # ---------- assembly / run ----------
 
-async def run_async(cfg: Dict[str, Any], symbols: Dict[str, Dict[str, Any]]) -> None:
+
+def start_signal_providers(
+    cfg: Dict[str, Any],
+    alerts: Optional[Any],
+    ib: Optional[Any] = None,
+    lines: Optional[LineScheduler] = None,
+    routers: Optional[List[OrderRouter]] = None,
+) -> List[asyncio.Future]:
+    """
+    One polling task per enabled provider in the strategy files. With shards,
+    only shard 0 polls, so each signal is seen once. Given the IB connection
+    and line scheduler, place_order rules are routed through an OrderRouter
+    per strategy (appended to `routers`); it only places orders when
+    orders.enabled is set.
+    """
+    shard = cfg.get("shard")
+    if not cfg.get("signals", {}).get("enabled", True) or (shard and shard["index"] != 0):
+        return []
+
+    def on_signal(s: Signal, router: Optional[OrderRouter] = None) -> None:
+        log.info(f"Signal: {s.describe()}")
+        if alerts is not None:
+            alerts.submit([s.describe()])
+        if router is not None and s.rule.then.get("action") == "place_order":
+            try:
+                router.on_signal(s)
+            except Exception as e:
+                log.warn(f"{router.name}: order for {s.describe()} failed: {e}")
+
+    tasks: List[asyncio.Future] = []
+    state_dir = Path(cfg.get("signals", {}).get("state_dir", "cache/signals"))
+    for name, s_cfg in load_strategies(cfg["paths"]["symbols_dir"]).items():
+        p_cfg = (s_cfg.get("signal_providers") or {}).get("congress_trades") or {}
+        if not p_cfg.get("enabled"):
+            continue
+        try:
+            provider = CongressTradesProvider(name, s_cfg, state_dir / f"{name}.json")
+        except (KeyError, TypeError, ValueError) as e:
+            log.warn(f"{name}: congress_trades provider not started: {e}")
+            continue
+        router: Optional[OrderRouter] = None
+        wants_orders = any(
+            (r.get("then") or {}).get("action") == "place_order"
+            for r in (s_cfg.get("strategy") or {}).get("rules") or []
+        )
+        if wants_orders and ib is not None and lines is not None:
+            live = bool(cfg.get("orders", {}).get("enabled", False))
+            try:
+                router = OrderRouter.from_strategy(name, s_cfg, ib, lines, alerts, live=live)
+            except (KeyError, TypeError, ValueError) as e:
+                log.warn(f"{name}: order router not started; strategy skipped: {e}")
+                continue
+            if not live:
+                log.info(f"{name}: orders.enabled is off; order decisions are logged only")
+            try:
+                router.sync()
+            except Exception as e:
+                log.warn(f"{name}: could not read positions/orders from IB; risk counters start at zero: {e}")
+            if routers is not None:
+                routers.append(router)
+            tasks.append(asyncio.ensure_future(watch_universe(ib, lines, universe_symbols(s_cfg))))
+        tasks.append(asyncio.ensure_future(provider.run(lambda s, r=router: on_signal(s, r))))
+    return tasks
+
+
+def instrument(ib: Any, watcher: PriceWatcher, m_cfg: Dict[str, Any], shard: Optional[Dict[str, Any]] = None):
+    """
+    Register the watcher's metrics and start the endpoint. Returns a timed
+    wrapper around watcher.on_tick and the HTTP server (or None).
+    """
+    reg = metrics.REGISTRY
+    batch = reg.histogram("watcher_tick_batch_size", "Tickers per pendingTickersEvent batch", metrics.SIZE_BUCKETS)
+    took = reg.histogram("watcher_on_tick_seconds", "Time spent in PriceWatcher.on_tick per ticker")
+    ib.pendingTickersEvent += lambda ticks: batch.observe(len(ticks))
+    reg.gauge("watcher_symbols", lambda: len(watcher.states), "Symbols being watched")
+    reg.gauge("watcher_alerts_total", lambda: watcher.price_alerts, "Alerts produced", kind="counter", type="price")
+    reg.gauge("watcher_alerts_total", lambda: watcher.rule_alerts, "Alerts produced", kind="counter", type="rule")
+    reg.gauge("log_records_dropped_total", lambda: log.LOG.dropped, "Log records dropped on a full queue", kind="counter")
+
+    def timed(t: Any) -> None:
+        t0 = perf_counter()
+        try:
+            watcher.on_tick(t)
+        finally:
+            took.observe(perf_counter() - t0)
+
+    return timed, metrics.expose(m_cfg, shard["index"] if shard else None)
+
+
+async def reconnect(
+    ib: Any, cfg: Dict[str, Any], lines: LineScheduler, routers: Optional[List[OrderRouter]] = None
+) -> None:
+    """
+    Reconnect with exponential backoff after the IB connection dropped, then
+    request market data again and resync the order routers' risk counters.
+    Watcher state stays in memory throughout.
+    """
+    delay = 1.0
+    max_delay = float(cfg["ib"].get("reconnect_max_backoff_seconds", 60))
+    while not ib.isConnected():
+        log.warn(f"IB connection lost; reconnecting in {delay:g}s")
+        await asyncio.sleep(delay)
+        try:
+            await ib.connectAsync(cfg["ib"]["host"], cfg["ib"]["port"], clientId=cfg["ib"]["clientId"])
+        except Exception as e:
+            log.warn(f"Reconnect failed: {e}")
+            delay = min(delay * 2.0, max_delay)
+    if cfg["ib"].get("useDelayed", False):
+        ib.reqMarketDataType(3)
+    lines.resubscribe()
+    log.info(f"Reconnected to IB; {len(lines.streaming) + len(lines.active)} market data lines re-requested")
+    for router in routers or ():
+        try:
+            router.sync()
+        except Exception as e:
+            log.warn(f"{router.name}: resync after reconnect failed: {e}")
+
+
+async def run_async(
+    cfg: Dict[str, Any],
+    symbols: Dict[str, Dict[str, Any]],
+    ib: Optional[IB] = None,
+    alerts: Optional[Any] = None,
+) -> None:
     """
     Connect to IBKR, subscribe to market data, and dispatch to PriceWatcher.
+    `ib` can be supplied to run against a stand-in (see benchmarks/stubs.py);
+    `alerts` replaces the Discord dispatcher (shards forward to the supervisor).
     """
+    log.configure(cfg.get("logging", {}).get("format", "text"))
+    shard = cfg.get("shard")
     if not symbols:
-        print("[WARN] No symbols loaded; exiting.")
-        return
+        if not shard:
+            log.warn("No symbols loaded; exiting.")
+            return
+        # an empty shard still picks up reloaded symbols, and shard 0 runs the signal providers
+        log.info(f"Shard {shard['index']}: no symbols yet")
 
-    ib = IB()
-    print(f"[INFO] Connecting to IB {cfg['ib']['host']}:{cfg['ib']['port']} (clientId={cfg['ib']['clientId']}) ...")
+    if ib is None:
+        from ib_insync import IB
+
+        ib = IB()
+    log.info(f"Connecting to IB {cfg['ib']['host']}:{cfg['ib']['port']} (clientId={cfg['ib']['clientId']}) ...")
     await ib.connectAsync(cfg["ib"]["host"], cfg["ib"]["port"], clientId=cfg["ib"]["clientId"])
 
     use_delayed = cfg["ib"].get("useDelayed", False)
     if use_delayed:
         # 1=Live, 2=Frozen, 3=Delayed, 4=Delayed/Frozen
         ib.reqMarketDataType(3)
-        print("[INFO] Using delayed market data")
+        log.info("Using delayed market data")
+    PROFILE.mark("connect")
+
+    if alerts is None and cfg["discord"]["webhook_url"]:
+        alerts = AlertDispatcher(
+            cfg["discord"]["webhook_url"],
+            username="IBKR Price Watcher",
+            max_queue=cfg["discord"].get("queue_size", 1000),
+        ).start()
+
+    watcher = PriceWatcher(ib, cfg, symbols, alerts=alerts)
+
+    # Qualified contracts: cache hits subscribe immediately, misses are
+    # qualified in pacing-aware chunks
+    cc_cfg = cfg.get("contract_cache", {})
+    chunk = (int(cc_cfg.get("chunk_size", 50)), float(cc_cfg.get("chunk_pause_seconds", 1.0)))
+    cache: Optional[ContractCache] = None
+    if cc_cfg.get("enabled"):
+        cache = ContractCache(cc_cfg["path"], ttl=float(cc_cfg.get("ttl_hours", 168)) * 3600)
+    qualified = await resolve_contracts(ib, symbols, cache, *chunk)
+    for c in qualified:
+        watcher.bind(c)
+    PROFILE.mark("contracts")
+
+    # Last-sent prices and throttles from before a restart
+    snapshot: Optional[StateSnapshot] = None
+    ss_cfg = cfg.get("state_snapshot", {})
+    if ss_cfg.get("enabled"):
+        snapshot = StateSnapshot(
+            ss_cfg["dir"], shard=shard["index"] if shard else 0, max_age=float(ss_cfg.get("max_age_seconds", 900))
+        )
+        restored = snapshot.restore(watcher)
+        if restored:
+            log.info(f"Restored alert state for {restored} symbols from {snapshot.dir}")
+        PROFILE.mark("restore")
 
-    watcher = PriceWatcher(ib, cfg, symbols)
+    # Request market data: everything streams while it fits in the account's
+    # line limit, otherwise low-priority symbols share rotating/snapshot lines
+    l_cfg = cfg.get("market_data_lines", {})
+    lines = LineScheduler(
+        ib,
+        max_lines=l_cfg.get("max_lines", 100),
+        reserve_lines=l_cfg.get("reserve_lines", 20),
+        mode=l_cfg.get("mode", "rotate"),
+        dwell=float(l_cfg.get("dwell_seconds", 3.0)),
+    )
+    for c in qualified:
+        lines.add(c, symbol_priority(symbols.get(c.symbol, {})))
+    lines.rebalance()
+    if lines.pool:
+        log.info(
+            f"{len(symbols)} symbols over {lines.max_lines} lines: "
+            f"{len(lines.streaming)} streaming, {len(lines.pool)} {lines.mode}"
+        )
 
-    # Build IB contracts
-    contracts: List[Contract] = []
-    for sym, s_cfg in symbols.items():
-        if s_cfg.get("secType", "STK").upper() == "STK":
-            c = Stock(symbol=sym, exchange=s_cfg.get("exchange", "SMART"), currency=s_cfg.get("currency", "USD"))
-        else:
-            c = Contract()
-            c.symbol = sym
-            c.secType = s_cfg.get("secType", "STK")
-            c.exchange = s_cfg.get("exchange", "SMART")
-            c.currency = s_cfg.get("currency", "USD")
-        contracts.append(c)
+    journal: Optional[TickJournal] = None
+    if cfg.get("journal", {}).get("enabled"):
+        journal = TickJournal(cfg["journal"]["dir"], max_bytes=int(cfg["journal"]["max_mb"] * 1024 * 1024))
+        ib.pendingTickersEvent += journal.record
+        log.info(f"Recording ticks to {journal.path}")
 
-    qualified = await ib.qualifyContractsAsync(*contracts)
+    bars: Optional[BarAggregator] = None
+    if cfg.get("bars", {}).get("enabled"):
+        b_cfg = cfg["bars"]
+        bars = BarAggregator(
+            b_cfg["dir"],
+            intervals=b_cfg.get("intervals", (1, 60)),
+            buffer_rows=b_cfg.get("buffer_rows", 65536),
+            ticker_suffix=b_cfg.get("ticker_suffix", ".US"),
+        )
+        ib.pendingTickersEvent += bars.on_tickers
+        log.info(f"Writing {', '.join(s.label for s in bars.series)} bars to {bars.dir}")
 
-    # Request market data streams
-    _ = [ib.reqMktData(c, "", False, False) for c in qualified]
+    # Counters/histograms; on_tick is only timed when metrics are enabled
+    m_cfg = cfg.get("metrics", {})
+    on_tick = watcher.on_tick
+    httpd = None
+    if m_cfg.get("enabled"):
+        on_tick, httpd = instrument(ib, watcher, m_cfg, cfg.get("shard"))
 
     # Hook event for batched tick delivery
     def on_pending_tickers(ticks):
         for t in ticks:
             try:
-                watcher.on_tick(t)
+                on_tick(t)
             except Exception as e:
-                print(f"[WARN] on_tick error for {t.contract.symbol}: {e}")
+                log.warn(f"on_tick error for {t.contract.symbol}: {e}")
+        watcher.flush_alerts()
 
     ib.pendingTickersEvent += on_pending_tickers
+    ib.pendingTickersEvent += lines.on_tickers
+
+    background: List[asyncio.Future] = [
+        asyncio.ensure_future(lines.run(float(l_cfg.get("report_seconds", 60))))
+    ]
+    if bars is not None:
+        background.append(asyncio.ensure_future(bars.run(float(cfg["bars"].get("flush_seconds", 30)))))
+    if cache is not None:
+        background.append(asyncio.ensure_future(refresh_cache(ib, dict(symbols), cache, *chunk)))
+    shard = cfg.get("shard")
+    m_json = metrics.json_path(m_cfg, shard["index"] if shard else None) if m_cfg.get("enabled") else None
+    if m_json is not None:
+        background.append(asyncio.ensure_future(metrics.dump_json(m_json, float(m_cfg.get("json_interval_seconds", 15)))))
+    routers: List[OrderRouter] = []
+    background.extend(start_signal_providers(cfg, alerts, ib, lines, routers))
+
+    def on_disconnected() -> None:
+        if snapshot is not None:
+            snapshot.save(watcher, lines.price)
+
+    if snapshot is not None:
+        ib.disconnectedEvent += on_disconnected
+        background.append(asyncio.ensure_future(
+            snapshot.run(watcher, lines.price, float(ss_cfg.get("interval_seconds", 5)))
+        ))
+
+    if cfg.get("symbols_reload", {}).get("enabled"):
+        reloader = SymbolsReloader(
+            ib, watcher, cfg["paths"]["symbols_dir"], lines, cache, chunk,
+            shard=(shard["index"], shard["count"]) if shard else None,
+        )
+        background.append(asyncio.ensure_future(reloader.run(cfg["symbols_reload"]["interval_seconds"])))
+        log.info(f"Watching {cfg['paths']['symbols_dir']} for symbol changes")
+
+    PROFILE.mark("subscribe")
+    if cfg.get("profile_startup"):
+        log.info(PROFILE.format())
 
     try:
-        print("[INFO] Listening for price updates. Ctrl+C to stop.")
+        log.info("Listening for price updates. Ctrl+C to stop.")
         while True:
-            await util.sleep(1.0)
+            await asyncio.sleep(1.0)
+            if cfg["ib"].get("reconnect", True) and not ib.isConnected():
+                await reconnect(ib, cfg, lines, routers)
     finally:
+        for task in background:
+            task.cancel()
+        if snapshot is not None:
+            ib.disconnectedEvent -= on_disconnected
+            snapshot.save(watcher, lines.price)
+        for router in routers:
+            log.info(f"Orders ({router.name}): {router.stats()}")
         ib.disconnect()
+        if bars is not None:
+            bars.close()
+            log.info(f"Bars: {bars.bars_written} written in {bars.files_written} files")
+        if journal is not None:
+            journal.close()
+            log.info(f"Tick journal: {journal.records} records")
+        if alerts is not None:
+            log.info(f"Discord alerts: {alerts.stats()}")
+            alerts.close()
+        if m_json is not None:
+            metrics.write_json(m_json)
+        if httpd is not None:
+            httpd.shutdown()
+        log.flush()